@@ -0,0 +1,41 @@
+#!/usr/bin/env bash
+# Run a one-off command as a Kubernetes Job built from the deployment's pod spec
+# (same env, secrets and volumes) and wait for it; prints its logs either way.
+#
+#   run-job.sh <name> <image> <command...>
+set -euo pipefail
+
+NAME=$1
+IMAGE=$2
+shift 2
+JOB=$DEPLOYMENT_NAME-$NAME-$GITHUB_RUN_ID-$GITHUB_RUN_ATTEMPT
+COMMAND=$(printf '%s\n' "$@" | jq -R . | jq -cs .)
+
+kubectl --kubeconfig=kubeconfig get deployment/$DEPLOYMENT_NAME -n $NAMESPACE -o json \
+  | jq --arg job "$JOB" --arg image "$IMAGE" --argjson command "$COMMAND" '{
+      apiVersion: "batch/v1",
+      kind: "Job",
+      metadata: {name: $job, namespace: .metadata.namespace},
+      spec: {
+        backoffLimit: 0,
+        ttlSecondsAfterFinished: 86400,
+        template: {
+          spec: (.spec.template.spec | del(.initContainers) | .restartPolicy = "Never"
+            | .containers = [.containers[0]
+              | {name: "job", image: $image, command: $command, env, envFrom, volumeMounts}
+              | with_entries(select(.value != null))])
+        }
+      }
+    }' \
+  | kubectl --kubeconfig=kubeconfig apply -f -
+
+for i in {1..120}; do
+  STATUS=$(kubectl --kubeconfig=kubeconfig get job/$JOB -n $NAMESPACE -o jsonpath='{.status.succeeded}/{.status.failed}')
+  case "$STATUS" in
+    1/*) kubectl --kubeconfig=kubeconfig logs job/$JOB -n $NAMESPACE; exit 0 ;;
+    */1) kubectl --kubeconfig=kubeconfig logs job/$JOB -n $NAMESPACE; echo "Job $JOB failed"; exit 1 ;;
+  esac
+  sleep 5
+done
+echo "Job $JOB did not finish in time"
+exit 1
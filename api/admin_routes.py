@@ -0,0 +1,41 @@
+import hmac
+import os
+import socket
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from client import cache
+from models.schemas import CacheInvalidateRequest, CacheInvalidateResponse
+
+# Shared secret the owning services send as X-Internal-Token; unset disables these endpoints
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+# Reported with every eviction: the caches are per pod, so callers must reach each replica
+POD_NAME = os.getenv("POD_NAME") or socket.gethostname()
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Internal endpoints are disabled")
+    if x_internal_token is None or not hmac.compare_digest(x_internal_token.encode(), INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+# Cluster-internal endpoints for the owning services; do NOT expose via Kong Ingress
+router = APIRouter(
+    prefix="/internal/cache",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.post("/invalidate", response_model=CacheInvalidateResponse)
+def invalidate_cache(data: CacheInvalidateRequest):
+    """Evict stale company/partner/product records from this pod's enrichment cache"""
+    evicted = cache.invalidate(data.entity.value, data.ids)
+    return CacheInvalidateResponse(entity=data.entity, evicted=evicted, pod=POD_NAME)
+
+
+@router.get("/stats")
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and sizes of the enrichment caches"""
+    return {entity: c.stats() for entity, c in cache.CACHES.items()}
@@ -0,0 +1,186 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_async_db, get_async_read_db
+from models.schemas import InvoiceCreate, InvoiceResponse, InvoiceListResponse, InvoiceUpdate, InvoiceListFilters, SortOrder
+from models.schemas import InvoiceBulkCreate, InvoiceBulkResponse, ExportFormat, SummaryDimension, InvoiceSummaryResponse
+from models.schemas import InvoiceChangesResponse, InvoicePatch, StatusUpdate
+from repository.line_diff import UnknownLine
+from repository.pagination import InvalidCursor
+from service.async_invoice_service import AsyncInvoiceService
+from service.export import MEDIA_TYPES, astream_invoice_export
+from service.list_json import encode_list
+from api.routes import MAX_CHANGES_PAGE_SIZE, MAX_PAGE_SIZE, extract_user_id_from_token, get_list_filters, get_max_age
+from api.routes import cache_headers, etag_matches, invoice_etag, list_etag, not_modified
+
+# Same endpoints as api.routes, served on the event loop (enabled with ASYNC_MODE)
+router = APIRouter(prefix="/invoices", tags=["invoices"])
+
+
+def get_service(db: AsyncSession = Depends(get_async_db)) -> AsyncInvoiceService:
+    return AsyncInvoiceService(db)
+
+
+def get_read_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncInvoiceService:
+    return AsyncInvoiceService(db)
+
+
+@router.get("", response_model=List[InvoiceListResponse])
+async def get_invoices(
+    request: Request,
+    filters: InvoiceListFilters = Depends(get_list_filters),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
+    service: AsyncInvoiceService = Depends(get_read_service),
+):
+    """Get invoices for the authenticated user (keyset-paginated when limit is set)"""
+    user_id = extract_user_id_from_token(request)
+    try:
+        rows, next_cursor = await service.list_invoice_rows(user_id, filters, limit, cursor, order)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    etag = list_etag(rows, next_cursor)
+    headers = cache_headers(etag, next_cursor)
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    return Response(encode_list(rows), media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+async def export_invoices(
+    request: Request,
+    format: ExportFormat = ExportFormat.CSV,
+    filters: InvoiceListFilters = Depends(get_list_filters),
+    order: SortOrder = SortOrder.DESC,
+):
+    """Stream all matching invoices as CSV or NDJSON with constant memory"""
+    user_id = extract_user_id_from_token(request)
+    return StreamingResponse(
+        astream_invoice_export(user_id, filters, order, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="invoices.{format.value}"'},
+    )
+
+
+@router.get("/summary", response_model=InvoiceSummaryResponse)
+async def get_invoice_summary(
+    request: Request,
+    group_by: List[SummaryDimension] = Query([SummaryDimension.STATUS]),
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+    service: AsyncInvoiceService = Depends(get_read_service),
+):
+    """Invoice counts and totals grouped by status, issue month and/or partner"""
+    user_id = extract_user_id_from_token(request)
+    return await service.get_summary(user_id, list(dict.fromkeys(group_by)), month_from, month_to)
+
+
+@router.get("/changes", response_model=InvoiceChangesResponse)
+async def get_invoice_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_CHANGES_PAGE_SIZE),
+    service: AsyncInvoiceService = Depends(get_read_service),
+):
+    """Invoice changes after the `since` event id, oldest first (see routes.get_invoice_changes)"""
+    user_id = extract_user_id_from_token(request)
+    return await service.list_changes(user_id, since, limit)
+
+
+@router.get("/{invoice_id}", response_model=InvoiceResponse)
+async def get_invoice(
+    invoice_id: UUID,
+    request: Request,
+    response: Response,
+    max_age: Optional[float] = Depends(get_max_age),
+    service: AsyncInvoiceService = Depends(get_read_service),
+):
+    """Get a specific invoice by ID (304 on a matching If-None-Match, see routes.get_invoice)"""
+    user_id = extract_user_id_from_token(request)
+    if request.headers.get("if-none-match"):
+        version = await service.get_invoice_version(invoice_id, user_id)
+        if version is not None and etag_matches(request, invoice_etag(version)):
+            return not_modified(cache_headers(invoice_etag(version)))
+    invoice = await service.get_invoice_response(invoice_id, user_id, max_age)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    response.headers.update(cache_headers(invoice_etag(invoice.version)))
+    return invoice
+
+
+@router.post("", response_model=InvoiceResponse, status_code=201)
+async def add_invoice(data: InvoiceCreate, request: Request, service: AsyncInvoiceService = Depends(get_service)):
+    """Create a new invoice"""
+    user_id = extract_user_id_from_token(request)
+    return await service.create_invoice_response(data, user_id)
+
+
+@router.post("/bulk", response_model=InvoiceBulkResponse)
+async def add_invoices_bulk(data: InvoiceBulkCreate, request: Request, service: AsyncInvoiceService = Depends(get_service)):
+    """Create many invoices at once; each item is reported as created or failed"""
+    user_id = extract_user_id_from_token(request)
+    return await service.create_invoices_bulk(data.invoices, user_id)
+
+
+@router.put("/{invoice_id}", response_model=InvoiceResponse)
+async def update_invoice(
+    invoice_id: UUID,
+    data: InvoiceUpdate,
+    request: Request,
+    service: AsyncInvoiceService = Depends(get_service)
+):
+    """Update an existing invoice"""
+    user_id = extract_user_id_from_token(request)
+    try:
+        invoice = await service.update_invoice(invoice_id, data, user_id)
+    except UnknownLine as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
+@router.patch("/{invoice_id}/status", response_model=InvoiceListResponse)
+async def update_invoice_status(
+    invoice_id: UUID,
+    data: StatusUpdate,
+    request: Request,
+    service: AsyncInvoiceService = Depends(get_service)
+):
+    """Change only the status (see routes.update_invoice_status)"""
+    user_id = extract_user_id_from_token(request)
+    invoice = await service.update_status(invoice_id, data.status, user_id)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
+@router.patch("/{invoice_id}", response_model=InvoiceResponse)
+async def patch_invoice(
+    invoice_id: UUID,
+    data: InvoicePatch,
+    request: Request,
+    service: AsyncInvoiceService = Depends(get_service)
+):
+    """Change only the fields sent (see routes.patch_invoice)"""
+    user_id = extract_user_id_from_token(request)
+    try:
+        invoice = await service.patch_invoice(invoice_id, data, user_id)
+    except UnknownLine as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
+@router.delete("/{invoice_id}", status_code=204)
+async def delete_invoice(invoice_id: UUID, request: Request, service: AsyncInvoiceService = Depends(get_service)):
+    """Delete an invoice"""
+    user_id = extract_user_id_from_token(request)
+    success = await service.delete_invoice(invoice_id, user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Invoice not found")
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+import jwt
+from fastapi import HTTPException, Request
+from prometheus_client import Counter
+
+JWT_VERIFY = os.getenv("JWT_VERIFY", "true").lower() in ("1", "true", "yes")
+JWT_ALGORITHMS = [alg.strip() for alg in os.getenv("JWT_ALGORITHMS", "HS256,RS256").split(",") if alg.strip()]
+JWT_SECRET = os.getenv("JWT_SECRET")
+JWT_PUBLIC_KEY_FILE = os.getenv("JWT_PUBLIC_KEY_FILE")  # PEM public key for RS/ES/PS tokens
+JWT_JWKS_FILE = os.getenv("JWT_JWKS_FILE")  # local JWKS document; keys are picked by the token's kid
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE")
+JWT_ISSUER = os.getenv("JWT_ISSUER")
+JWT_LEEWAY_SECONDS = float(os.getenv("JWT_LEEWAY_SECONDS", "0"))
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "10000"))
+# Upper bound for caching tokens without exp, and for how long a key rotation can go unnoticed
+JWT_CLAIMS_CACHE_MAX_TTL_SECONDS = float(os.getenv("JWT_CLAIMS_CACHE_MAX_TTL_SECONDS", "300"))
+
+USER_ID_CLAIM = "userId"
+
+CLAIMS_CACHE_REQUESTS = Counter(
+    "invoice_jwt_claims_cache_requests_total", "Verified-claims cache lookups by result", ["result"]
+)
+
+
+class ClaimsCache:
+    """Thread-safe LRU of verified claims keyed by token hash; entries expire at the token's exp"""
+
+    def __init__(self, max_entries: int = JWT_CLAIMS_CACHE_SIZE, max_ttl: float = JWT_CLAIMS_CACHE_MAX_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        # token hash -> (expires_at as wall-clock seconds, claims)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        CLAIMS_CACHE_REQUESTS.labels("miss" if entry is None else "hit").inc()
+        return None if entry is None else entry[1]
+
+    def set(self, key: str, claims: Dict[str, Any]) -> None:
+        now = time.time()
+        expires_at = now + self.max_ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, claims)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+claims_cache = ClaimsCache()
+
+
+@lru_cache(maxsize=1)
+def _jwks() -> Optional[jwt.PyJWKSet]:
+    if not JWT_JWKS_FILE:
+        return None
+    with open(JWT_JWKS_FILE) as f:
+        return jwt.PyJWKSet.from_dict(json.load(f))
+
+
+@lru_cache(maxsize=1)
+def _public_key() -> Optional[str]:
+    if not JWT_PUBLIC_KEY_FILE:
+        return None
+    with open(JWT_PUBLIC_KEY_FILE) as f:
+        return f.read()
+
+
+def reload_keys() -> None:
+    """Re-read the key files on the next verification (after rotating them on disk)"""
+    _jwks.cache_clear()
+    _public_key.cache_clear()
+    claims_cache.clear()
+
+
+def _signing_key(header: Dict[str, Any]) -> Any:
+    """Key for the token's algorithm; HMAC secrets are never used for asymmetric algorithms and vice versa"""
+    alg = header.get("alg")
+    if alg not in JWT_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"algorithm {alg} is not allowed")
+    if alg.startswith("HS"):
+        if not JWT_SECRET:
+            raise jwt.InvalidKeyError("no JWT_SECRET configured")
+        return JWT_SECRET
+    jwks = _jwks()
+    if jwks is not None:
+        kid = header.get("kid")
+        if kid is None and len(jwks.keys) == 1:
+            return jwks.keys[0].key
+        for key in jwks.keys:
+            if key.key_id == kid:
+                return key.key
+        raise jwt.InvalidKeyError(f"no JWKS key with kid {kid}")
+    public_key = _public_key()
+    if public_key is None:
+        raise jwt.InvalidKeyError("no JWT_PUBLIC_KEY_FILE or JWT_JWKS_FILE configured")
+    return public_key
+
+
+def _decode(token: str) -> Dict[str, Any]:
+    if not JWT_VERIFY:
+        return jwt.decode(token, options={"verify_signature": False})
+    header = jwt.get_unverified_header(token)
+    return jwt.decode(
+        token,
+        _signing_key(header),
+        algorithms=[header["alg"]],
+        audience=JWT_AUDIENCE,
+        issuer=JWT_ISSUER,
+        leeway=JWT_LEEWAY_SECONDS,
+        options={"verify_aud": JWT_AUDIENCE is not None},
+    )
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Verified claims of a token; each distinct token is verified once while it stays cached.
+
+    Raises jwt.PyJWTError for invalid, expired or unverifiable tokens.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = claims_cache.get(key)
+    if claims is None:
+        claims = _decode(token)
+        claims_cache.set(key, claims)
+    return claims
+
+
+def token_from_request(request: Request) -> Optional[str]:
+    """Bearer token from the Authorization header, falling back to the jwt cookie"""
+    auth_header = request.headers.get("authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header[7:]
+    return request.cookies.get("jwt")
+
+
+def get_current_user_id(request: Request) -> UUID:
+    """FastAPI dependency: userId claim of the verified request token"""
+    token = token_from_request(request)
+    if not token:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    try:
+        claims = verify_token(token)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except (jwt.PyJWTError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = claims.get(USER_ID_CLAIM)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="UserId not found in token")
+    try:
+        # Parsed here so a malformed id is a 401 rather than a database error
+        return UUID(str(user_id))
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid userId in token")
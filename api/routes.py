@@ -1,67 +1,240 @@
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional, Sequence
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import base64
-import json
-from config import get_db
-from models.schemas import InvoiceCreate, InvoiceResponse, InvoiceListResponse, InvoiceUpdate
+import hashlib
+from config import get_db, get_read_db
+from api.auth import get_current_user_id
+from models.schemas import (
+    InvoiceCreate,
+    InvoiceResponse,
+    InvoiceListResponse,
+    InvoiceUpdate,
+    InvoicePatch,
+    StatusUpdate,
+    InvoiceListFilters,
+    InvoiceStatus,
+    SortOrder,
+    InvoiceBulkCreate,
+    InvoiceBulkResponse,
+    ExportFormat,
+    SummaryDimension,
+    InvoiceSummaryResponse,
+    InvoiceChangesResponse,
+)
+from repository.line_diff import UnknownLine
+from repository.pagination import InvalidCursor
+from service.export import MEDIA_TYPES, stream_invoice_export
 from service.invoice_service import InvoiceService
+from service.list_json import encode_list
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
+MAX_PAGE_SIZE = 500
+MAX_CHANGES_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Clients may keep responses but must revalidate them with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
 
 def get_service(db: Session = Depends(get_db)) -> InvoiceService:
     return InvoiceService(db)
 
 
-def extract_user_id_from_token(request: Request) -> str:
-    """Extract userId from JWT token"""
-    token = None
-    
-    # Try Authorization header first
-    auth_header = request.headers.get("authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header[7:]
-    # Try cookies
-    elif "jwt" in request.cookies:
-        token = request.cookies["jwt"]
-    
-    if not token:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    try:
-        # Decode JWT payload (middle part)
-        parts = token.split(".")
-        if len(parts) != 3:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        payload = base64.urlsafe_b64decode(parts[1] + "===")
-        decoded = json.loads(payload)
-        user_id = decoded.get("userId")
-        
-        if not user_id:
-            raise HTTPException(status_code=401, detail="UserId not found in token")
-        
-        return user_id
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+def get_read_service(db: Session = Depends(get_read_db)) -> InvoiceService:
+    """Service for read-only endpoints, on the read replica when one is configured"""
+    return InvoiceService(db)
+
+
+def extract_user_id_from_token(request: Request) -> UUID:
+    """Extract userId from the verified JWT (see api.auth)"""
+    return get_current_user_id(request)
+
+
+def parse_cache_control(header: Optional[str]) -> Optional[float]:
+    """Freshness in seconds from a Cache-Control request header; no-cache means 0"""
+    if not header:
+        return None
+    max_age = None
+    for directive in header.lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name in ("no-cache", "no-store"):
+            return 0.0
+        if name == "max-age":
+            try:
+                max_age = max(0.0, float(value.strip('" ')))
+            except ValueError:
+                continue
+    return max_age
+
+
+def get_max_age(
+    request: Request,
+    max_age: Optional[float] = Query(None, ge=0, description="Accept enrichment data up to this many seconds old"),
+) -> Optional[float]:
+    """Freshness hint from ?max_age= or, failing that, the Cache-Control header"""
+    if max_age is not None:
+        return max_age
+    return parse_cache_control(request.headers.get("cache-control"))
+
+
+def invoice_etag(version: int) -> str:
+    # Weak: enrichment data in the body may change without the invoice changing
+    return f'W/"{version}"'
+
+
+def list_etag(invoices: Sequence, next_cursor: Optional[str]) -> str:
+    """Validator for a list page: changes whenever an invoice on it is added, removed or updated"""
+    digest = hashlib.sha1(next_cursor.encode() if next_cursor else b"")
+    for invoice in invoices:
+        digest.update(f"{invoice.id}:{invoice.version};".encode())
+    return f'W/"{digest.hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of an ETag against the If-None-Match request header"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def cache_headers(etag: str, next_cursor: Optional[str] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return headers
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def get_list_filters(
+    status: Optional[InvoiceStatus] = None,
+    partner_id: Optional[UUID] = None,
+    company_id: Optional[UUID] = None,
+    issue_date_from: Optional[datetime] = None,
+    issue_date_to: Optional[datetime] = None,
+    due_date_from: Optional[datetime] = None,
+    due_date_to: Optional[datetime] = None,
+) -> InvoiceListFilters:
+    """Server-side list filters shared by the list endpoints"""
+    return InvoiceListFilters(
+        status=status,
+        partner_id=partner_id,
+        company_id=company_id,
+        issue_date_from=issue_date_from,
+        issue_date_to=issue_date_to,
+        due_date_from=due_date_from,
+        due_date_to=due_date_to,
+    )
 
 
 @router.get("", response_model=List[InvoiceListResponse])
-def get_invoices(request: Request, service: InvoiceService = Depends(get_service)):
-    """Get all invoices for the authenticated user"""
+def get_invoices(
+    request: Request,
+    filters: InvoiceListFilters = Depends(get_list_filters),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
+    service: InvoiceService = Depends(get_read_service),
+):
+    """Get invoices for the authenticated user.
+
+    With `limit` the result is one keyset page ordered by (issue_date, id); the
+    cursor of the next page is returned in the X-Next-Cursor header. Rows are
+    encoded straight to JSON (see service.list_json) rather than through
+    response_model, which only documents the schema here.
+    """
+    user_id = extract_user_id_from_token(request)
+    try:
+        rows, next_cursor = service.list_invoice_rows(user_id, filters, limit, cursor, order)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    etag = list_etag(rows, next_cursor)
+    headers = cache_headers(etag, next_cursor)
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    return Response(encode_list(rows), media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+def export_invoices(
+    request: Request,
+    format: ExportFormat = ExportFormat.CSV,
+    filters: InvoiceListFilters = Depends(get_list_filters),
+    order: SortOrder = SortOrder.DESC,
+):
+    """Stream all matching invoices as CSV or NDJSON with constant memory"""
+    user_id = extract_user_id_from_token(request)
+    return StreamingResponse(
+        stream_invoice_export(user_id, filters, order, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="invoices.{format.value}"'},
+    )
+
+
+@router.get("/summary", response_model=InvoiceSummaryResponse)
+def get_invoice_summary(
+    request: Request,
+    group_by: List[SummaryDimension] = Query([SummaryDimension.STATUS]),
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+    service: InvoiceService = Depends(get_read_service),
+):
+    """Invoice counts and totals grouped by status, issue month and/or partner.
+
+    Served from the maintained invoice_aggregates table; `month_from` is
+    inclusive and `month_to` exclusive, both at month granularity.
+    """
     user_id = extract_user_id_from_token(request)
-    return service.list_invoices_by_user(user_id)
+    return service.get_summary(user_id, list(dict.fromkeys(group_by)), month_from, month_to)
+
+
+@router.get("/changes", response_model=InvoiceChangesResponse)
+def get_invoice_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_CHANGES_PAGE_SIZE),
+    service: InvoiceService = Depends(get_read_service),
+):
+    """Invoice changes (created, updated, deleted) after the `since` event id, oldest first.
+
+    Start with since=0 and pass `next_since` back to resume. Changes show up
+    a couple of seconds after they commit (CHANGES_SETTLE_SECONDS), so a
+    lower id can never appear behind a cursor that has already passed it.
+    """
+    user_id = extract_user_id_from_token(request)
+    return service.list_changes(user_id, since, limit)
 
 
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
-def get_invoice(invoice_id: UUID, request: Request, service: InvoiceService = Depends(get_service)):
-    """Get a specific invoice by ID"""
+def get_invoice(
+    invoice_id: UUID,
+    request: Request,
+    response: Response,
+    max_age: Optional[float] = Depends(get_max_age),
+    service: InvoiceService = Depends(get_read_service),
+):
+    """Get a specific invoice by ID.
+
+    A matching If-None-Match is answered with 304 after reading only the
+    invoice version: no lines are loaded and no enrichment lookups are made.
+    """
     user_id = extract_user_id_from_token(request)
-    invoice = service.get_invoice_response(invoice_id, user_id)
+    if request.headers.get("if-none-match"):
+        version = service.get_invoice_version(invoice_id, user_id)
+        if version is not None and etag_matches(request, invoice_etag(version)):
+            return not_modified(cache_headers(invoice_etag(version)))
+    invoice = service.get_invoice_response(invoice_id, user_id, max_age)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    response.headers.update(cache_headers(invoice_etag(invoice.version)))
     return invoice
 
 
@@ -72,6 +245,13 @@ def add_invoice(data: InvoiceCreate, request: Request, service: InvoiceService =
     return service.create_invoice_response(data, user_id)
 
 
+@router.post("/bulk", response_model=InvoiceBulkResponse)
+def add_invoices_bulk(data: InvoiceBulkCreate, request: Request, service: InvoiceService = Depends(get_service)):
+    """Create many invoices at once; each item is reported as created or failed"""
+    user_id = extract_user_id_from_token(request)
+    return service.create_invoices_bulk(data.invoices, user_id)
+
+
 @router.put("/{invoice_id}", response_model=InvoiceResponse)
 def update_invoice(
     invoice_id: UUID,
@@ -81,7 +261,48 @@ def update_invoice(
 ):
     """Update an existing invoice"""
     user_id = extract_user_id_from_token(request)
-    invoice = service.update_invoice(invoice_id, data, user_id)
+    try:
+        invoice = service.update_invoice(invoice_id, data, user_id)
+    except UnknownLine as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
+@router.patch("/{invoice_id}/status", response_model=InvoiceListResponse)
+def update_invoice_status(
+    invoice_id: UUID,
+    data: StatusUpdate,
+    request: Request,
+    service: InvoiceService = Depends(get_service)
+):
+    """Change only the status, without loading lines or calling other services"""
+    user_id = extract_user_id_from_token(request)
+    invoice = service.update_status(invoice_id, data.status, user_id)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
+@router.patch("/{invoice_id}", response_model=InvoiceResponse)
+def patch_invoice(
+    invoice_id: UUID,
+    data: InvoicePatch,
+    request: Request,
+    service: InvoiceService = Depends(get_service)
+):
+    """Change only the fields sent.
+
+    `lines`, when sent, is the complete new set of lines: lines carrying an `id`
+    change that line, lines without one reuse a line of the same product or are
+    added, and lines left out are deleted. Unchanged lines are not rewritten.
+    """
+    user_id = extract_user_id_from_token(request)
+    try:
+        invoice = service.patch_invoice(invoice_id, data, user_id)
+    except UnknownLine as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
@@ -0,0 +1,65 @@
+"""Disposable databases and stand-in records shared by the benchmarks"""
+
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+
+from models.database import Base, compile_uuid_for_sqlite  # noqa: F401  registers the SQLite UUID type
+
+
+@contextmanager
+def disposable_database(url: Optional[str] = None) -> Iterator[Engine]:
+    """Engine on a fresh database with the current schema, removed afterwards.
+
+    Without url a temporary SQLite file is used. A PostgreSQL URL names the
+    server to use: a uniquely named database is created there and dropped at
+    the end, so the URL's own database is never touched.
+    """
+    if not url:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(
+                f"sqlite:///{tmp}/benchmark.db", connect_args={"check_same_thread": False, "timeout": 30}
+            )
+            Base.metadata.create_all(engine)
+            try:
+                yield engine
+            finally:
+                engine.dispose()
+        return
+
+    server_url = make_url(url)
+    name = f"invoice_benchmark_{uuid4().hex[:12]}"
+    admin = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    engine = create_engine(server_url.set(database=name), pool_size=20, max_overflow=20)
+    try:
+        Base.metadata.create_all(engine)
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        admin.dispose()
+
+
+def stand_in_records(companies: int = 20, partners: int = 50, products: int = 200) -> Dict[str, List[dict]]:
+    """Company, partner and product records with UUID ids, as accepted by InvoiceCreate"""
+    return {
+        "companies": [
+            {"id": str(uuid4()), "companyName": f"Company {i} d.o.o.", "vatPayer": True, "city": "Ljubljana"}
+            for i in range(companies)
+        ],
+        "partners": [
+            {"id": str(uuid4()), "naziv": f"Partner {i} d.o.o.", "rokPlacila": 30, "kraj": "Maribor"}
+            for i in range(partners)
+        ],
+        "products": [
+            {"id": str(uuid4()), "name": f"Product {i}", "cost": f"{10 + i % 90}.50", "ddvPercentage": "22"}
+            for i in range(products)
+        ],
+    }
@@ -0,0 +1,106 @@
+"""Compare list-endpoint serialization: response_model vs direct orjson encoding.
+
+Seeds a throwaway database (SQLite unless --database-url is given) and times, per page size, the old path
+(ORM rows -> InvoiceListResponse -> FastAPI response_model validation ->
+JSONResponse) against the fast path (column rows -> service.list_json):
+
+    python -m benchmarks.list_serialization --rows 1000 5000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, List
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.fixtures import disposable_database
+from models.database import Invoice, InvoiceStatus
+from models.schemas import InvoiceListResponse
+from repository.pagination import build_page_query
+from service.invoice_service import InvoiceService
+from service.list_json import encode_list
+
+
+RESPONSE_FIELD = create_response_field(name="Response", type_=List[InvoiceListResponse])
+
+
+def _seed(session, user_id, count: int) -> None:
+    start = datetime(2026, 1, 1)
+    session.add_all(
+        Invoice(
+            user_id=user_id,
+            company_id=uuid4(),
+            partner_id=uuid4(),
+            invoice_number=f"INV-2026-{i + 1:06d}",
+            issue_date=start + timedelta(minutes=i),
+            service_date=start,
+            due_date=start + timedelta(days=30),
+            notes="Monthly services" if i % 3 else None,
+            status=InvoiceStatus.PAID if i % 2 else InvoiceStatus.ISSUED,
+            company_name="ACME d.o.o.",
+            partner_name="Partner d.o.o.",
+            total=Decimal("1234.50") + i,
+            version=1,
+            updated_at=start,
+        )
+        for i in range(count)
+    )
+    session.commit()
+
+
+def _timed(fn: Callable[[], bytes], repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", help="PostgreSQL server to create a throwaway database on (default: SQLite)")
+    args = parser.parse_args()
+
+    with disposable_database(args.database_url) as engine:
+        _run(engine, args)
+
+
+def _run(engine, args) -> None:
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    user_id = uuid4()
+    _seed(session, user_id, max(args.rows))
+    service = InvoiceService(session, company_client=object(), partner_client=object(), product_client=object())
+
+    def response_model(limit: int) -> bytes:
+        session.expunge_all()
+        invoices = session.execute(build_page_query(user_id, limit=limit)).scalars().all()[:limit]
+        items = [service._to_list_response(inv) for inv in invoices]
+        content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=items))
+        return JSONResponse(content).body
+
+    def fast_path(limit: int) -> bytes:
+        rows, _ = service.list_invoice_rows(user_id, limit=limit)
+        return encode_list(rows)
+
+    print(f"{'rows':>6} {'response_model ms':>18} {'orjson rows ms':>15} {'speedup':>8}")
+    for limit in args.rows:
+        slow, slow_body = _timed(lambda: response_model(limit), args.repeat)
+        fast, fast_body = _timed(lambda: fast_path(limit), args.repeat)
+        assert slow_body == fast_body, "fast path output differs from response_model output"
+        print(f"{limit:>6} {slow * 1000:>18.1f} {fast * 1000:>15.1f} {slow / fast:>7.1f}x")
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
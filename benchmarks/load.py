@@ -0,0 +1,365 @@
+"""Load and latency benchmark for the invoice endpoints.
+
+Starts the stand-in company/partner/product services (client.stand_in) with
+configurable latency and error injection, a disposable database and the
+FastAPI app under uvicorn, seeds invoices, then drives each workload for a
+fixed time and reports throughput and latency percentiles:
+
+    python -m benchmarks.load --duration 10 --concurrency 16 --latency-ms 5 \\
+        --output reports/$(git rev-parse --short HEAD).json --compare reports/main.json
+
+Without --database-url a temporary SQLite file is used; with a PostgreSQL URL
+a throwaway database is created on that server and dropped afterwards.
+--async serves the async routes (asyncpg and grpc.aio) and needs PostgreSQL.
+The load generator runs in the same process as the server, so absolute
+numbers are conservative; compare reports taken on the same machine.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import jwt
+import requests
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.fixtures import disposable_database, stand_in_records
+from client.stand_in import StandInServer
+
+WORKLOADS = ("list", "detail", "create", "bulk")
+PERCENTILES = (50, 90, 95, 99)
+JWT_SECRET = "benchmark-secret-not-for-production-use"
+
+
+@dataclass
+class Context:
+    """Records the workloads draw from"""
+
+    companies: List[str]
+    partners: List[str]
+    products: List[str]
+    invoice_ids: List[str] = field(default_factory=list)
+    bulk_size: int = 100
+
+
+Request = Tuple[str, str, Optional[dict]]
+
+
+def _invoice_body(ctx: Context, rng: random.Random) -> dict:
+    issued = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randrange(300))
+    return {
+        "company_id": rng.choice(ctx.companies),
+        "partner_id": rng.choice(ctx.partners),
+        "issue_date": issued.isoformat(),
+        "service_date": issued.isoformat(),
+        "due_date": (issued + timedelta(days=30)).isoformat(),
+        "notes": "Benchmark invoice",
+        "lines": [
+            {"product_id": product_id, "amount": rng.randint(1, 10)}
+            for product_id in rng.sample(ctx.products, rng.randint(1, 5))
+        ],
+    }
+
+
+def _list(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/invoices?limit=50", None
+
+
+def _detail(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/invoices/{rng.choice(ctx.invoice_ids)}", None
+
+
+def _create(ctx: Context, rng: random.Random) -> Request:
+    return "POST", "/invoices", _invoice_body(ctx, rng)
+
+
+def _bulk(ctx: Context, rng: random.Random) -> Request:
+    return "POST", "/invoices/bulk", {"invoices": [_invoice_body(ctx, rng) for _ in range(ctx.bulk_size)]}
+
+
+REQUESTS: Dict[str, Callable[[Context, random.Random], Request]] = {
+    "list": _list,
+    "detail": _detail,
+    "create": _create,
+    "bulk": _bulk,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "errors": errors,
+        "error_rate": errors / len(ordered) if ordered else 0.0,
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = percentile(ordered, pct) * 1000
+    return summary
+
+
+def drive(
+    base_url: str, token: str, make_request: Callable, ctx: Context, duration: float, concurrency: int, seed: int = 0
+) -> dict:
+    """Run one workload from concurrency closed-loop clients for duration seconds"""
+    deadline = time.perf_counter() + duration
+
+    def client(index: int) -> Tuple[List[float], int]:
+        rng = random.Random(seed * 1000 + index)
+        latencies: List[float] = []
+        errors = 0
+        with requests.Session() as session:
+            session.headers["Authorization"] = f"Bearer {token}"
+            while time.perf_counter() < deadline:
+                method, path, body = make_request(ctx, rng)
+                started = time.perf_counter()
+                try:
+                    ok = session.request(method, base_url + path, json=body, timeout=60).status_code < 400
+                except requests.RequestException:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize([lat for lats, _ in results for lat in lats], sum(errors for _, errors in results), elapsed)
+
+
+def _configure_auth() -> None:
+    from api import auth
+
+    auth.JWT_VERIFY = True
+    auth.JWT_SECRET = JWT_SECRET
+    auth.JWT_ALGORITHMS = ["HS256"]
+    auth.reload_keys()
+
+
+def build_app(engine: Engine, async_mode: bool = False) -> FastAPI:
+    """The invoice routes on the benchmark database, without main.py's startup migrations"""
+    app = FastAPI()
+    if async_mode:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from api.async_routes import router
+        from config import get_async_db, get_async_read_db
+
+        async_engine = create_async_engine(engine.url.set(drivername="postgresql+asyncpg"), pool_size=20)
+        sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        async def get_benchmark_async_db():
+            async with sessions() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = get_benchmark_async_db
+        app.dependency_overrides[get_async_read_db] = get_benchmark_async_db
+    else:
+        from api.routes import router
+        from config import get_db, get_read_db
+
+        sessions = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+        def get_benchmark_db():
+            db = sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = get_benchmark_db
+        app.dependency_overrides[get_read_db] = get_benchmark_db
+    app.include_router(router)
+    return app
+
+
+class AppServer:
+    """uvicorn serving an app from a background thread"""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+        import socket
+
+        if not port:
+            with socket.socket() as sock:
+                sock.bind((host, 0))
+                port = sock.getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "AppServer":
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def seed_invoices(base_url: str, token: str, ctx: Context, count: int, chunk: int = 500) -> None:
+    """Create the invoices read by the list and detail workloads through the bulk endpoint"""
+    rng = random.Random(42)
+    headers = {"Authorization": f"Bearer {token}"}
+    for start in range(0, count, chunk):
+        body = {"invoices": [_invoice_body(ctx, rng) for _ in range(min(chunk, count - start))]}
+        response = requests.post(f"{base_url}/invoices/bulk", json=body, headers=headers, timeout=300)
+        response.raise_for_status()
+        ctx.invoice_ids.extend(item["invoice_id"] for item in response.json()["results"] if item["success"])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    records = stand_in_records()
+    stand_in = StandInServer(
+        records["companies"],
+        records["partners"],
+        records["products"],
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    ctx = Context(
+        companies=[record["id"] for record in records["companies"]],
+        partners=[record["id"] for record in records["partners"]],
+        products=[record["id"] for record in records["products"]],
+        bulk_size=args.bulk_size,
+    )
+    host, port = stand_in.target.rsplit(":", 1)
+    for service in ("COMPANY", "PARTNER"):
+        os.environ[f"{service}_SERVICE_HOST"] = host
+        os.environ[f"{service}_SERVICE_GRPC_PORT"] = port
+    _configure_auth()
+    token = jwt.encode({"userId": str(uuid4()), "exp": int(time.time()) + 86400}, JWT_SECRET, algorithm="HS256")
+
+    results = {}
+    with stand_in, disposable_database(args.database_url) as engine, AppServer(build_app(engine, args.async_mode)) as app:
+        # Seeding must not be slowed or failed by the injected faults
+        stand_in.latency_ms, stand_in.error_rate = 0, 0
+        seed_invoices(app.base_url, token, ctx, args.invoices)
+        stand_in.latency_ms, stand_in.error_rate = args.latency_ms, args.error_rate
+        for name in args.workloads:
+            if args.warmup:
+                drive(app.base_url, token, REQUESTS[name], ctx, args.warmup, args.concurrency, args.seed)
+            stand_in.reset_calls()
+            results[name] = drive(app.base_url, token, REQUESTS[name], ctx, args.duration, args.concurrency, args.seed)
+            results[name]["grpc_calls"] = dict(stand_in.calls)
+            print(format_row(name, results[name]))
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "settings": settings,
+        "results": results,
+    }
+
+
+def format_row(name: str, result: dict) -> str:
+    return (
+        f"{name:<8} {result['requests']:>8} {result['rps']:>9.1f} {result['error_rate'] * 100:>6.2f}% "
+        + " ".join(f"{result[f'p{pct}_ms']:>8.1f}" for pct in PERCENTILES)
+        + f" {result['max_ms']:>8.1f}"
+    )
+
+
+def header() -> str:
+    return (
+        f"{'workload':<8} {'requests':>8} {'rps':>9} {'errors':>7} "
+        + " ".join(f"{f'p{pct} ms':>8}" for pct in PERCENTILES)
+        + f" {'max ms':>8}"
+    )
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """Per-workload change of throughput and latency against a baseline report"""
+    lines = [
+        f"compared with {baseline.get('commit') or 'baseline'}:",
+        f"{'workload':<8} {'rps':>9} {'p50':>9} {'p99':>9}",
+    ]
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        changes = [
+            (result[key] - base[key]) / base[key] * 100 if base[key] else 0.0 for key in ("rps", "p50_ms", "p99_ms")
+        ]
+        lines.append(f"{name:<8} " + " ".join(f"{change:>+8.1f}%" for change in changes))
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--duration", type=float, default=10, help="seconds per workload")
+    parser.add_argument("--warmup", type=float, default=2, help="unrecorded seconds before each workload")
+    parser.add_argument("--concurrency", type=int, default=8, help="closed-loop clients")
+    parser.add_argument("--invoices", type=int, default=1000, help="invoices seeded before the run")
+    parser.add_argument("--bulk-size", type=int, default=100, help="invoices per bulk request")
+    parser.add_argument("--latency-ms", type=float, default=2, help="stand-in latency per gRPC call")
+    parser.add_argument("--jitter-ms", type=float, default=1)
+    parser.add_argument("--error-rate", type=float, default=0, help="share of gRPC calls failing with UNAVAILABLE")
+    parser.add_argument("--database-url", help="PostgreSQL server for a throwaway database (default: SQLite)")
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="serve the async routes")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="disable the enrichment cache so every read calls the stand-ins"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report to compare against")
+    args = parser.parse_args()
+    if args.async_mode and not args.database_url:
+        parser.error("--async needs --database-url pointing at PostgreSQL")
+    if args.no_cache:
+        # Read when client.cache is first imported, which happens in build_app
+        os.environ["ENRICHMENT_CACHE_ENABLED"] = "false"
+
+    print(header())
+    report = run(args)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(report, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from .channel_registry import AsyncChannelRegistry, ChannelRegistry, get_async_registry, get_registry
+from .coalescer import (
+    COALESCE_ENABLED,
+    AsyncCoalescingCompanyClient,
+    AsyncCoalescingPartnerClient,
+    CoalescingCompanyClient,
+    CoalescingPartnerClient,
+)
+from .company_client import AsyncCompanyClient, CompanyClient
+from .partner_client import AsyncPartnerClient, PartnerClient
+from .product_client import AsyncProductClient, ProductClient
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("ENRICHMENT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("ENRICHMENT_CACHE_MAX_ENTRIES", "10000"))
+REFRESH_WORKERS = int(os.getenv("ENRICHMENT_REFRESH_WORKERS", "4"))
+
+CACHE_REQUESTS = Counter(
+    "invoice_enrichment_cache_requests_total",
+    "Enrichment cache lookups by entity and result",
+    ["entity", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "invoice_enrichment_cache_evictions_total",
+    "Enrichment cache entries dropped by LRU, TTL or explicit invalidation",
+    ["entity", "reason"],
+)
+CACHE_SIZE = Gauge("invoice_enrichment_cache_entries", "Entries held in the enrichment cache", ["entity"])
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, entity: str, ttl_seconds: float, max_entries: int = CACHE_MAX_ENTRIES):
+        self.entity = entity
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (stored_at, expires_at, value)
+        self._data: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._data[key]
+                CACHE_EVICTIONS.labels(self.entity, "expired").inc()
+                entry = None
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.labels(self.entity, "miss").inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        CACHE_REQUESTS.labels(self.entity, "hit").inc()
+        return entry[2]
+
+    def peek(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Age and value of an entry, even past its TTL until LRU drops it; for stale-while-revalidate reads"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        CACHE_REQUESTS.labels(self.entity, "miss" if entry is None else "hit").inc()
+        return None if entry is None else (now - entry[0], entry[2])
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._data[key] = (now, now + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.labels(self.entity, "lru").inc()
+            size = len(self._data)
+        CACHE_SIZE.labels(self.entity).set(size)
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> int:
+        """Drop the given keys, or everything when keys is None; returns the number removed"""
+        with self._lock:
+            if keys is None:
+                removed = len(self._data)
+                self._data.clear()
+            else:
+                removed = sum(1 for key in keys if self._data.pop(key, None) is not None)
+            size = len(self._data)
+        if removed:
+            CACHE_EVICTIONS.labels(self.entity, "invalidated").inc(removed)
+        CACHE_SIZE.labels(self.entity).set(size)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+company_cache = TTLCache("company", float(os.getenv("COMPANY_CACHE_TTL_SECONDS", "300")))
+partner_cache = TTLCache("partner", float(os.getenv("PARTNER_CACHE_TTL_SECONDS", "300")))
+product_cache = TTLCache("product", float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "60")))
+
+CACHES: Dict[str, TTLCache] = {
+    "company": company_cache,
+    "partner": partner_cache,
+    "product": product_cache,
+}
+
+
+def invalidate(entity: str, ids: Optional[List[str]] = None) -> int:
+    """Evict cached records of an entity type (all of them when ids is None) from this process only"""
+    cache = CACHES.get(entity)
+    if cache is None:
+        raise KeyError(entity)
+    return cache.invalidate(ids)
+
+
+def _split(cache: TTLCache, ids: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+    cached: Dict[str, dict] = {}
+    missing: List[str] = []
+    for record_id in dict.fromkeys(ids):
+        record = cache.get(record_id)
+        if record is None:
+            missing.append(record_id)
+        else:
+            cached[record_id] = record
+    return cached, missing
+
+
+def _merge(cache: TTLCache, ids: List[str], cached: Dict[str, dict], fetched: List[dict]) -> List[dict]:
+    for record in fetched:
+        cache.set(str(record["id"]), record)
+        cached[str(record["id"])] = record
+    return [cached[record_id] for record_id in dict.fromkeys(ids) if record_id in cached]
+
+
+Fetch = Callable[[List[str], float], List[dict]]
+AsyncFetch = Callable[[List[str], float], Awaitable[List[dict]]]
+
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="enrichment-refresh")
+_refreshing: Set[Tuple[str, str]] = set()
+_refreshing_lock = threading.Lock()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def _read_stale(cache: TTLCache, ids: List[str], max_age: float) -> Tuple[Dict[str, dict], List[str]]:
+    """Cached records of any age, plus the IDs that are missing or older than max_age"""
+    cached: Dict[str, dict] = {}
+    stale: List[str] = []
+    for record_id in dict.fromkeys(ids):
+        entry = cache.peek(record_id)
+        if entry is not None:
+            cached[record_id] = entry[1]
+        if entry is None or entry[0] > max_age:
+            stale.append(record_id)
+    return cached, stale
+
+
+def _claim(cache: TTLCache, ids: List[str]) -> List[str]:
+    """Mark IDs as being refreshed; IDs already in flight are skipped"""
+    with _refreshing_lock:
+        claimed = [record_id for record_id in ids if (cache.entity, record_id) not in _refreshing]
+        _refreshing.update((cache.entity, record_id) for record_id in claimed)
+    return claimed
+
+
+def _release(cache: TTLCache, ids: List[str]) -> None:
+    with _refreshing_lock:
+        _refreshing.difference_update((cache.entity, record_id) for record_id in ids)
+
+
+def _lookup_many(cache: TTLCache, ids: List[str], timeout: float, max_age: Optional[float], fetch: Fetch) -> List[dict]:
+    """Cached lookup with a freshness hint.
+
+    max_age None uses the cache TTL; 0 always fetches live; a positive max_age
+    answers from the cache at once (stale entries included) and refreshes
+    missing or older entries in the background.
+    """
+    if max_age is not None and max_age > 0:
+        cached, stale = _read_stale(cache, ids, max_age)
+        claimed = _claim(cache, stale)
+        if claimed:
+            _refresh_executor.submit(_refresh, cache, claimed, timeout, fetch)
+        return [cached[record_id] for record_id in dict.fromkeys(ids) if record_id in cached]
+    if max_age == 0:
+        cached, missing = {}, list(dict.fromkeys(ids))
+    else:
+        cached, missing = _split(cache, ids)
+    fetched = fetch(missing, timeout) if missing else []
+    return _merge(cache, ids, cached, fetched)
+
+
+def _refresh(cache: TTLCache, ids: List[str], timeout: float, fetch: Fetch) -> None:
+    try:
+        _lookup_many(cache, ids, timeout, 0, fetch)
+    except Exception:
+        logger.exception("Background refresh of %d %s records failed", len(ids), cache.entity)
+    finally:
+        _release(cache, ids)
+
+
+async def _alookup_many(
+    cache: TTLCache, ids: List[str], timeout: float, max_age: Optional[float], fetch: AsyncFetch
+) -> List[dict]:
+    """Event-loop counterpart of _lookup_many"""
+    if max_age is not None and max_age > 0:
+        cached, stale = _read_stale(cache, ids, max_age)
+        claimed = _claim(cache, stale)
+        if claimed:
+            task = asyncio.get_running_loop().create_task(_arefresh(cache, claimed, timeout, fetch))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+        return [cached[record_id] for record_id in dict.fromkeys(ids) if record_id in cached]
+    if max_age == 0:
+        cached, missing = {}, list(dict.fromkeys(ids))
+    else:
+        cached, missing = _split(cache, ids)
+    fetched = await fetch(missing, timeout) if missing else []
+    return _merge(cache, ids, cached, fetched)
+
+
+async def _arefresh(cache: TTLCache, ids: List[str], timeout: float, fetch: AsyncFetch) -> None:
+    try:
+        await _alookup_many(cache, ids, timeout, 0, fetch)
+    except Exception:
+        logger.exception("Background refresh of %d %s records failed", len(ids), cache.entity)
+    finally:
+        _release(cache, ids)
+
+
+def _single(fetch_one: Callable[..., Optional[dict]]) -> Fetch:
+    return lambda ids, timeout: [record for record in [fetch_one(ids[0], timeout=timeout)] if record is not None]
+
+
+def _async_single(fetch_one: Callable[..., Awaitable[Optional[dict]]]) -> AsyncFetch:
+    async def fetch(ids: List[str], timeout: float) -> List[dict]:
+        record = await fetch_one(ids[0], timeout=timeout)
+        return [record] if record is not None else []
+    return fetch
+
+
+class CachedCompanyClient:
+    """CompanyClient that serves repeated lookups from the shared company cache"""
+
+    def __init__(self, registry: Optional[ChannelRegistry] = None, inner: Optional[CompanyClient] = None):
+        self.inner = inner or (registry or get_registry()).get_client(
+            CoalescingCompanyClient if COALESCE_ENABLED else CompanyClient
+        )
+
+    def get_company(self, company_id: str, timeout: float = 5, max_age: Optional[float] = None) -> Optional[dict]:
+        found = _lookup_many(company_cache, [company_id], timeout, max_age, _single(self.inner.get_company))
+        return found[0] if found else None
+
+    def get_companies(self, company_ids: List[str], timeout: float = 5, max_age: Optional[float] = None) -> List[dict]:
+        return _lookup_many(company_cache, company_ids, timeout, max_age, self._fetch_many)
+
+    def _fetch_many(self, company_ids: List[str], timeout: float) -> List[dict]:
+        return self.inner.get_companies(company_ids, timeout=timeout)
+
+
+class CachedPartnerClient:
+    """PartnerClient that serves repeated lookups from the shared partner cache"""
+
+    def __init__(self, registry: Optional[ChannelRegistry] = None, inner: Optional[PartnerClient] = None):
+        self.inner = inner or (registry or get_registry()).get_client(
+            CoalescingPartnerClient if COALESCE_ENABLED else PartnerClient
+        )
+
+    def get_partner(self, partner_id: str, timeout: float = 5, max_age: Optional[float] = None) -> Optional[dict]:
+        found = _lookup_many(partner_cache, [partner_id], timeout, max_age, _single(self.inner.get_partner))
+        return found[0] if found else None
+
+    def get_partners(self, partner_ids: List[str], timeout: float = 5, max_age: Optional[float] = None) -> List[dict]:
+        return _lookup_many(partner_cache, partner_ids, timeout, max_age, self._fetch_many)
+
+    def _fetch_many(self, partner_ids: List[str], timeout: float) -> List[dict]:
+        return self.inner.get_partners(partner_ids, timeout=timeout)
+
+
+class CachedProductClient:
+    """ProductClient that only asks product-service for IDs missing from the cache"""
+
+    def __init__(self, registry: Optional[ChannelRegistry] = None, inner: Optional[ProductClient] = None):
+        self.inner = inner or (registry or get_registry()).get_client(ProductClient)
+
+    def get_products(self, product_ids: List[str], timeout: float = 5, max_age: Optional[float] = None) -> List[dict]:
+        return _lookup_many(product_cache, product_ids, timeout, max_age, self._fetch_many)
+
+    def _fetch_many(self, product_ids: List[str], timeout: float) -> List[dict]:
+        return self.inner.get_products(product_ids, timeout=timeout)
+
+
+class AsyncCachedCompanyClient:
+    def __init__(self, registry: Optional[AsyncChannelRegistry] = None, inner: Optional[AsyncCompanyClient] = None):
+        self.inner = inner or (registry or get_async_registry()).get_client(
+            AsyncCoalescingCompanyClient if COALESCE_ENABLED else AsyncCompanyClient
+        )
+
+    async def get_company(self, company_id: str, timeout: float = 5, max_age: Optional[float] = None) -> Optional[dict]:
+        found = await _alookup_many(company_cache, [company_id], timeout, max_age, _async_single(self.inner.get_company))
+        return found[0] if found else None
+
+    async def get_companies(
+        self, company_ids: List[str], timeout: float = 5, max_age: Optional[float] = None
+    ) -> List[dict]:
+        return await _alookup_many(company_cache, company_ids, timeout, max_age, self._fetch_many)
+
+    async def _fetch_many(self, company_ids: List[str], timeout: float) -> List[dict]:
+        return await self.inner.get_companies(company_ids, timeout=timeout)
+
+
+class AsyncCachedPartnerClient:
+    def __init__(self, registry: Optional[AsyncChannelRegistry] = None, inner: Optional[AsyncPartnerClient] = None):
+        self.inner = inner or (registry or get_async_registry()).get_client(
+            AsyncCoalescingPartnerClient if COALESCE_ENABLED else AsyncPartnerClient
+        )
+
+    async def get_partner(self, partner_id: str, timeout: float = 5, max_age: Optional[float] = None) -> Optional[dict]:
+        found = await _alookup_many(partner_cache, [partner_id], timeout, max_age, _async_single(self.inner.get_partner))
+        return found[0] if found else None
+
+    async def get_partners(
+        self, partner_ids: List[str], timeout: float = 5, max_age: Optional[float] = None
+    ) -> List[dict]:
+        return await _alookup_many(partner_cache, partner_ids, timeout, max_age, self._fetch_many)
+
+    async def _fetch_many(self, partner_ids: List[str], timeout: float) -> List[dict]:
+        return await self.inner.get_partners(partner_ids, timeout=timeout)
+
+
+class AsyncCachedProductClient:
+    def __init__(self, registry: Optional[AsyncChannelRegistry] = None, inner: Optional[AsyncProductClient] = None):
+        self.inner = inner or (registry or get_async_registry()).get_client(AsyncProductClient)
+
+    async def get_products(
+        self, product_ids: List[str], timeout: float = 5, max_age: Optional[float] = None
+    ) -> List[dict]:
+        return await _alookup_many(product_cache, product_ids, timeout, max_age, self._fetch_many)
+
+    async def _fetch_many(self, product_ids: List[str], timeout: float) -> List[dict]:
+        return await self.inner.get_products(product_ids, timeout=timeout)
@@ -0,0 +1,147 @@
+import itertools
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import grpc
+
+T = TypeVar("T")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def default_channel_options() -> List[Tuple[str, int]]:
+    """Keepalive options for long-lived channels, overridable via environment variables"""
+    return [
+        ("grpc.keepalive_time_ms", _env_int("GRPC_KEEPALIVE_TIME_MS", 30000)),
+        ("grpc.keepalive_timeout_ms", _env_int("GRPC_KEEPALIVE_TIMEOUT_MS", 10000)),
+        ("grpc.keepalive_permit_without_calls", _env_int("GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS", 1)),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+
+class ChannelRegistry:
+    """Process-wide pool of gRPC channels keyed by target.
+
+    Channels are opened lazily on first use and reused for the lifetime of the
+    process. With ``subchannels > 1`` every target gets several independent
+    channels (each with its own TCP connection) that are handed out round-robin.
+    """
+
+    def __init__(self, subchannels: Optional[int] = None, options: Optional[List[Tuple[str, int]]] = None):
+        self.subchannels = max(1, subchannels if subchannels is not None else _env_int("GRPC_SUBCHANNELS", 1))
+        self.options = options if options is not None else default_channel_options()
+        self._lock = threading.Lock()
+        self._channels: Dict[str, List[grpc.Channel]] = {}
+        self._cycles: Dict[str, itertools.cycle] = {}
+        self._clients: Dict[type, object] = {}
+        self._closed = False
+
+    def get_channel(self, target: str) -> grpc.Channel:
+        """Return a pooled channel for target, creating the pool on first use"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Channel registry is closed")
+            if target not in self._channels:
+                options = list(self.options)
+                if self.subchannels > 1:
+                    # Without a local subchannel pool gRPC would collapse identical
+                    # channels onto one shared connection.
+                    options.append(("grpc.use_local_subchannel_pool", 1))
+                channels = [self._open_channel(target, options) for _ in range(self.subchannels)]
+                self._channels[target] = channels
+                self._cycles[target] = itertools.cycle(channels)
+            return next(self._cycles[target])
+
+    def _open_channel(self, target: str, options: List[Tuple[str, int]]):
+        return grpc.insecure_channel(target, options=options)
+
+    def get_client(self, client_cls: Callable[..., T]) -> T:
+        """Return the shared instance of client_cls, building it on first use"""
+        with self._lock:
+            client = self._clients.get(client_cls)
+        if client is None:
+            client = client_cls(registry=self)
+            with self._lock:
+                client = self._clients.setdefault(client_cls, client)
+        return client
+
+    def targets(self) -> List[str]:
+        with self._lock:
+            return list(self._channels)
+
+    def _drain(self) -> list:
+        with self._lock:
+            channels = [c for pool in self._channels.values() for c in pool]
+            self._channels.clear()
+            self._cycles.clear()
+            self._clients.clear()
+            self._closed = True
+        return channels
+
+    def close(self) -> None:
+        """Close every pooled channel; further lookups raise"""
+        for channel in self._drain():
+            channel.close()
+
+
+class AsyncChannelRegistry(ChannelRegistry):
+    """Pool of ``grpc.aio`` channels for the async request path.
+
+    aio channels are bound to the running event loop, so this registry must be
+    created from inside the loop (e.g. in the application startup hook).
+    """
+
+    def _open_channel(self, target: str, options: List[Tuple[str, int]]):
+        return grpc.aio.insecure_channel(target, options=options)
+
+    async def close(self) -> None:
+        for channel in self._drain():
+            await channel.close()
+
+
+_registry: Optional[ChannelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ChannelRegistry:
+    """Return the process-wide registry, creating it if needed"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ChannelRegistry()
+        return _registry
+
+
+def close_registry() -> None:
+    """Close the process-wide registry (called on application shutdown)"""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.close()
+
+
+_async_registry: Optional[AsyncChannelRegistry] = None
+
+
+def get_async_registry() -> AsyncChannelRegistry:
+    """Return the process-wide aio registry, creating it if needed"""
+    global _async_registry
+    with _registry_lock:
+        if _async_registry is None:
+            _async_registry = AsyncChannelRegistry()
+        return _async_registry
+
+
+async def close_async_registry() -> None:
+    global _async_registry
+    with _registry_lock:
+        registry, _async_registry = _async_registry, None
+    if registry is not None:
+        await registry.close()
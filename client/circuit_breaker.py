@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+import grpc
+from prometheus_client import Counter, Gauge
+
+from observability import GRPC_CLIENT_SECONDS, rpc_status, span
+
+logger = logging.getLogger(__name__)
+
+BREAKER_WINDOW_SIZE = int(os.getenv("GRPC_BREAKER_WINDOW_SIZE", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("GRPC_BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATE = float(os.getenv("GRPC_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("GRPC_BREAKER_SLOW_CALL_SECONDS", "1"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("GRPC_BREAKER_SLOW_CALL_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.getenv("GRPC_BREAKER_OPEN_SECONDS", "15"))
+BREAKER_HALF_OPEN_CALLS = int(os.getenv("GRPC_BREAKER_HALF_OPEN_CALLS", "1"))
+
+RETRY_ATTEMPTS = int(os.getenv("GRPC_RETRY_ATTEMPTS", "2"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("GRPC_RETRY_BACKOFF_MS", "50")) / 1000
+RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("GRPC_RETRY_MAX_BACKOFF_MS", "500")) / 1000
+
+# Transient failures worth another attempt on an idempotent RPC
+RETRYABLE_CODES = frozenset({grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.ABORTED})
+# Answers from a healthy server; they do not count against the breaker
+HEALTHY_CODES = frozenset(
+    {grpc.StatusCode.NOT_FOUND, grpc.StatusCode.INVALID_ARGUMENT, grpc.StatusCode.UNIMPLEMENTED}
+)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = Gauge(
+    "invoice_grpc_circuit_state", "Circuit breaker state per gRPC target (0 closed, 1 half-open, 2 open)", ["target"]
+)
+BREAKER_TRANSITIONS = Counter(
+    "invoice_grpc_circuit_transitions_total", "Circuit breaker state changes per gRPC target", ["target", "state"]
+)
+BREAKER_REJECTIONS = Counter(
+    "invoice_grpc_circuit_rejections_total", "Calls failed fast because the circuit was open", ["target"]
+)
+RETRIES = Counter("invoice_grpc_retries_total", "gRPC attempts retried after a transient error", ["target"])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a target whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Rolling-window breaker for one gRPC target.
+
+    Opens when, over the last window_size calls (and at least min_calls), the
+    share of failures or of calls slower than slow_call_seconds reaches its
+    threshold. After open_seconds a few probe calls are let through; one
+    success closes the circuit again, one failure reopens it.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        window_size: int = BREAKER_WINDOW_SIZE,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate: float = BREAKER_SLOW_CALL_RATE,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_calls: int = BREAKER_HALF_OPEN_CALLS,
+    ):
+        self.target = target
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes = 0
+        BREAKER_STATE.labels(target).set(_STATE_VALUES[CLOSED])
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    BREAKER_REJECTIONS.labels(self.target).inc()
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    BREAKER_REJECTIONS.labels(self.target).inc()
+                    return False
+                self._probes += 1
+            return True
+
+    def record(self, failed: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN if failed or slow else CLOSED)
+                return
+            if self.state == OPEN:
+                return
+            self._window.append((failed, slow))
+            calls = len(self._window)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._window if f)
+            slow_calls = sum(1 for _, s in self._window if s)
+            if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == CLOSED:
+            self._window.clear()
+        BREAKER_STATE.labels(self.target).set(_STATE_VALUES[state])
+        BREAKER_TRANSITIONS.labels(self.target, state).inc()
+        logger.warning("Circuit for %s is now %s", self.target, state, extra={"target": self.target, "state": state})
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(target: str) -> CircuitBreaker:
+    """Process-wide breaker for a target, shared by every client of that target"""
+    with _breakers_lock:
+        breaker = _breakers.get(target)
+        if breaker is None:
+            breaker = _breakers[target] = CircuitBreaker(target)
+        return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    with _breakers_lock:
+        return {target: breaker.state for target, breaker in _breakers.items()}
+
+
+def _failed(error: grpc.RpcError) -> bool:
+    return error.code() not in HEALTHY_CODES
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(RETRY_MAX_BACKOFF_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** attempt))
+
+
+def _call_status(error: Any) -> str:
+    if isinstance(error, CircuitOpenError):
+        return "CIRCUIT_OPEN"
+    if isinstance(error, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+        return "CANCELLED"
+    return rpc_status(error)
+
+
+def _retrying_call(
+    breaker: CircuitBreaker, method: Callable[..., Any], request: Any, timeout: float, attempts: int
+) -> Any:
+    deadline = time.monotonic() + timeout
+    for attempt in range(max(1, attempts)):
+        if not breaker.allow():
+            raise CircuitOpenError(f"circuit for {breaker.target} is open")
+        started = time.monotonic()
+        try:
+            response = method(request, timeout=max(0.0, deadline - started))
+        except grpc.RpcError as e:
+            breaker.record(_failed(e), time.monotonic() - started)
+            pause = _backoff(attempt)
+            if e.code() not in RETRYABLE_CODES or attempt + 1 >= attempts or time.monotonic() + pause >= deadline:
+                raise
+            RETRIES.labels(breaker.target).inc()
+            time.sleep(pause)
+            continue
+        except BaseException:
+            # Includes cancellation by the enrichment deadline; also frees a half-open probe slot
+            breaker.record(True, time.monotonic() - started)
+            raise
+        breaker.record(False, time.monotonic() - started)
+        return response
+
+
+async def _async_retrying_call(
+    breaker: CircuitBreaker, method: Callable[..., Any], request: Any, timeout: float, attempts: int
+) -> Any:
+    deadline = time.monotonic() + timeout
+    for attempt in range(max(1, attempts)):
+        if not breaker.allow():
+            raise CircuitOpenError(f"circuit for {breaker.target} is open")
+        started = time.monotonic()
+        try:
+            response = await method(request, timeout=max(0.0, deadline - started))
+        except grpc.RpcError as e:
+            breaker.record(_failed(e), time.monotonic() - started)
+            pause = _backoff(attempt)
+            if e.code() not in RETRYABLE_CODES or attempt + 1 >= attempts or time.monotonic() + pause >= deadline:
+                raise
+            RETRIES.labels(breaker.target).inc()
+            await asyncio.sleep(pause)
+            continue
+        except BaseException:
+            # Includes cancellation by the enrichment deadline; also frees a half-open probe slot
+            breaker.record(True, time.monotonic() - started)
+            raise
+        breaker.record(False, time.monotonic() - started)
+        return response
+
+
+def guarded_call(
+    breaker: CircuitBreaker,
+    method: Callable[..., Any],
+    request: Any,
+    timeout: float,
+    attempts: int = RETRY_ATTEMPTS,
+    rpc: str = "unknown",
+) -> Any:
+    """Call an idempotent unary RPC through the breaker, retrying transient errors.
+
+    All attempts share the caller's timeout as one overall deadline; the
+    whole call, retries included, is timed per target, RPC and final status.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        with span(f"grpc.{rpc}", target=breaker.target, rpc=rpc):
+            return _retrying_call(breaker, method, request, timeout, attempts)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        GRPC_CLIENT_SECONDS.labels(breaker.target, rpc, _call_status(error)).observe(time.perf_counter() - started)
+
+
+async def async_guarded_call(
+    breaker: CircuitBreaker,
+    method: Callable[..., Any],
+    request: Any,
+    timeout: float,
+    attempts: int = RETRY_ATTEMPTS,
+    rpc: str = "unknown",
+) -> Any:
+    """grpc.aio counterpart of guarded_call"""
+    started = time.perf_counter()
+    error = None
+    try:
+        with span(f"grpc.{rpc}", target=breaker.target, rpc=rpc):
+            return await _async_retrying_call(breaker, method, request, timeout, attempts)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        GRPC_CLIENT_SECONDS.labels(breaker.target, rpc, _call_status(error)).observe(time.perf_counter() - started)
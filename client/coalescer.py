@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from .channel_registry import AsyncChannelRegistry, ChannelRegistry, get_async_registry, get_registry
+from .company_client import AsyncCompanyClient, CompanyClient
+from .partner_client import AsyncPartnerClient, PartnerClient
+
+logger = logging.getLogger(__name__)
+
+COALESCE_WINDOW_MS = float(os.getenv("ENRICHMENT_COALESCE_WINDOW_MS", "2"))
+COALESCE_MAX_BATCH = int(os.getenv("ENRICHMENT_COALESCE_MAX_BATCH", "100"))
+COALESCE_ENABLED = COALESCE_WINDOW_MS > 0
+
+BatchFn = Callable[[List[str], float], List[dict]]
+AsyncBatchFn = Callable[[List[str], float], Awaitable[List[dict]]]
+
+
+def _by_id(records: List[dict]) -> Dict[str, dict]:
+    return {str(record["id"]): record for record in records}
+
+
+class BatchLoader:
+    """Merges single-ID lookups from concurrent threads into one batched call.
+
+    The first caller of a batch waits out the window and then dispatches every
+    ID collected meanwhile; a batch that reaches max_batch is dispatched by the
+    caller that filled it. Unknown IDs and failed batches resolve to None.
+    """
+
+    def __init__(self, batch_fn: BatchFn, window_ms: float = COALESCE_WINDOW_MS, max_batch: int = COALESCE_MAX_BATCH):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_ms / 1000
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._batch: Dict[str, Future] = {}
+
+    def load(self, key: str, timeout: float = 5) -> Optional[dict]:
+        with self._lock:
+            batch = self._batch
+            leader = not batch
+            future = batch.get(key)
+            if future is None:
+                future = batch[key] = Future()
+            full = len(batch) >= self.max_batch
+            if full:
+                self._batch = {}
+
+        if full:
+            self._dispatch(batch, timeout)
+        elif leader:
+            time.sleep(self.window_seconds)
+            with self._lock:
+                ours = self._batch is batch
+                if ours:
+                    self._batch = {}
+            if ours:
+                self._dispatch(batch, timeout)
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+
+    def _dispatch(self, batch: Dict[str, Future], timeout: float) -> None:
+        try:
+            found = _by_id(self.batch_fn(list(batch), timeout))
+        except Exception:
+            logger.exception("Batched lookup of %d ids failed", len(batch))
+            found = {}
+        for key, future in batch.items():
+            future.set_result(found.get(key))
+
+
+class AsyncBatchLoader:
+    """Event-loop counterpart of BatchLoader"""
+
+    def __init__(
+        self, batch_fn: AsyncBatchFn, window_ms: float = COALESCE_WINDOW_MS, max_batch: int = COALESCE_MAX_BATCH
+    ):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_ms / 1000
+        self.max_batch = max_batch
+        self._batch: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: str, timeout: float = 5) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        batch = self._batch
+        future = batch.get(key)
+        if future is None:
+            future = batch[key] = loop.create_future()
+            if len(batch) >= self.max_batch:
+                self._flush(batch, timeout)
+            elif len(batch) == 1:
+                # Scheduled on the loop rather than awaited by the first caller,
+                # so a cancelled caller cannot strand the rest of the batch
+                loop.call_later(self.window_seconds, self._flush, batch, timeout)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _flush(self, batch: Dict[str, asyncio.Future], timeout: float) -> None:
+        if self._batch is not batch:
+            return
+        self._batch = {}
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch, timeout))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: Dict[str, asyncio.Future], timeout: float) -> None:
+        try:
+            found = _by_id(await self.batch_fn(list(batch), timeout))
+        except Exception:
+            logger.exception("Batched lookup of %d ids failed", len(batch))
+            found = {}
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class CoalescingCompanyClient:
+    """CompanyClient whose single lookups are merged into GetCompanies calls"""
+
+    def __init__(self, registry: Optional[ChannelRegistry] = None, inner: Optional[CompanyClient] = None):
+        self.inner = inner or (registry or get_registry()).get_client(CompanyClient)
+        self.loader = BatchLoader(lambda ids, timeout: self.inner.get_companies(ids, timeout=timeout))
+
+    def get_company(self, company_id: str, timeout: float = 5) -> Optional[dict]:
+        if self.inner.batch_unimplemented:
+            # Nothing to merge into; waiting out the window would only add latency
+            return self.inner.get_company(company_id, timeout=timeout)
+        return self.loader.load(company_id, timeout)
+
+    def get_companies(self, company_ids: List[str], timeout: float = 5) -> List[dict]:
+        return self.inner.get_companies(company_ids, timeout=timeout)
+
+
+class CoalescingPartnerClient:
+    """PartnerClient whose single lookups are merged into GetPartners calls"""
+
+    def __init__(self, registry: Optional[ChannelRegistry] = None, inner: Optional[PartnerClient] = None):
+        self.inner = inner or (registry or get_registry()).get_client(PartnerClient)
+        self.loader = BatchLoader(lambda ids, timeout: self.inner.get_partners(ids, timeout=timeout))
+
+    def get_partner(self, partner_id: str, timeout: float = 5) -> Optional[dict]:
+        if self.inner.batch_unimplemented:
+            return self.inner.get_partner(partner_id, timeout=timeout)
+        return self.loader.load(partner_id, timeout)
+
+    def get_partners(self, partner_ids: List[str], timeout: float = 5) -> List[dict]:
+        return self.inner.get_partners(partner_ids, timeout=timeout)
+
+
+class AsyncCoalescingCompanyClient:
+    def __init__(self, registry: Optional[AsyncChannelRegistry] = None, inner: Optional[AsyncCompanyClient] = None):
+        self.inner = inner or (registry or get_async_registry()).get_client(AsyncCompanyClient)
+        self.loader = AsyncBatchLoader(lambda ids, timeout: self.inner.get_companies(ids, timeout=timeout))
+
+    async def get_company(self, company_id: str, timeout: float = 5) -> Optional[dict]:
+        if self.inner.batch_unimplemented:
+            return await self.inner.get_company(company_id, timeout=timeout)
+        return await self.loader.load(company_id, timeout)
+
+    async def get_companies(self, company_ids: List[str], timeout: float = 5) -> List[dict]:
+        return await self.inner.get_companies(company_ids, timeout=timeout)
+
+
+class AsyncCoalescingPartnerClient:
+    def __init__(self, registry: Optional[AsyncChannelRegistry] = None, inner: Optional[AsyncPartnerClient] = None):
+        self.inner = inner or (registry or get_async_registry()).get_client(AsyncPartnerClient)
+        self.loader = AsyncBatchLoader(lambda ids, timeout: self.inner.get_partners(ids, timeout=timeout))
+
+    async def get_partner(self, partner_id: str, timeout: float = 5) -> Optional[dict]:
+        if self.inner.batch_unimplemented:
+            return await self.inner.get_partner(partner_id, timeout=timeout)
+        return await self.loader.load(partner_id, timeout)
+
+    async def get_partners(self, partner_ids: List[str], timeout: float = 5) -> List[dict]:
+        return await self.inner.get_partners(partner_ids, timeout=timeout)
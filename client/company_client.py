@@ -1,47 +1,158 @@
+import logging
 import os
+from functools import partial
 import grpc
-from typing import Optional
-from . import company_pb2, company_pb2_grpc
+from typing import List, Optional
+from service.enrichment import async_fan_out, fan_out, lookup_executor
+from .circuit_breaker import CircuitOpenError, async_guarded_call, get_breaker, guarded_call
+from .channel_registry import AsyncChannelRegistry, ChannelRegistry, get_async_registry, get_registry
+from . import stubs
+
+logger = logging.getLogger(__name__)
+
+
+def _company_to_dict(response) -> dict:
+    return {
+        "id": response.id,
+        "userId": response.userId,
+        "companyName": response.companyName,
+        "street": response.street,
+        "streetAdditional": response.streetAdditional,
+        "postalCode": response.postalCode,
+        "city": response.city,
+        "iban": response.iban,
+        "bic": response.bic,
+        "registrationNumber": response.registrationNumber,
+        "vatPayer": response.vatPayer,
+        "vatId": response.vatId,
+        "additionalInfo": response.additionalInfo,
+        "documentLocation": response.documentLocation,
+        "reverseCharge": response.reverseCharge,
+    }
 
 
 class CompanyClient:
-    def __init__(self):
+    def __init__(self, channel: Optional[grpc.Channel] = None, registry: Optional[ChannelRegistry] = None):
         self.host = os.getenv("COMPANY_SERVICE_HOST", "company-service")
         self.port = os.getenv("COMPANY_SERVICE_GRPC_PORT", "50051")
-        self.channel = grpc.insecure_channel(f"{self.host}:{self.port}")
-        self.stub = company_pb2_grpc.CompanyServiceStub(self.channel)
+        self.target = f"{self.host}:{self.port}"
+        self.breaker = get_breaker(self.target)
+        # Channels are borrowed from the shared registry and closed by it on shutdown
+        if channel is None:
+            channel = (registry or get_registry()).get_channel(self.target)
+        self.channel = channel
+        self.messages, grpc_stubs = stubs.load("company")
+        self.stub = grpc_stubs.CompanyServiceStub(self.channel)
+        # Set once the server answers GetCompanies with UNIMPLEMENTED; later batches go straight to single lookups
+        self.batch_unimplemented = False
 
-    def get_company(self, company_id: str) -> Optional[dict]:
+    def get_company(self, company_id: str, timeout: float = 5) -> Optional[dict]:
         """Get company by ID via gRPC"""
         try:
-            request = company_pb2.GetCompanyRequest(id=company_id)
-            response = self.stub.GetCompany(request, timeout=5)
-            
-            return {
-                "id": response.id,
-                "userId": response.userId,
-                "companyName": response.companyName,
-                "street": response.street,
-                "streetAdditional": response.streetAdditional,
-                "postalCode": response.postalCode,
-                "city": response.city,
-                "iban": response.iban,
-                "bic": response.bic,
-                "registrationNumber": response.registrationNumber,
-                "vatPayer": response.vatPayer,
-                "vatId": response.vatId,
-                "additionalInfo": response.additionalInfo,
-                "documentLocation": response.documentLocation,
-                "reverseCharge": response.reverseCharge,
-            }
+            request = self.messages.GetCompanyRequest(id=company_id)
+            response = guarded_call(self.breaker, self.stub.GetCompany, request, timeout, rpc="GetCompany")
+            return _company_to_dict(response)
+        except CircuitOpenError:
+            return None
         except grpc.RpcError as e:
-            print(f"gRPC error getting company {company_id}: {e}")
+            logger.warning("gRPC error getting company %s: %s", company_id, e)
             return None
-        except Exception as e:
-            print(f"Error getting company {company_id}: {e}")
+        except Exception:
+            logger.exception("Error getting company %s", company_id)
             return None
 
+    def get_companies(self, company_ids: List[str], timeout: float = 5) -> List[dict]:
+        """Get many companies in one RPC; falls back to single lookups if the server lacks GetCompanies"""
+        if not company_ids:
+            return []
+        if self.batch_unimplemented:
+            return self._get_each(company_ids, timeout)
+        try:
+            request = self.messages.GetCompaniesRequest(ids=company_ids)
+            response = guarded_call(self.breaker, self.stub.GetCompanies, request, timeout, rpc="GetCompanies")
+            return [_company_to_dict(item) for item in response.companies]
+        except CircuitOpenError:
+            return []
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                logger.info("%s does not implement GetCompanies; using single lookups", self.target)
+                self.batch_unimplemented = True
+                return self._get_each(company_ids, timeout)
+            logger.warning("gRPC error getting companies: %s", e)
+            return []
+        except Exception:
+            logger.exception("Error getting companies")
+            return []
+
+    def _get_each(self, company_ids: List[str], timeout: float) -> List[dict]:
+        """Concurrent single lookups for servers without GetCompanies"""
+        calls = {i: partial(self.get_company, i, timeout=timeout) for i in dict.fromkeys(company_ids)}
+        found = fan_out(calls, deadline=timeout, executor=lookup_executor)
+        return [item for item in found.values() if item is not None]
+
     def close(self):
-        """Close the gRPC channel"""
-        if self.channel:
-            self.channel.close()
+        """Release the client; the pooled channel is closed by the registry"""
+        self.stub = None
+
+
+class AsyncCompanyClient:
+    """grpc.aio variant of CompanyClient for the async request path"""
+
+    def __init__(self, channel: Optional[grpc.aio.Channel] = None, registry: Optional[AsyncChannelRegistry] = None):
+        self.host = os.getenv("COMPANY_SERVICE_HOST", "company-service")
+        self.port = os.getenv("COMPANY_SERVICE_GRPC_PORT", "50051")
+        self.target = f"{self.host}:{self.port}"
+        self.breaker = get_breaker(self.target)
+        if channel is None:
+            channel = (registry or get_async_registry()).get_channel(self.target)
+        self.channel = channel
+        self.messages, grpc_stubs = stubs.load("company")
+        self.stub = grpc_stubs.CompanyServiceStub(self.channel)
+        # Set once the server answers GetCompanies with UNIMPLEMENTED; later batches go straight to single lookups
+        self.batch_unimplemented = False
+
+    async def get_company(self, company_id: str, timeout: float = 5) -> Optional[dict]:
+        """Get company by ID via gRPC"""
+        try:
+            request = self.messages.GetCompanyRequest(id=company_id)
+            response = await async_guarded_call(self.breaker, self.stub.GetCompany, request, timeout, rpc="GetCompany")
+            return _company_to_dict(response)
+        except CircuitOpenError:
+            return None
+        except grpc.RpcError as e:
+            logger.warning("gRPC error getting company %s: %s", company_id, e)
+            return None
+        except Exception:
+            logger.exception("Error getting company %s", company_id)
+            return None
+
+    async def get_companies(self, company_ids: List[str], timeout: float = 5) -> List[dict]:
+        """Get many companies in one RPC; falls back to single lookups if the server lacks GetCompanies"""
+        if not company_ids:
+            return []
+        if self.batch_unimplemented:
+            return await self._get_each(company_ids, timeout)
+        try:
+            request = self.messages.GetCompaniesRequest(ids=company_ids)
+            response = await async_guarded_call(
+                self.breaker, self.stub.GetCompanies, request, timeout, rpc="GetCompanies"
+            )
+            return [_company_to_dict(item) for item in response.companies]
+        except CircuitOpenError:
+            return []
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                logger.info("%s does not implement GetCompanies; using single lookups", self.target)
+                self.batch_unimplemented = True
+                return await self._get_each(company_ids, timeout)
+            logger.warning("gRPC error getting companies: %s", e)
+            return []
+        except Exception:
+            logger.exception("Error getting companies")
+            return []
+
+    async def _get_each(self, company_ids: List[str], timeout: float) -> List[dict]:
+        """Concurrent single lookups for servers without GetCompanies"""
+        calls = {i: self.get_company(i, timeout=timeout) for i in dict.fromkeys(company_ids)}
+        found = await async_fan_out(calls, deadline=timeout)
+        return [item for item in found.values() if item is not None]
@@ -1,48 +1,159 @@
+import logging
 import os
+from functools import partial
 import grpc
-from typing import Optional
-from . import partner_pb2, partner_pb2_grpc
+from typing import List, Optional
+from service.enrichment import async_fan_out, fan_out, lookup_executor
+from .circuit_breaker import CircuitOpenError, async_guarded_call, get_breaker, guarded_call
+from .channel_registry import AsyncChannelRegistry, ChannelRegistry, get_async_registry, get_registry
+from . import stubs
+
+logger = logging.getLogger(__name__)
+
+
+def _partner_to_dict(response) -> dict:
+    return {
+        "id": response.id,
+        "userId": response.userId,
+        "naziv": response.naziv,
+        "ulica": response.ulica,
+        "kraj": response.kraj,
+        "postnaSt": response.postnaSt,
+        "poljubenNaslov": response.poljubenNaslov,
+        "ddvZavezanec": response.ddvZavezanec,
+        "davcnaSt": response.davcnaSt,
+        "rokPlacila": response.rokPlacila,
+        "telefon": response.telefon,
+        "ePosta": response.ePosta,
+        "spletnastran": response.spletnastran,
+        "opombe": response.opombe,
+        "eRacunNaslov": response.eRacunNaslov,
+        "eRacunId": response.eRacunId,
+    }
 
 
 class PartnerClient:
-    def __init__(self):
+    def __init__(self, channel: Optional[grpc.Channel] = None, registry: Optional[ChannelRegistry] = None):
         self.host = os.getenv("PARTNER_SERVICE_HOST", "partner-service")
         self.port = os.getenv("PARTNER_SERVICE_GRPC_PORT", "50051")
-        self.channel = grpc.insecure_channel(f"{self.host}:{self.port}")
-        self.stub = partner_pb2_grpc.PartnerServiceStub(self.channel)
+        self.target = f"{self.host}:{self.port}"
+        self.breaker = get_breaker(self.target)
+        # Channels are borrowed from the shared registry and closed by it on shutdown
+        if channel is None:
+            channel = (registry or get_registry()).get_channel(self.target)
+        self.channel = channel
+        self.messages, grpc_stubs = stubs.load("partner")
+        self.stub = grpc_stubs.PartnerServiceStub(self.channel)
+        # Set once the server answers GetPartners with UNIMPLEMENTED; later batches go straight to single lookups
+        self.batch_unimplemented = False
 
-    def get_partner(self, partner_id: str) -> Optional[dict]:
+    def get_partner(self, partner_id: str, timeout: float = 5) -> Optional[dict]:
         """Get partner by ID via gRPC"""
         try:
-            request = partner_pb2.GetPartnerRequest(id=partner_id)
-            response = self.stub.GetPartner(request, timeout=5)
-            
-            return {
-                "id": response.id,
-                "userId": response.userId,
-                "naziv": response.naziv,
-                "ulica": response.ulica,
-                "kraj": response.kraj,
-                "postnaSt": response.postnaSt,
-                "poljubenNaslov": response.poljubenNaslov,
-                "ddvZavezanec": response.ddvZavezanec,
-                "davcnaSt": response.davcnaSt,
-                "rokPlacila": response.rokPlacila,
-                "telefon": response.telefon,
-                "ePosta": response.ePosta,
-                "spletnastran": response.spletnastran,
-                "opombe": response.opombe,
-                "eRacunNaslov": response.eRacunNaslov,
-                "eRacunId": response.eRacunId,
-            }
+            request = self.messages.GetPartnerRequest(id=partner_id)
+            response = guarded_call(self.breaker, self.stub.GetPartner, request, timeout, rpc="GetPartner")
+            return _partner_to_dict(response)
+        except CircuitOpenError:
+            return None
         except grpc.RpcError as e:
-            print(f"gRPC error getting partner {partner_id}: {e}")
+            logger.warning("gRPC error getting partner %s: %s", partner_id, e)
             return None
-        except Exception as e:
-            print(f"Error getting partner {partner_id}: {e}")
+        except Exception:
+            logger.exception("Error getting partner %s", partner_id)
             return None
 
+    def get_partners(self, partner_ids: List[str], timeout: float = 5) -> List[dict]:
+        """Get many partners in one RPC; falls back to single lookups if the server lacks GetPartners"""
+        if not partner_ids:
+            return []
+        if self.batch_unimplemented:
+            return self._get_each(partner_ids, timeout)
+        try:
+            request = self.messages.GetPartnersRequest(ids=partner_ids)
+            response = guarded_call(self.breaker, self.stub.GetPartners, request, timeout, rpc="GetPartners")
+            return [_partner_to_dict(item) for item in response.partners]
+        except CircuitOpenError:
+            return []
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                logger.info("%s does not implement GetPartners; using single lookups", self.target)
+                self.batch_unimplemented = True
+                return self._get_each(partner_ids, timeout)
+            logger.warning("gRPC error getting partners: %s", e)
+            return []
+        except Exception:
+            logger.exception("Error getting partners")
+            return []
+
+    def _get_each(self, partner_ids: List[str], timeout: float) -> List[dict]:
+        """Concurrent single lookups for servers without GetPartners"""
+        calls = {i: partial(self.get_partner, i, timeout=timeout) for i in dict.fromkeys(partner_ids)}
+        found = fan_out(calls, deadline=timeout, executor=lookup_executor)
+        return [item for item in found.values() if item is not None]
+
     def close(self):
-        """Close the gRPC channel"""
-        if self.channel:
-            self.channel.close()
+        """Release the client; the pooled channel is closed by the registry"""
+        self.stub = None
+
+
+class AsyncPartnerClient:
+    """grpc.aio variant of PartnerClient for the async request path"""
+
+    def __init__(self, channel: Optional[grpc.aio.Channel] = None, registry: Optional[AsyncChannelRegistry] = None):
+        self.host = os.getenv("PARTNER_SERVICE_HOST", "partner-service")
+        self.port = os.getenv("PARTNER_SERVICE_GRPC_PORT", "50051")
+        self.target = f"{self.host}:{self.port}"
+        self.breaker = get_breaker(self.target)
+        if channel is None:
+            channel = (registry or get_async_registry()).get_channel(self.target)
+        self.channel = channel
+        self.messages, grpc_stubs = stubs.load("partner")
+        self.stub = grpc_stubs.PartnerServiceStub(self.channel)
+        # Set once the server answers GetPartners with UNIMPLEMENTED; later batches go straight to single lookups
+        self.batch_unimplemented = False
+
+    async def get_partner(self, partner_id: str, timeout: float = 5) -> Optional[dict]:
+        """Get partner by ID via gRPC"""
+        try:
+            request = self.messages.GetPartnerRequest(id=partner_id)
+            response = await async_guarded_call(self.breaker, self.stub.GetPartner, request, timeout, rpc="GetPartner")
+            return _partner_to_dict(response)
+        except CircuitOpenError:
+            return None
+        except grpc.RpcError as e:
+            logger.warning("gRPC error getting partner %s: %s", partner_id, e)
+            return None
+        except Exception:
+            logger.exception("Error getting partner %s", partner_id)
+            return None
+
+    async def get_partners(self, partner_ids: List[str], timeout: float = 5) -> List[dict]:
+        """Get many partners in one RPC; falls back to single lookups if the server lacks GetPartners"""
+        if not partner_ids:
+            return []
+        if self.batch_unimplemented:
+            return await self._get_each(partner_ids, timeout)
+        try:
+            request = self.messages.GetPartnersRequest(ids=partner_ids)
+            response = await async_guarded_call(
+                self.breaker, self.stub.GetPartners, request, timeout, rpc="GetPartners"
+            )
+            return [_partner_to_dict(item) for item in response.partners]
+        except CircuitOpenError:
+            return []
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                logger.info("%s does not implement GetPartners; using single lookups", self.target)
+                self.batch_unimplemented = True
+                return await self._get_each(partner_ids, timeout)
+            logger.warning("gRPC error getting partners: %s", e)
+            return []
+        except Exception:
+            logger.exception("Error getting partners")
+            return []
+
+    async def _get_each(self, partner_ids: List[str], timeout: float) -> List[dict]:
+        """Concurrent single lookups for servers without GetPartners"""
+        calls = {i: self.get_partner(i, timeout=timeout) for i in dict.fromkeys(partner_ids)}
+        found = await async_fan_out(calls, deadline=timeout)
+        return [item for item in found.values() if item is not None]
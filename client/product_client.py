@@ -1,57 +1,88 @@
+import logging
 import os
 import grpc
 from typing import List, Optional
-from . import product_pb2, product_pb2_grpc
+from .circuit_breaker import CircuitOpenError, async_guarded_call, get_breaker, guarded_call
+from .channel_registry import AsyncChannelRegistry, ChannelRegistry, get_async_registry, get_registry
+from . import stubs
+
+logger = logging.getLogger(__name__)
+
+
+def _products_to_list(response) -> List[dict]:
+    return [
+        {
+            "id": product.id,
+            "companyId": product.companyId,
+            "name": product.name,
+            "cost": product.cost,
+            "measuringUnit": product.measuringUnit,
+            "ddvPercentage": product.ddvPercentage,
+        }
+        for product in response.products
+    ]
 
 
 class ProductClient:
-    def __init__(self):
+    def __init__(self, channel: Optional[grpc.Channel] = None, registry: Optional[ChannelRegistry] = None):
         self.host = os.getenv("COMPANY_SERVICE_HOST", "company-service")
         self.port = os.getenv("COMPANY_SERVICE_GRPC_PORT", "50051")
-        self.channel = grpc.insecure_channel(f"{self.host}:{self.port}")
-        self.stub = product_pb2_grpc.ProductServiceStub(self.channel)
+        self.target = f"{self.host}:{self.port}"
+        self.breaker = get_breaker(self.target)
+        # Channels are borrowed from the shared registry and closed by it on shutdown
+        if channel is None:
+            channel = (registry or get_registry()).get_channel(self.target)
+        self.channel = channel
+        self.messages, grpc_stubs = stubs.load("product")
+        self.stub = grpc_stubs.ProductServiceStub(self.channel)
 
-    def get_products(self, product_ids: List[str]) -> List[dict]:
+    def get_products(self, product_ids: List[str], timeout: float = 5) -> List[dict]:
         """Get multiple products by IDs via gRPC"""
         try:
-            request = product_pb2.GetProductsRequest(ids=product_ids)
-            response = self.stub.GetProducts(request, timeout=5)
-            
-            products = []
-            for product in response.products:
-                products.append({
-                    "id": product.id,
-                    "companyId": product.companyId,
-                    "name": product.name,
-                    "cost": product.cost,
-                    "measuringUnit": product.measuringUnit,
-                    "ddvPercentage": product.ddvPercentage,
-                })
-            return products
+            request = self.messages.GetProductsRequest(ids=product_ids)
+            response = guarded_call(self.breaker, self.stub.GetProducts, request, timeout, rpc="GetProducts")
+            return _products_to_list(response)
+        except CircuitOpenError:
+            return []
         except grpc.RpcError as e:
-            print(f"gRPC error getting products: {e}")
+            logger.warning("gRPC error getting products: %s", e)
             return []
-        except Exception as e:
-            print(f"Error getting products: {e}")
+        except Exception:
+            logger.exception("Error getting products")
             return []
 
     def close(self):
-        """Close the gRPC channel"""
-        if self.channel:
-            self.channel.close()
+        """Release the client; the pooled channel is closed by the registry"""
+        self.stub = None
 
-        try:
-            raw_price = data["cost"]
-            raw_ddv = data.get("ddvPercentage", "22")
-            measuring_unit = data.get("measuringUnit", "")
-            return Product(
-                id=UUID(str(data["id"])),
-                name=str(data["name"]),
-                price=Decimal(str(raw_price)),
-                measuring_unit=str(measuring_unit),
-                ddv_percentage=Decimal(str(raw_ddv)),
-            )
-        except Exception as e:
-            raise ProductClientError("unexpected product shape from product-service") from e
 
+class AsyncProductClient:
+    """grpc.aio variant of ProductClient for the async request path"""
+
+    def __init__(self, channel: Optional[grpc.aio.Channel] = None, registry: Optional[AsyncChannelRegistry] = None):
+        self.host = os.getenv("COMPANY_SERVICE_HOST", "company-service")
+        self.port = os.getenv("COMPANY_SERVICE_GRPC_PORT", "50051")
+        self.target = f"{self.host}:{self.port}"
+        self.breaker = get_breaker(self.target)
+        if channel is None:
+            channel = (registry or get_async_registry()).get_channel(self.target)
+        self.channel = channel
+        self.messages, grpc_stubs = stubs.load("product")
+        self.stub = grpc_stubs.ProductServiceStub(self.channel)
 
+    async def get_products(self, product_ids: List[str], timeout: float = 5) -> List[dict]:
+        """Get multiple products by IDs via gRPC"""
+        try:
+            request = self.messages.GetProductsRequest(ids=product_ids)
+            response = await async_guarded_call(
+                self.breaker, self.stub.GetProducts, request, timeout, rpc="GetProducts"
+            )
+            return _products_to_list(response)
+        except CircuitOpenError:
+            return []
+        except grpc.RpcError as e:
+            logger.warning("gRPC error getting products: %s", e)
+            return []
+        except Exception:
+            logger.exception("Error getting products")
+            return []
@@ -0,0 +1,199 @@
+"""In-process stand-in for company-, partner- and product-service.
+
+Serves the same gRPC contracts from in-memory records so clients, the
+coalescer and the invoice service can be exercised without the real services:
+
+    python -m client.stand_in --port 50051 --data fixtures.json
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import grpc
+
+from . import company_pb2, company_pb2_grpc, partner_pb2, partner_pb2_grpc, product_pb2, product_pb2_grpc
+
+
+def _message(message_cls, record: dict):
+    fields = message_cls.DESCRIPTOR.fields_by_name
+    return message_cls(**{key: value for key, value in record.items() if key in fields})
+
+
+def _index(records: Optional[Iterable[dict]]) -> Dict[str, dict]:
+    return {str(record["id"]): record for record in records or []}
+
+
+class _Servicer:
+    def __init__(self, server: "StandInServer"):
+        self.server = server
+
+    def _record(self, method: str, ids: List[str], context) -> None:
+        with self.server.lock:
+            self.server.calls[method] += 1
+            self.server.requested_ids[method].extend(ids)
+        self.server.simulate(context)
+
+    def _unimplemented(self, context):
+        context.abort(grpc.StatusCode.UNIMPLEMENTED, "batch lookups disabled")
+
+
+class _CompanyServicer(_Servicer, company_pb2_grpc.CompanyServiceServicer):
+    def GetCompany(self, request, context):
+        self._record("GetCompany", [request.id], context)
+        record = self.server.companies.get(request.id)
+        if record is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"company {request.id} not found")
+        return _message(company_pb2.GetCompanyResponse, record)
+
+    def GetCompanies(self, request, context):
+        self._record("GetCompanies", list(request.ids), context)
+        if not self.server.batch_rpcs:
+            self._unimplemented(context)
+        found = [self.server.companies[i] for i in request.ids if i in self.server.companies]
+        return company_pb2.GetCompaniesResponse(
+            companies=[_message(company_pb2.GetCompanyResponse, record) for record in found]
+        )
+
+
+class _PartnerServicer(_Servicer, partner_pb2_grpc.PartnerServiceServicer):
+    def GetPartner(self, request, context):
+        self._record("GetPartner", [request.id], context)
+        record = self.server.partners.get(request.id)
+        if record is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"partner {request.id} not found")
+        return _message(partner_pb2.GetPartnerResponse, record)
+
+    def GetPartners(self, request, context):
+        self._record("GetPartners", list(request.ids), context)
+        if not self.server.batch_rpcs:
+            self._unimplemented(context)
+        found = [self.server.partners[i] for i in request.ids if i in self.server.partners]
+        return partner_pb2.GetPartnersResponse(
+            partners=[_message(partner_pb2.GetPartnerResponse, record) for record in found]
+        )
+
+
+class _ProductServicer(_Servicer, product_pb2_grpc.ProductServiceServicer):
+    def GetProducts(self, request, context):
+        self._record("GetProducts", list(request.ids), context)
+        found = [self.server.products[i] for i in request.ids if i in self.server.products]
+        return product_pb2.GetProductsResponse(
+            products=[_message(product_pb2.GetProductResponse, record) for record in found]
+        )
+
+
+class StandInServer:
+    """All three enrichment services on one local port, with per-method call counters.
+
+    batch_rpcs=False makes GetCompanies/GetPartners answer UNIMPLEMENTED, like a
+    service that has not been upgraded yet. latency_ms (plus up to jitter_ms)
+    delays every call and error_rate makes that share of calls fail with
+    error_code, for load and failure testing.
+    """
+
+    def __init__(
+        self,
+        companies: Optional[Iterable[dict]] = None,
+        partners: Optional[Iterable[dict]] = None,
+        products: Optional[Iterable[dict]] = None,
+        batch_rpcs: bool = True,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_workers: int = 16,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0,
+        error_code: grpc.StatusCode = grpc.StatusCode.UNAVAILABLE,
+        seed: Optional[int] = None,
+    ):
+        self.companies = _index(companies)
+        self.partners = _index(partners)
+        self.products = _index(products)
+        self.batch_rpcs = batch_rpcs
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self._random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.requested_ids: Dict[str, List[str]] = {
+            method: [] for method in ("GetCompany", "GetCompanies", "GetPartner", "GetPartners", "GetProducts")
+        }
+        self._server = grpc.server(ThreadPoolExecutor(max_workers=max_workers))
+        company_pb2_grpc.add_CompanyServiceServicer_to_server(_CompanyServicer(self), self._server)
+        partner_pb2_grpc.add_PartnerServiceServicer_to_server(_PartnerServicer(self), self._server)
+        product_pb2_grpc.add_ProductServiceServicer_to_server(_ProductServicer(self), self._server)
+        self.port = self._server.add_insecure_port(f"{host}:{port}")
+        self.target = f"{host}:{self.port}"
+
+    def simulate(self, context) -> None:
+        """Apply the configured latency and injected errors to one call"""
+        with self.lock:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if fail:
+            context.abort(self.error_code, "injected error")
+
+    def start(self) -> "StandInServer":
+        self._server.start()
+        return self
+
+    def stop(self, grace: Optional[float] = None) -> None:
+        self._server.stop(grace).wait()
+
+    def wait(self) -> None:
+        self._server.wait_for_termination()
+
+    def reset_calls(self) -> None:
+        with self.lock:
+            self.calls.clear()
+            for ids in self.requested_ids.values():
+                ids.clear()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--data", help='JSON file with "companies", "partners" and "products" lists')
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    data = {}
+    if args.data:
+        with open(args.data) as f:
+            data = json.load(f)
+    server = StandInServer(
+        data.get("companies"),
+        data.get("partners"),
+        data.get("products"),
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+    )
+    server.start()
+    print(f"Stand-in services listening on {server.target}")
+    server.wait()
+
+
+if __name__ == "__main__":
+    main()
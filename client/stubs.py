@@ -0,0 +1,14 @@
+"""Generated protobuf/gRPC modules, imported on first client construction to keep them off the startup path"""
+
+import importlib
+from functools import lru_cache
+from types import ModuleType
+from typing import Tuple
+
+
+@lru_cache(maxsize=None)
+def load(service: str) -> Tuple[ModuleType, ModuleType]:
+    """(messages, stubs) modules for "company", "partner" or "product" """
+    messages = importlib.import_module(f".{service}_pb2", __package__)
+    stubs = importlib.import_module(f".{service}_pb2_grpc", __package__)
+    return messages, stubs
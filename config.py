@@ -1,17 +1,106 @@
+import logging
 import os
+from typing import Any, Dict, Tuple
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 
+from observability import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrumented_pool
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5433")
 DB_USERNAME = os.getenv("DB_USERNAME", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
 DB_NAME = os.getenv("DB_DATABASE", "invoiceDB")
+# Optional streaming replica serving list, detail, summary and export reads
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", DB_PORT)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+# Below Postgres/PgBouncer/load-balancer idle timeouts so the pool never hands out a dropped connection
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+# One cheap round-trip per checkout; after a failover stale connections are replaced instead of failing requests
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "invoice-service")
 
 DATABASE_URL = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+REPLICA_DATABASE_URL = None
+if DB_REPLICA_HOST:
+    REPLICA_DATABASE_URL = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}"
+
+# Serve requests through async routes, asyncpg and grpc.aio instead of the threadpool
+ASYNC_MODE = os.getenv("ASYNC_MODE", "false").lower() in ("1", "true", "yes")
+# What the app does with the schema on startup: check (compare with the Alembic head, the
+# default), migrate (create the database and upgrade, for local development) or off.
+# Deployments run python migrate.py as a job or init container instead.
+DB_STARTUP_MODE = os.getenv("DB_STARTUP_MODE", "check").lower()
+
+
+def _connect_args(url: str, application_name: str) -> Dict[str, Any]:
+    """application_name and statement_timeout as session settings, in the form the URL's driver takes them"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return {}
+    if parsed.get_driver_name() == "asyncpg":
+        settings = {"application_name": application_name}
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+        return {"server_settings": settings}
+    args = {"application_name": application_name}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return args
+
+
+def engine_options(url: str, name: str = "primary", pool_class: type = InstrumentedQueuePool) -> Dict[str, Any]:
+    """create_engine keyword arguments from the DB_POOL_* settings; name labels the pool metrics"""
+    application_name = DB_APPLICATION_NAME if name == "primary" else f"{DB_APPLICATION_NAME}-{name}"
+    return {
+        "poolclass": instrumented_pool(pool_class, name),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": _connect_args(url, application_name),
+    }
+
+
+def create_db_engine(url: str, name: str = "primary") -> Engine:
+    return create_engine(url, **engine_options(url, name))
+
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def create_async_db_engine(url: str, name: str = "primary"):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(url, **engine_options(url, name, InstrumentedAsyncQueuePool))
+
+
+def _async_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+engine = create_db_engine(DATABASE_URL)
+# Without a replica, reads share the primary engine and its pool
+read_engine = create_db_engine(REPLICA_DATABASE_URL, "replica") if REPLICA_DATABASE_URL else engine
+# expire_on_commit=False keeps written invoices loaded so responses need no refresh queries
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=read_engine)
+
+# The async engines are created on first use so the sync path never needs asyncpg
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
 
 
 def get_db():
@@ -22,12 +111,65 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Session for read-only endpoints; served by the replica when DB_REPLICA_HOST is set"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _create_async_sessionmakers():
+    global async_engine, async_read_engine, AsyncSessionLocal, AsyncReadSessionLocal
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+    async_read_engine = (
+        create_async_db_engine(_async_url(REPLICA_DATABASE_URL), "replica") if REPLICA_DATABASE_URL else async_engine
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_async_sessionmaker():
+    if AsyncSessionLocal is None:
+        _create_async_sessionmakers()
+    return AsyncSessionLocal
+
+
+def get_async_read_sessionmaker():
+    if AsyncReadSessionLocal is None:
+        _create_async_sessionmakers()
+    return AsyncReadSessionLocal
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with get_async_read_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    global async_engine, async_read_engine, AsyncSessionLocal, AsyncReadSessionLocal
+    if async_read_engine is not None and async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = async_read_engine = None
+    AsyncSessionLocal = AsyncReadSessionLocal = None
+
+
 def ensure_database_exists():
     """Create database if it doesn't exist"""
     # Connect to default postgres database to create our database
     temp_url = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/postgres"
     temp_engine = create_engine(temp_url, isolation_level="AUTOCOMMIT")
-    
+
     try:
         with temp_engine.connect() as conn:
             # Check if database exists
@@ -36,58 +178,67 @@ def ensure_database_exists():
                 {"dbname": DB_NAME}
             )
             exists = result.fetchone() is not None
-            
+
             if not exists:
-                print(f"Database '{DB_NAME}' not found. Creating...")
+                logger.info("Database '%s' not found. Creating...", DB_NAME)
                 conn.execute(text(f'CREATE DATABASE "{DB_NAME}"'))
-                print(f"Database '{DB_NAME}' created successfully")
+                logger.info("Database '%s' created successfully", DB_NAME)
             else:
-                print(f"Database '{DB_NAME}' already exists")
-    except Exception as e:
-        print(f"Error checking/creating database: {e}")
+                logger.info("Database '%s' already exists", DB_NAME)
+    except Exception:
+        logger.exception("Error checking/creating database")
         raise
     finally:
         temp_engine.dispose()
 
 
-def ensure_tables_exist():
-    """Check if tables exist and run migrations if needed"""
-    from sqlalchemy import inspect
-    from models.database import Base
-    import subprocess
-    
-    inspector = inspect(engine)
-    tables = inspector.get_table_names()
-    
-    required_tables = ["invoices", "invoice_lines"]
-    tables_exist = all(table in tables for table in required_tables)
-    
-    if not tables_exist:
-        print("Required tables not found. Running migrations...")
-        try:
-            # Run alembic migrations
-            subprocess.run(["alembic", "upgrade", "head"], check=True)
-            print("Migrations completed successfully")
-        except subprocess.CalledProcessError as e:
-            print(f"Migration failed: {e}")
-            # Fallback to create_all if migrations fail
-            print("Falling back to Base.metadata.create_all()")
-            Base.metadata.create_all(bind=engine)
-    else:
-        print("All required tables exist in invoiceDB")
+def alembic_config():
+    from alembic.config import Config
+
+    cfg = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    # Leave the application's logging alone when migrating in-process
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def run_migrations():
+    """Upgrade the database to the Alembic head"""
+    from alembic import command
+
+    command.upgrade(alembic_config(), "head")
+
+
+def schema_status() -> Tuple[bool, str]:
+    """Whether the database schema is at a revision this build can serve, and why.
+
+    A revision this build does not know is assumed to come from a newer
+    release mid-rollout (migrations are applied before the pods are rolled),
+    so it counts as ready; a missing or older revision does not.
+    """
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(alembic_config())
+    heads = set(script.get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    if current == heads:
+        return True, f"schema at head {', '.join(sorted(heads))}"
+    if not current:
+        return False, "database has no schema revision; run python migrate.py"
+    known = {revision.revision for revision in script.walk_revisions()}
+    if not current <= known:
+        return True, f"schema at {', '.join(sorted(current))}, newer than this build"
+    return False, f"schema at {', '.join(sorted(current))}, expected {', '.join(sorted(heads))}; run python migrate.py"
 
 
 def initialize_database():
-    """Initialize database: create DB, and ensure tables exist"""
+    """Create the database and apply migrations; what python migrate.py runs"""
     try:
-        # Step 1: Ensure database exists
         ensure_database_exists()
-        
-        # Step 2: Ensure tables exist
-        ensure_tables_exist()
-        
-        print("Database initialization completed successfully")
-    except Exception as e:
-        print(f"Database initialization failed: {e}")
+        run_migrations()
+        logger.info("Database initialization completed successfully")
+    except Exception:
+        logger.exception("Database initialization failed")
         raise
-
@@ -1,8 +1,32 @@
+import time
+
+# Module imports dominate cold starts; measured here and exported as invoice_startup_seconds{phase="import"}
+IMPORT_STARTED = time.perf_counter()
+
+import os
+from typing import Optional, Tuple
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
-from config import initialize_database
-from api.routes import router
+from observability import configure_logging, startup_profile
+from config import ASYNC_MODE, DB_STARTUP_MODE, SessionLocal, dispose_async_engine, initialize_database, schema_status
+from client.channel_registry import close_async_registry, close_registry, get_async_registry, get_registry
+from service.enrichment import REQUEST_THREADS
+from service.outbox import OUTBOX_RELAY_ENABLED, OutboxRelay, sink_from_env
+
+configure_logging()
+
+if ASYNC_MODE:
+    from api.async_routes import router
+else:
+    from api.routes import router
+from api.admin_routes import router as admin_router
+
+# How often /ready re-reads the schema revision while it is behind (e.g. until the migration job finishes)
+READY_SCHEMA_RECHECK_SECONDS = float(os.getenv("READY_SCHEMA_RECHECK_SECONDS", "5"))
 
 app = FastAPI(
     title="Invoice Service",
@@ -22,15 +46,82 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Initialize database on startup
+
+class Readiness:
+    """Startup progress and schema state behind /ready.
+
+    A database outage does not make the pod unready, since that would take
+    every pod out of the load balancer at once.
+    """
+
+    def __init__(self, recheck_seconds: float = READY_SCHEMA_RECHECK_SECONDS):
+        self.recheck_seconds = recheck_seconds
+        self.started = False
+        self.schema_ok = DB_STARTUP_MODE != "check"
+        self.reason = "schema not checked"
+        self._checked_at: Optional[float] = None
+
+    def check_schema(self) -> None:
+        self._checked_at = time.monotonic()
+        try:
+            self.schema_ok, self.reason = schema_status()
+        except Exception as e:
+            self.schema_ok, self.reason = False, f"schema check failed: {e}"
+
+    def status(self) -> Tuple[bool, str]:
+        if not self.started:
+            return False, "starting"
+        if not self.schema_ok and (
+            self._checked_at is None or time.monotonic() - self._checked_at >= self.recheck_seconds
+        ):
+            self.check_schema()
+        return self.schema_ok, self.reason
+
+
+readiness = Readiness()
+# Publishes invoice_events written by the repositories; always on the sync primary engine
+outbox_relay: Optional[OutboxRelay] = None
+
+
 @app.on_event("startup")
 async def startup_event():
-    initialize_database()
+    global outbox_relay
+    if DB_STARTUP_MODE == "migrate":
+        with startup_profile.phase("migrate"):
+            initialize_database()
+    elif DB_STARTUP_MODE == "check":
+        with startup_profile.phase("schema_check"):
+            readiness.check_schema()
+    # Open the shared gRPC channel registry once per process
+    with startup_profile.phase("grpc_channels"):
+        if ASYNC_MODE:
+            # aio channels must be created inside the running event loop
+            get_async_registry()
+        else:
+            get_registry()
+    # Sync routes run on this threadpool; the enrichment pool is sized from the same number
+    anyio.to_thread.current_default_thread_limiter().total_tokens = REQUEST_THREADS
+    if OUTBOX_RELAY_ENABLED:
+        outbox_relay = OutboxRelay(SessionLocal, sink_from_env())
+        outbox_relay.start()
+    readiness.started = True
+    startup_profile.log()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if outbox_relay is not None:
+        outbox_relay.stop()
+    close_registry()
+    await close_async_registry()
+    await dispose_async_engine()
 
 # Include routers
 app.include_router(router)
+app.include_router(admin_router)
 
 # Prometheus metrics (cluster-internal scraping; do NOT expose via Kong Ingress)
 Instrumentator().instrument(app).expose(app, endpoint="/metrics", include_in_schema=False)
@@ -38,5 +129,16 @@ Instrumentator().instrument(app).expose(app, endpoint="/metrics", include_in_sch
 
 @app.get("/health")
 def health_check():
+    """Liveness: the process is up; touches no dependencies"""
     return {"status": "healthy"}
 
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: startup finished and the schema is at a revision this build can serve"""
+    ready, reason = readiness.status()
+    body = {"status": "ready" if ready else "not ready", "reason": reason}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+startup_profile.record("import", time.perf_counter() - IMPORT_STARTED)
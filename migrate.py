@@ -0,0 +1,46 @@
+"""Database migration entry point, run as a Kubernetes Job or init container before the service rolls out.
+
+    python migrate.py           create the database if needed and upgrade it to the Alembic head
+    python migrate.py --check   exit with 1 unless the schema is at a revision this build can serve
+    python migrate.py --rebuild-aggregates
+                                recompute invoice_aggregates from the invoices, once the rollout is complete
+"""
+
+import argparse
+import logging
+import sys
+
+import config
+from observability import configure_logging
+from repository.invoice_repo import InvoiceRepository
+
+logger = logging.getLogger("migrate")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or check invoice-service database migrations")
+    parser.add_argument("--check", action="store_true", help="only compare the schema revision with the head")
+    parser.add_argument(
+        "--rebuild-aggregates",
+        action="store_true",
+        help="recompute invoice_aggregates; run after every pod serves this build",
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.rebuild_aggregates:
+        with config.SessionLocal() as db:
+            rows = InvoiceRepository(db).rebuild_aggregates()
+        logger.info("Rebuilt invoice_aggregates: %d rows", rows)
+        return 0
+
+    if args.check:
+        ok, reason = config.schema_status()
+        (logger.info if ok else logger.error)(reason)
+        return 0 if ok else 1
+    config.initialize_database()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
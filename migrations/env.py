@@ -19,7 +19,8 @@ from models.database import Base
 
 config = context.config
 
-if config.config_file_name is not None:
+# config.py's run_migrations turns this off so an in-process upgrade keeps the app's logging
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
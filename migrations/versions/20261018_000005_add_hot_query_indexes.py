@@ -0,0 +1,56 @@
+"""add indexes for per-user hot queries
+
+Revision ID: 20261018_000005
+Revises: a25747705bae
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000005"
+down_revision = "a25747705bae"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so run it
+    # in autocommit mode; IF NOT EXISTS makes a retry after a partial run safe.
+    with op.get_context().autocommit_block():
+        # Serves get_all/get_list_rows (user filter + (issue_date, id) keyset) and the
+        # user-scoped get_by_id; its leading column also covers plain user_id lookups.
+        op.create_index(
+            "ix_invoices_user_id_issue_date_id",
+            "invoices",
+            ["user_id", "issue_date", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Serves loading invoice.lines and the ON DELETE path of invoices
+        op.create_index(
+            "ix_invoice_lines_invoice_id",
+            "invoice_lines",
+            ["invoice_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_invoice_lines_invoice_id",
+            table_name="invoice_lines",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_invoices_user_id_issue_date_id",
+            table_name="invoices",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
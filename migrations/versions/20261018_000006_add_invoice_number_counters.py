@@ -0,0 +1,32 @@
+"""add per-company invoice number counters
+
+Revision ID: 20261018_000006
+Revises: 20261018_000005
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000006"
+down_revision = "20261018_000005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "invoice_number_counters",
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("last_value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("company_id", "year"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("invoice_number_counters")
@@ -0,0 +1,48 @@
+"""add per-user invoice aggregates
+
+Revision ID: 20261018_000007
+Revises: 20261018_000006
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000007"
+down_revision = "20261018_000006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "invoice_aggregates",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM("ISSUED", "PAID", "CANCELLED", name="invoicestatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("partner_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("invoice_count", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "status", "month", "partner_id"),
+    )
+    # Backfill from existing invoices; the repository keeps it current from here on
+    op.execute(
+        """
+        INSERT INTO invoice_aggregates (user_id, status, month, partner_id, invoice_count, total)
+        SELECT user_id, status, date_trunc('month', issue_date)::date, partner_id, count(*), coalesce(sum(total), 0)
+        FROM invoices
+        GROUP BY user_id, status, date_trunc('month', issue_date)::date, partner_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("invoice_aggregates")
@@ -0,0 +1,34 @@
+"""add price snapshots to invoice lines
+
+Revision ID: 20261018_000008
+Revises: 20261018_000007
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000008"
+down_revision = "20261018_000007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable: existing lines keep being priced from product-service on read
+    op.add_column("invoice_lines", sa.Column("product_name", sa.String(), nullable=True))
+    op.add_column("invoice_lines", sa.Column("unit_price", sa.Numeric(12, 2), nullable=True))
+    op.add_column("invoice_lines", sa.Column("vat_rate", sa.Numeric(5, 2), nullable=True))
+    op.add_column("invoice_lines", sa.Column("net", sa.Numeric(12, 2), nullable=True))
+    op.add_column("invoice_lines", sa.Column("gross", sa.Numeric(12, 2), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("invoice_lines", "gross")
+    op.drop_column("invoice_lines", "net")
+    op.drop_column("invoice_lines", "vat_rate")
+    op.drop_column("invoice_lines", "unit_price")
+    op.drop_column("invoice_lines", "product_name")
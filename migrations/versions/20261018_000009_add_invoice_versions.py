@@ -0,0 +1,30 @@
+"""add version and updated_at to invoices
+
+Revision ID: 20261018_000009
+Revises: 20261018_000008
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000009"
+down_revision = "20261018_000008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Server defaults fill existing rows; new rows get their values from the application
+    op.add_column("invoices", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column(
+        "invoices", sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now())
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("invoices", "updated_at")
+    op.drop_column("invoices", "version")
@@ -0,0 +1,46 @@
+"""add invoice_events outbox table
+
+Revision ID: 20261018_000010
+Revises: 20261018_000009
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000010"
+down_revision = "20261018_000009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "invoice_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("invoice_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("type", postgresql.ENUM("CREATED", "UPDATED", "DELETED", name="invoiceeventtype"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("published_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_invoice_events_user_id_id", "invoice_events", ["user_id", "id"])
+    op.create_index(
+        "ix_invoice_events_unpublished",
+        "invoice_events",
+        ["id"],
+        postgresql_where=sa.text("published_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoice_events_unpublished", table_name="invoice_events")
+    op.drop_index("ix_invoice_events_user_id_id", table_name="invoice_events")
+    op.drop_table("invoice_events")
+    postgresql.ENUM(name="invoiceeventtype").drop(op.get_bind(), checkfirst=True)
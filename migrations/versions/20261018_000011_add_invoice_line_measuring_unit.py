@@ -0,0 +1,26 @@
+"""add measuring unit snapshot to invoice lines
+
+Revision ID: 20261018_000011
+Revises: 20261018_000010
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000011"
+down_revision = "20261018_000010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable: lines priced before this revision answer product.measuringUnit with null
+    op.add_column("invoice_lines", sa.Column("measuring_unit", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("invoice_lines", "measuring_unit")
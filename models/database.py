@@ -1,19 +1,58 @@
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Enum, Integer, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import JSON, BigInteger, Column, String, Numeric, Date, DateTime, ForeignKey, Enum, Integer, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.sql.functions import FunctionElement
 
 Base = declarative_base()
 
 
+@compiles(UUID, "sqlite")
+def compile_uuid_for_sqlite(type_, compiler, **kw):
+    # Lets the Postgres models run on SQLite for the repository tests and benchmarks
+    return "CHAR(32)"
+
+
+class utc_now(FunctionElement):
+    """Naive UTC time read from the database clock, optionally seconds_ago in the past.
+
+    Used where timestamps written by different pods are compared, so that clock
+    skew between pods cannot reorder them.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, seconds_ago: float = 0):
+        super().__init__(float(seconds_ago))
+
+
+@compiles(utc_now)
+def _utc_now(element, compiler, **kw):
+    # clock_timestamp(), unlike now(), advances within a transaction
+    return f"timezone('utc', clock_timestamp()) - make_interval(secs => {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(utc_now, "sqlite")
+def _utc_now_sqlite(element, compiler, **kw):
+    seconds = compiler.process(element.clauses, **kw)
+    return f"strftime('%Y-%m-%d %H:%M:%f', julianday('now') - ({seconds}) / 86400.0)"
+
+
 class InvoiceStatus(str, PyEnum):
     ISSUED = "ISSUED"
     PAID = "PAID"
     CANCELLED = "CANCELLED"
 
 
+class InvoiceEventType(str, PyEnum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
 class Invoice(Base):
     __tablename__ = "invoices"
 
@@ -30,9 +69,16 @@ class Invoice(Base):
     company_name = Column(String, nullable=True)  # Snapshot for list display
     partner_name = Column(String, nullable=True)  # Snapshot for list display
     total = Column(Numeric(10, 2), nullable=True)  # Snapshot for list display
+    # Bumped by the repository on every write; ETags are derived from it
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     lines = relationship("InvoiceLine", back_populates="invoice", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_invoices_user_id_issue_date_id", "user_id", "issue_date", "id"),
+    )
+
 
 class InvoiceLine(Base):
     __tablename__ = "invoice_lines"
@@ -41,6 +87,68 @@ class InvoiceLine(Base):
     invoice_id = Column(UUID(as_uuid=True), ForeignKey("invoices.id"), nullable=False)
     product_id = Column(UUID(as_uuid=True), nullable=False)
     amount = Column(Integer, nullable=False)
+    # Snapshots taken at write time; NULL for lines written before they existed
+    product_name = Column(String, nullable=True)
+    measuring_unit = Column(String, nullable=True)
+    unit_price = Column(Numeric(12, 2), nullable=True)
+    vat_rate = Column(Numeric(5, 2), nullable=True)
+    net = Column(Numeric(12, 2), nullable=True)
+    gross = Column(Numeric(12, 2), nullable=True)
 
     invoice = relationship("Invoice", back_populates="lines")
 
+    __table_args__ = (
+        Index("ix_invoice_lines_invoice_id", "invoice_id"),
+    )
+
+
+
+class InvoiceNumberCounter(Base):
+    """Last invoice sequence number handed out per company and year"""
+    __tablename__ = "invoice_number_counters"
+
+    company_id = Column(UUID(as_uuid=True), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False)
+
+
+class InvoiceAggregate(Base):
+    """Per-user invoice count and total by status, issue month and partner.
+
+    Maintained incrementally by InvoiceRepository in the same transaction as the
+    invoice write, so summaries never scan the invoices table.
+    """
+    __tablename__ = "invoice_aggregates"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    status = Column(Enum(InvoiceStatus), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the issue month
+    partner_id = Column(UUID(as_uuid=True), primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class InvoiceEvent(Base):
+    """Outbox row describing one invoice change, written in the same transaction as the change.
+
+    The outbox relay publishes unpublished rows to the configured sink, and
+    GET /invoices/changes pages through them by id.
+    """
+    __tablename__ = "invoice_events"
+
+    # SQLite only autoincrements INTEGER primary keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    invoice_id = Column(UUID(as_uuid=True), nullable=False)
+    type = Column(Enum(InvoiceEventType), nullable=False)
+    version = Column(Integer, nullable=True)  # invoice version after the change; NULL for deletes
+    payload = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    # Database clock: the change feed's settle window compares it with the reader's database time
+    occurred_at = Column(DateTime, nullable=False, default=utc_now())
+    published_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_invoice_events_user_id_id", "user_id", "id"),
+        # Keeps the relay's scan for unpublished events small however long the history grows
+        Index("ix_invoice_events_unpublished", "id", postgresql_where=published_at.is_(None)),
+    )
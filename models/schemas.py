@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class InvoiceStatus(str, Enum):
@@ -26,12 +26,24 @@ class InvoiceLineResponse(BaseModel):
     invoice_id: UUID
     product_id: UUID
     amount: int
-    product: Optional[Dict[str, Any]] = None  # gRPC product data
+    product_name: Optional[str] = None
+    unit_price: Optional[float] = None  # price snapshot taken when the line was written
+    vat_rate: Optional[float] = None
+    net: Optional[float] = None
+    gross: Optional[float] = None
+    product: Optional[Dict[str, Any]] = None  # live gRPC product data, or the snapshotted fields of priced lines
 
     class Config:
         from_attributes = True
 
 
+class VatBreakdownItem(BaseModel):
+    vat_rate: float
+    net: float
+    vat: float
+    gross: float
+
+
 # Invoice Schemas
 class InvoiceBase(BaseModel):
     company_id: UUID
@@ -45,7 +57,7 @@ class InvoiceBase(BaseModel):
 class InvoiceCreate(BaseModel):
     company_id: UUID
     partner_id: UUID
-    invoice_number: str
+    invoice_number: Optional[str] = None  # allocated per company and year when omitted
     issue_date: datetime
     service_date: datetime
     due_date: datetime
@@ -53,6 +65,24 @@ class InvoiceCreate(BaseModel):
     lines: List[InvoiceLineCreate]
 
 
+class InvoiceBulkCreate(BaseModel):
+    invoices: List[InvoiceCreate] = Field(..., min_length=1, max_length=5000)
+
+
+class InvoiceBulkItemResult(BaseModel):
+    index: int  # position in the request's invoices list
+    success: bool
+    invoice_id: Optional[UUID] = None
+    invoice_number: Optional[str] = None
+    error: Optional[str] = None
+
+
+class InvoiceBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[InvoiceBulkItemResult]
+
+
 class InvoiceUpdate(BaseModel):
     company_id: Optional[UUID] = None
     partner_id: Optional[UUID] = None
@@ -64,6 +94,15 @@ class InvoiceUpdate(BaseModel):
     lines: Optional[List[InvoiceLineCreate]] = None
 
 
+class InvoiceLinePatch(InvoiceLineBase):
+    id: Optional[UUID] = None  # stored line to change; omit to add a line
+
+
+class InvoicePatch(InvoiceUpdate):
+    """Only the fields sent are changed; `lines`, when sent, is the complete new set of lines"""
+    lines: Optional[List[InvoiceLinePatch]] = None
+
+
 class InvoiceResponse(BaseModel):
     id: UUID
     user_id: UUID
@@ -75,7 +114,12 @@ class InvoiceResponse(BaseModel):
     due_date: datetime
     notes: Optional[str]
     status: InvoiceStatus
+    version: Optional[int] = None
     lines: List[InvoiceLineResponse]
+    net_total: Optional[float] = None
+    vat_total: Optional[float] = None
+    total: Optional[float] = None
+    vat_breakdown: List[VatBreakdownItem] = []
     company: Optional[Dict[str, Any]] = None  # gRPC company data
     partner: Optional[Dict[str, Any]] = None  # gRPC partner data
 
@@ -97,11 +141,92 @@ class InvoiceListResponse(BaseModel):
     company_name: Optional[str] = None
     partner_name: Optional[str] = None
     total: Optional[float] = None
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class InvoiceListFilters(BaseModel):
+    status: Optional[InvoiceStatus] = None
+    partner_id: Optional[UUID] = None
+    company_id: Optional[UUID] = None
+    issue_date_from: Optional[datetime] = None  # inclusive
+    issue_date_to: Optional[datetime] = None  # exclusive
+    due_date_from: Optional[datetime] = None  # inclusive
+    due_date_to: Optional[datetime] = None  # exclusive
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 class StatusUpdate(BaseModel):
     status: InvoiceStatus
 
+
+class InvoiceChangeType(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class InvoiceChange(BaseModel):
+    id: int  # pass the last id back as ?since= to resume the feed
+    invoice_id: UUID
+    type: InvoiceChangeType
+    version: Optional[int] = None
+    occurred_at: datetime
+    payload: Optional[Dict[str, Any]] = None  # invoice fields after the change; None for deletes
+
+    class Config:
+        from_attributes = True
+
+
+class InvoiceChangesResponse(BaseModel):
+    changes: List[InvoiceChange]
+    next_since: int  # equals since when there is nothing new yet
+
+
+class SummaryDimension(str, Enum):
+    STATUS = "status"
+    MONTH = "month"
+    PARTNER = "partner"
+
+
+class InvoiceSummaryRow(BaseModel):
+    status: Optional[InvoiceStatus] = None
+    month: Optional[date] = None  # first day of the issue month
+    partner_id: Optional[UUID] = None
+    invoice_count: int
+    total: float
+
+
+class InvoiceSummaryResponse(BaseModel):
+    group_by: List[SummaryDimension]
+    invoice_count: int
+    total: float
+    groups: List[InvoiceSummaryRow]
+
+
+class CacheEntity(str, Enum):
+    COMPANY = "company"
+    PARTNER = "partner"
+    PRODUCT = "product"
+
+
+class CacheInvalidateRequest(BaseModel):
+    entity: CacheEntity
+    ids: Optional[List[str]] = None  # None evicts every cached record of the entity
+
+
+class CacheInvalidateResponse(BaseModel):
+    entity: CacheEntity
+    evicted: int  # records evicted on this pod only
+    pod: str
@@ -0,0 +1,253 @@
+"""Logging, per-stage Prometheus metrics and optional OpenTelemetry spans.
+
+Spans are emitted when the opentelemetry API is installed; without an SDK
+configured (e.g. via opentelemetry-instrument and OTEL_* variables) they are
+no-ops, and without the package they are skipped entirely.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+try:
+    from opentelemetry import trace
+except ImportError:  # optional dependency
+    trace = None
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | text
+TRACING_ENABLED = trace is not None and os.getenv("OTEL_TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Sub-millisecond cache hits up to multi-second timeouts
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REPOSITORY_SECONDS = Histogram(
+    "invoice_repository_seconds", "Time spent in invoice repository methods", ["method"], buckets=STAGE_BUCKETS
+)
+REPOSITORY_ERRORS = Counter("invoice_repository_errors_total", "Repository calls that raised", ["method"])
+GRPC_CLIENT_SECONDS = Histogram(
+    "invoice_grpc_client_seconds",
+    "gRPC client calls including retries, by target, RPC and final status",
+    ["target", "rpc", "status"],
+    buckets=STAGE_BUCKETS,
+)
+STARTUP_SECONDS = Gauge("invoice_startup_seconds", "Duration of each startup phase of this process", ["phase"])
+RESPONSE_BUILD_SECONDS = Histogram(
+    "invoice_response_build_seconds", "Time spent building API responses", ["response"], buckets=STAGE_BUCKETS
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "invoice_db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting, pre-ping and connecting",
+    ["pool"],
+    buckets=STAGE_BUCKETS,
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "invoice_db_pool_checkout_timeouts_total", "Checkouts that gave up after the pool timeout", ["pool"]
+)
+POOL_CONNECTIONS = Gauge("invoice_db_pool_connections", "Pooled connections by state", ["pool", "state"])
+POOL_UTILIZATION = Gauge(
+    "invoice_db_pool_utilization", "Checked-out connections as a share of pool_size + max_overflow", ["pool"]
+)
+
+_tracer = trace.get_tracer("invoice-service") if TRACING_ENABLED else None
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Attributes every LogRecord has; anything else was passed through extra= and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the message, level, logger and any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+def span(name: str, **attributes: Any):
+    """Current-context span, or a no-op context manager when tracing is off"""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+@contextmanager
+def observe(histogram: Histogram, span_name: str, **labels: str) -> Iterator[None]:
+    """Time a block into histogram and wrap it in a span"""
+    started = time.perf_counter()
+    try:
+        with span(span_name, **labels):
+            yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
+
+
+class StartupProfile:
+    """Durations of the startup phases, exported as invoice_startup_seconds and logged once started"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+        STARTUP_SECONDS.labels(phase).set(seconds)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def log(self) -> None:
+        total = sum(self.phases.values())
+        phases = {name: round(seconds, 4) for name, seconds in self.phases.items()}
+        logger.info("Startup completed in %.3fs", total, extra={"startup_phases": phases})
+
+
+startup_profile = StartupProfile()
+
+
+def timed_response(response: str) -> Callable[[F], F]:
+    """Decorator recording how long building a response took"""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with observe(RESPONSE_BUILD_SECONDS, f"build_response.{response}", response=response):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _timed_method(fn: Callable, method: str) -> Callable:
+    histogram = REPOSITORY_SECONDS.labels(method)
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with span(f"repository.{method}"):
+                    return await fn(*args, **kwargs)
+            except Exception:
+                REPOSITORY_ERRORS.labels(method).inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span(f"repository.{method}"):
+                return fn(*args, **kwargs)
+        except Exception:
+            REPOSITORY_ERRORS.labels(method).inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def instrument_repository(cls: type) -> type:
+    """Class decorator timing every public repository method.
+
+    Generators are left alone: their cost is spread over the consumer's
+    iteration and is covered by the request metrics.
+    """
+    for name, fn in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(fn):
+            continue
+        if inspect.isgeneratorfunction(fn) or inspect.isasyncgenfunction(fn):
+            continue
+        setattr(cls, name, _timed_method(fn, name))
+    return cls
+
+
+def rpc_status(error: Optional[BaseException]) -> str:
+    """Status label for a finished gRPC call"""
+    if error is None:
+        return "OK"
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            return code().name
+        except Exception:
+            pass
+    return type(error).__name__
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool exporting checkout latency, timeouts and utilization under pool_name"""
+
+    pool_name = "primary"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Re-pointed at the new pool when the engine is disposed and recreates it
+        POOL_CONNECTIONS.labels(self.pool_name, "in_use").set_function(self.checkedout)
+        POOL_CONNECTIONS.labels(self.pool_name, "idle").set_function(self.checkedin)
+        POOL_UTILIZATION.labels(self.pool_name).set_function(self.utilization)
+
+    def utilization(self) -> float:
+        capacity = self.size() + max(self._max_overflow, 0)
+        return self.checkedout() / capacity if capacity else 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(self.pool_name).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.labels(self.pool_name).observe(time.perf_counter() - started)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Pool for create_async_engine"""
+
+
+def instrumented_pool(base: type, pool_name: str) -> type:
+    """Subclass of an instrumented pool class reporting as pool_name (kept across engine.dispose())"""
+    return type(f"{base.__name__}_{pool_name}", (base,), {"pool_name": pool_name})
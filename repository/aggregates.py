@@ -0,0 +1,155 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import Date, Executable, Select, delete, func, insert, inspect, select, text, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from models.database import Invoice, InvoiceAggregate, InvoiceStatus
+from models.schemas import SummaryDimension
+
+AggregateKey = Tuple[UUID, InvoiceStatus, date, UUID]
+Delta = Tuple[AggregateKey, int, Decimal]
+
+_TRACKED = ("user_id", "status", "issue_date", "partner_id", "total")
+
+
+def _uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def month_of(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def delta_for(user_id, status, issue_date, partner_id, total, sign: int) -> Delta:
+    key = (_uuid(user_id), InvoiceStatus(status), month_of(issue_date), _uuid(partner_id))
+    return key, sign, sign * Decimal(total or 0)
+
+
+def invoice_delta(invoice: Invoice, sign: int) -> Delta:
+    return delta_for(invoice.user_id, invoice.status, invoice.issue_date, invoice.partner_id, invoice.total, sign)
+
+
+def update_deltas(invoice: Invoice) -> List[Delta]:
+    """-old/+new deltas for a pending (unflushed) update, read from attribute history.
+
+    The old values are only current if the invoice was read with its row locked;
+    otherwise two concurrent updates both subtract the same old bucket.
+    """
+    state = inspect(invoice)
+    previous = {}
+    for name in _TRACKED:
+        history = state.attrs[name].history
+        previous[name] = history.deleted[0] if history.deleted else getattr(invoice, name)
+    return [
+        delta_for(*(previous[name] for name in _TRACKED), sign=-1),
+        invoice_delta(invoice, +1),
+    ]
+
+
+def merge_deltas(deltas: Iterable[Delta]) -> Dict[AggregateKey, Tuple[int, Decimal]]:
+    merged: Dict[AggregateKey, Tuple[int, Decimal]] = {}
+    for key, count, total in deltas:
+        old_count, old_total = merged.get(key, (0, Decimal(0)))
+        merged[key] = (old_count + count, old_total + total)
+    return {key: value for key, value in merged.items() if value != (0, Decimal(0))}
+
+
+def build_upsert(dialect_name: str, deltas: Iterable[Delta]) -> Optional[Tuple[object, List[dict]]]:
+    """Upsert statement and executemany rows applying deltas; None when nothing changes.
+
+    Rows are sorted by key so concurrent transactions lock aggregate rows in the
+    same order and cannot deadlock each other.
+    """
+    merged = merge_deltas(deltas)
+    if not merged:
+        return None
+    rows = [
+        {
+            "user_id": user_id,
+            "status": status,
+            "month": month,
+            "partner_id": partner_id,
+            "invoice_count": count,
+            "total": total,
+        }
+        for (user_id, status, month, partner_id), (count, total) in sorted(merged.items(), key=lambda kv: str(kv[0]))
+    ]
+    insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    stmt = insert(InvoiceAggregate)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            InvoiceAggregate.user_id,
+            InvoiceAggregate.status,
+            InvoiceAggregate.month,
+            InvoiceAggregate.partner_id,
+        ],
+        set_={
+            "invoice_count": InvoiceAggregate.invoice_count + stmt.excluded.invoice_count,
+            "total": InvoiceAggregate.total + stmt.excluded.total,
+        },
+    )
+    return stmt, rows
+
+
+def build_rebuild_statements(dialect_name: str) -> List[Executable]:
+    """Recompute every aggregate row from the invoices table, in one transaction.
+
+    Repairs drift from writers that did not maintain the aggregates, e.g. pods of
+    the previous release still serving while the backfill migration ran. On
+    PostgreSQL invoice writes wait on a SHARE lock until the rebuild commits.
+    """
+    if dialect_name == "sqlite":
+        month = type_coerce(func.date(Invoice.issue_date, "start of month"), Date)
+    else:
+        month = func.date_trunc("month", Invoice.issue_date).cast(Date)
+    totals = (
+        select(
+            Invoice.user_id,
+            Invoice.status,
+            month,
+            Invoice.partner_id,
+            func.count(),
+            func.coalesce(func.sum(Invoice.total), 0),
+        )
+        .group_by(Invoice.user_id, Invoice.status, month, Invoice.partner_id)
+    )
+    columns = ["user_id", "status", "month", "partner_id", "invoice_count", "total"]
+    statements = [delete(InvoiceAggregate), insert(InvoiceAggregate).from_select(columns, totals)]
+    if dialect_name != "sqlite":
+        statements.insert(0, text("LOCK TABLE invoices IN SHARE MODE"))
+    return statements
+
+
+SUMMARY_COLUMNS = {
+    SummaryDimension.STATUS: InvoiceAggregate.status,
+    SummaryDimension.MONTH: InvoiceAggregate.month,
+    SummaryDimension.PARTNER: InvoiceAggregate.partner_id,
+}
+
+
+def build_summary_query(
+    user_id: str,
+    group_by: List[SummaryDimension],
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+) -> Select:
+    """Sum aggregate rows of one user over the requested dimensions.
+
+    month_from is inclusive and month_to exclusive, both compared against the
+    first day of the issue month.
+    """
+    dimensions = [SUMMARY_COLUMNS[dimension] for dimension in group_by]
+    invoice_count = func.sum(InvoiceAggregate.invoice_count)
+    stmt = (
+        select(*dimensions, invoice_count.label("invoice_count"), func.sum(InvoiceAggregate.total).label("total"))
+        .where(InvoiceAggregate.user_id == user_id)
+        .where(InvoiceAggregate.invoice_count > 0)
+    )
+    if month_from is not None:
+        stmt = stmt.where(InvoiceAggregate.month >= month_of(month_from))
+    if month_to is not None:
+        stmt = stmt.where(InvoiceAggregate.month < month_of(month_to))
+    if dimensions:
+        stmt = stmt.group_by(*dimensions).order_by(*dimensions)
+    return stmt
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+from sqlalchemy import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import InvoiceEvent
+from observability import instrument_repository
+from repository.event_repo import changes_query
+
+
+@instrument_repository
+class AsyncEventRepository:
+    """Change-feed reads for the async app; the relay always runs on the sync engine"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_changes(
+        self, user_id: UUID, since: int, limit: int, settled_before: ColumnElement[datetime]
+    ) -> List[InvoiceEvent]:
+        result = await self.db.execute(changes_query(user_id, since, limit, settled_before))
+        return list(result.scalars().all())
@@ -0,0 +1,148 @@
+from datetime import date
+from typing import AsyncIterator, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import Row, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import Invoice, InvoiceEvent, InvoiceEventType, InvoiceLine
+from models.schemas import InvoiceListFilters, SortOrder, SummaryDimension
+from observability import instrument_repository
+from repository.aggregates import Delta, build_summary_query, build_upsert, delta_for, invoice_delta, update_deltas
+from repository.events import deleted_event, invoice_event
+from repository.invoice_numbers import build_allocate_statement, numbers_for_block
+from repository.invoice_repo import invoice_query, invoice_row, line_row, locked_invoice_query, touch, version_query
+from repository.line_diff import LineDiff, apply_line_diff, line_diff_statements
+from repository.pagination import INVOICE_LIST_COLUMNS, build_page_query, split_page
+
+
+@instrument_repository
+class AsyncInvoiceRepository:
+    """asyncpg-backed counterpart of InvoiceRepository.
+
+    Lazy loads are not allowed on an AsyncSession, so single-invoice reads load
+    lines eagerly and writes rely on expire_on_commit=False instead of refreshes.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, invoice: Invoice) -> Invoice:
+        self.db.add(invoice)
+        # Flush first so the event carries the generated id and version
+        await self.db.flush()
+        await self._apply_aggregates([invoice_delta(invoice, +1)])
+        await self._write_events([invoice_event(invoice, InvoiceEventType.CREATED)])
+        await self.db.commit()
+        return invoice
+
+    async def create_many(self, invoices: List[Invoice]) -> None:
+        await self.db.execute(insert(Invoice), [invoice_row(invoice) for invoice in invoices])
+        lines = [line_row(line) for invoice in invoices for line in invoice.lines]
+        if lines:
+            await self.db.execute(insert(InvoiceLine), lines)
+        await self._apply_aggregates(invoice_delta(invoice, +1) for invoice in invoices)
+        await self._write_events(invoice_event(invoice, InvoiceEventType.CREATED) for invoice in invoices)
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+    async def get_by_id(self, invoice_id: UUID, user_id: str = None, for_update: bool = False) -> Optional[Invoice]:
+        result = await self.db.execute(invoice_query(invoice_id, user_id, for_update))
+        return result.scalars().first()
+
+    async def get_for_update(self, invoice_id: UUID, user_id: str = None) -> Optional[Invoice]:
+        result = await self.db.execute(locked_invoice_query(invoice_id, user_id))
+        return result.scalar_one_or_none()
+
+    async def get_version(self, invoice_id: UUID, user_id: str = None) -> Optional[int]:
+        return (await self.db.execute(version_query(invoice_id, user_id))).scalar()
+
+    async def get_all(self, user_id: str = None) -> List[Invoice]:
+        stmt = select(Invoice)
+        if user_id:
+            stmt = stmt.where(Invoice.user_id == user_id)
+        result = await self.db.execute(stmt.order_by(Invoice.issue_date.desc()))
+        return list(result.scalars().all())
+
+    async def get_list_rows(
+        self,
+        user_id: str,
+        filters: Optional[InvoiceListFilters] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        order: SortOrder = SortOrder.DESC,
+    ) -> Tuple[List[Row], Optional[str]]:
+        stmt = build_page_query(user_id, filters, limit, cursor, order, stmt=select(*INVOICE_LIST_COLUMNS))
+        result = await self.db.execute(stmt)
+        return split_page(list(result.all()), limit)
+
+    async def iter_list_batches(
+        self,
+        user_id: str,
+        filters: Optional[InvoiceListFilters] = None,
+        order: SortOrder = SortOrder.DESC,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        stmt = build_page_query(user_id, filters, order=order, stmt=select(*INVOICE_LIST_COLUMNS))
+        result = await self.db.stream(stmt, execution_options={"yield_per": batch_size})
+        async for partition in result.partitions():
+            yield partition
+
+    async def update(self, invoice: Invoice, line_diff: Optional[LineDiff] = None) -> Invoice:
+        touch(invoice)
+        await self._apply_aggregates(update_deltas(invoice))
+        if line_diff is not None:
+            for stmt, rows in line_diff_statements(line_diff):
+                await self.db.execute(stmt, rows)
+            apply_line_diff(invoice, line_diff)
+        await self._write_events([invoice_event(invoice, InvoiceEventType.UPDATED)])
+        await self.db.commit()
+        return invoice
+
+    async def delete(self, invoice_id: UUID, user_id: str = None) -> bool:
+        owned = select(Invoice.id).where(Invoice.id == invoice_id)
+        if user_id:
+            owned = owned.where(Invoice.user_id == user_id)
+        await self.db.execute(
+            delete(InvoiceLine).where(InvoiceLine.invoice_id.in_(owned)).execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(
+            delete(Invoice)
+            .where(Invoice.id.in_(owned))
+            .returning(Invoice.id, Invoice.user_id, Invoice.status, Invoice.issue_date, Invoice.partner_id, Invoice.total)
+            .execution_options(synchronize_session=False)
+        )
+        removed = result.all()
+        await self._apply_aggregates(delta_for(*row[1:], sign=-1) for row in removed)
+        await self._write_events(deleted_event(row.user_id, row.id) for row in removed)
+        await self.db.commit()
+        return len(removed) > 0
+
+    async def get_summary(
+        self,
+        user_id: str,
+        group_by: List[SummaryDimension],
+        month_from: Optional[date] = None,
+        month_to: Optional[date] = None,
+    ) -> List[Row]:
+        result = await self.db.execute(build_summary_query(user_id, group_by, month_from, month_to))
+        return list(result.all())
+
+    async def _apply_aggregates(self, deltas: Iterable[Delta]) -> None:
+        upsert = build_upsert(self.db.bind.dialect.name, deltas)
+        if upsert is not None:
+            stmt, rows = upsert
+            await self.db.execute(stmt, rows)
+
+    async def _write_events(self, events: Iterable[dict]) -> None:
+        events = list(events)
+        if events:
+            await self.db.execute(insert(InvoiceEvent), events)
+
+    async def get_next_invoice_number(self, company_id: UUID, year: int) -> str:
+        return (await self.reserve_invoice_numbers(company_id, year, 1))[0]
+
+    async def reserve_invoice_numbers(self, company_id: UUID, year: int, count: int) -> List[str]:
+        stmt = build_allocate_statement(self.db.bind.dialect.name, company_id, year, count)
+        last_value = (await self.db.execute(stmt)).scalar_one()
+        return numbers_for_block(company_id, year, last_value, count)
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import List, Sequence
+from uuid import UUID
+from sqlalchemy import ColumnElement, delete, select, update
+from sqlalchemy.orm import Session
+from models.database import InvoiceEvent, utc_now
+from observability import instrument_repository
+
+
+def changes_query(user_id: UUID, since: int, limit: int, settled_before: ColumnElement[datetime]):
+    """A user's events after the since cursor, excluding ones younger than settled_before.
+
+    Ids are assigned at insert but become visible at commit, so a slow
+    transaction can commit a lower id after a reader has moved past it; the
+    settle window gives in-flight transactions time to commit first.
+    settled_before is a database-clock expression such as utc_now(seconds).
+    """
+    return (
+        select(InvoiceEvent)
+        .where(InvoiceEvent.user_id == user_id, InvoiceEvent.id > since, InvoiceEvent.occurred_at <= settled_before)
+        .order_by(InvoiceEvent.id)
+        .limit(limit)
+    )
+
+
+@instrument_repository
+class EventRepository:
+    """Outbox reads and relay bookkeeping; events themselves are written by InvoiceRepository"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_changes(
+        self, user_id: UUID, since: int, limit: int, settled_before: ColumnElement[datetime]
+    ) -> List[InvoiceEvent]:
+        return list(self.db.execute(changes_query(user_id, since, limit, settled_before)).scalars().all())
+
+    def claim_unpublished(self, limit: int) -> List[InvoiceEvent]:
+        """Oldest unpublished events, row-locked until commit; concurrent relays skip each other's rows"""
+        stmt = (
+            select(InvoiceEvent)
+            .where(InvoiceEvent.published_at.is_(None))
+            .order_by(InvoiceEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(self.db.execute(stmt).scalars().all())
+
+    def mark_published(self, event_ids: Sequence[int]) -> None:
+        self.db.execute(
+            update(InvoiceEvent)
+            .where(InvoiceEvent.id.in_(event_ids))
+            .values(published_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def prune(self, published_before: datetime) -> int:
+        """Delete published events older than the retention window"""
+        result = self.db.execute(
+            delete(InvoiceEvent)
+            .where(InvoiceEvent.published_at.is_not(None), InvoiceEvent.published_at < published_before)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,66 @@
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+from models.database import Invoice, InvoiceEvent, InvoiceEventType
+
+# Invoice fields carried by created/updated events, enough for consumers to avoid a follow-up GET
+EVENT_FIELDS = (
+    "invoice_number",
+    "company_id",
+    "partner_id",
+    "company_name",
+    "partner_name",
+    "issue_date",
+    "service_date",
+    "due_date",
+    "status",
+    "total",
+)
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def invoice_event(invoice: Invoice, event_type: InvoiceEventType) -> dict:
+    """Outbox row for a created or updated invoice"""
+    return {
+        "user_id": invoice.user_id,
+        "invoice_id": invoice.id,
+        "type": event_type,
+        "version": invoice.version,
+        "payload": {field: _json_value(getattr(invoice, field)) for field in EVENT_FIELDS},
+    }
+
+
+def deleted_event(user_id: UUID, invoice_id: UUID) -> dict:
+    return {
+        "user_id": user_id,
+        "invoice_id": invoice_id,
+        "type": InvoiceEventType.DELETED,
+        "version": None,
+        "payload": None,
+    }
+
+
+def event_message(event: InvoiceEvent) -> dict:
+    """JSON-ready form of an event, as published to sinks"""
+    return {
+        "id": event.id,
+        "user_id": str(event.user_id),
+        "invoice_id": str(event.invoice_id),
+        "type": event.type.value,
+        "version": event.version,
+        "occurred_at": event.occurred_at.isoformat(),
+        "payload": event.payload,
+    }
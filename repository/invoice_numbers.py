@@ -0,0 +1,33 @@
+import os
+from typing import List
+from uuid import UUID
+from sqlalchemy.dialects import postgresql, sqlite
+from models.database import InvoiceNumberCounter
+
+# Placeholders: {year}, {seq} and {company} (company UUID); e.g. "{year}/{seq:05d}"
+INVOICE_NUMBER_FORMAT = os.getenv("INVOICE_NUMBER_FORMAT", "INV-{year}-{seq:06d}")
+
+
+def format_invoice_number(company_id: UUID, year: int, seq: int, fmt: str = INVOICE_NUMBER_FORMAT) -> str:
+    return fmt.format(year=year, seq=seq, company=company_id)
+
+
+def build_allocate_statement(dialect_name: str, company_id: UUID, year: int, count: int):
+    """Upsert that bumps the (company, year) counter by count and returns the new last value.
+
+    The conflicting row is locked until the surrounding transaction ends, so
+    concurrent allocations for the same company and year are serialized and a
+    rolled-back invoice insert also rolls back its number (no gaps, no duplicates).
+    """
+    insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    stmt = insert(InvoiceNumberCounter).values(company_id=company_id, year=year, last_value=count)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[InvoiceNumberCounter.company_id, InvoiceNumberCounter.year],
+        set_={"last_value": InvoiceNumberCounter.last_value + count},
+    )
+    return stmt.returning(InvoiceNumberCounter.last_value)
+
+
+def numbers_for_block(company_id: UUID, year: int, last_value: int, count: int) -> List[str]:
+    first = last_value - count + 1
+    return [format_invoice_number(company_id, year, seq) for seq in range(first, last_value + 1)]
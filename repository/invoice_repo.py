@@ -1,24 +1,118 @@
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session
-from models.database import Invoice, InvoiceLine, InvoiceStatus
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.orm import Session, selectinload
+from models.database import Invoice, InvoiceAggregate, InvoiceEvent, InvoiceEventType, InvoiceLine, InvoiceStatus
+from observability import instrument_repository
+from models.schemas import InvoiceListFilters, SortOrder, SummaryDimension
+from repository.aggregates import (
+    Delta,
+    build_rebuild_statements,
+    build_summary_query,
+    build_upsert,
+    delta_for,
+    invoice_delta,
+    update_deltas,
+)
+from repository.events import deleted_event, invoice_event
+from repository.invoice_numbers import build_allocate_statement, numbers_for_block
+from repository.line_diff import LineDiff, apply_line_diff, line_diff_statements, line_row
+from repository.pagination import INVOICE_LIST_COLUMNS, build_page_query, split_page
 
 
+def invoice_row(invoice: Invoice) -> dict:
+    return {column.key: getattr(invoice, column.key) for column in Invoice.__table__.columns}
+
+
+def touch(invoice: Invoice) -> None:
+    """Mark an invoice as changed so cached representations (ETags) go stale.
+
+    The increment is computed in Python, so the invoice must have been read with
+    the row locked (get_by_id(for_update=True) or get_for_update).
+    """
+    invoice.version = (invoice.version or 0) + 1
+    invoice.updated_at = datetime.utcnow()
+
+
+def version_query(invoice_id: UUID, user_id: str = None):
+    stmt = select(Invoice.version).where(Invoice.id == invoice_id)
+    if user_id:
+        stmt = stmt.where(Invoice.user_id == user_id)
+    return stmt
+
+
+def invoice_query(invoice_id: UUID, user_id: str = None, for_update: bool = False):
+    """One invoice with its lines; for_update locks the invoice row until commit"""
+    stmt = select(Invoice).options(selectinload(Invoice.lines)).where(Invoice.id == invoice_id)
+    if user_id:
+        stmt = stmt.where(Invoice.user_id == user_id)
+    return _locked(stmt) if for_update else stmt
+
+
+def locked_invoice_query(invoice_id: UUID, user_id: str = None):
+    stmt = select(Invoice).where(Invoice.id == invoice_id)
+    if user_id:
+        stmt = stmt.where(Invoice.user_id == user_id)
+    return _locked(stmt)
+
+
+def _locked(stmt):
+    # Writers read the version and aggregate buckets they change under the row lock, so
+    # concurrent updates serialize; populate_existing re-reads an object the session already holds
+    return stmt.with_for_update().execution_options(populate_existing=True)
+
+
+@instrument_repository
 class InvoiceRepository:
+    """Invoice persistence.
+
+    Sessions are created with expire_on_commit=False and every column default is
+    generated client-side, so written invoices stay fully loaded after commit and
+    need no refresh round-trips. Single-invoice reads load lines eagerly.
+    Every write also applies its delta to invoice_aggregates and appends an
+    invoice_events outbox row before committing, and updates bump the invoice version.
+    """
+
     def __init__(self, db: Session):
         self.db = db
 
     def create(self, invoice: Invoice) -> Invoice:
         self.db.add(invoice)
+        # Flush first so the event carries the generated id and version
+        self.db.flush()
+        self._apply_aggregates([invoice_delta(invoice, +1)])
+        self._write_events([invoice_event(invoice, InvoiceEventType.CREATED)])
         self.db.commit()
-        self.db.refresh(invoice)
         return invoice
 
-    def get_by_id(self, invoice_id: UUID, user_id: str = None) -> Optional[Invoice]:
-        query = self.db.query(Invoice).filter(Invoice.id == invoice_id)
-        if user_id:
-            query = query.filter(Invoice.user_id == user_id)
-        return query.first()
+    def create_many(self, invoices: List[Invoice]) -> None:
+        """Insert invoices and their lines with one multi-row INSERT per table and commit.
+
+        Invoice and line ids must already be assigned by the caller.
+        """
+        self.db.execute(insert(Invoice), [invoice_row(invoice) for invoice in invoices])
+        lines = [line_row(line) for invoice in invoices for line in invoice.lines]
+        if lines:
+            self.db.execute(insert(InvoiceLine), lines)
+        self._apply_aggregates(invoice_delta(invoice, +1) for invoice in invoices)
+        self._write_events(invoice_event(invoice, InvoiceEventType.CREATED) for invoice in invoices)
+        self.db.commit()
+
+    def rollback(self) -> None:
+        self.db.rollback()
+
+    def get_by_id(self, invoice_id: UUID, user_id: str = None, for_update: bool = False) -> Optional[Invoice]:
+        """Invoice with its lines; pass for_update=True when the result is about to be written"""
+        return self.db.execute(invoice_query(invoice_id, user_id, for_update)).scalars().first()
+
+    def get_for_update(self, invoice_id: UUID, user_id: str = None) -> Optional[Invoice]:
+        """The invoice row without its lines, locked until commit"""
+        return self.db.execute(locked_invoice_query(invoice_id, user_id)).scalar_one_or_none()
+
+    def get_version(self, invoice_id: UUID, user_id: str = None) -> Optional[int]:
+        """Current version of an invoice without loading it or its lines"""
+        return self.db.execute(version_query(invoice_id, user_id)).scalar()
 
     def get_all(self, user_id: str = None) -> List[Invoice]:
         query = self.db.query(Invoice)
@@ -26,23 +120,101 @@ class InvoiceRepository:
             query = query.filter(Invoice.user_id == user_id)
         return query.order_by(Invoice.issue_date.desc()).all()
 
-    def update(self, invoice: Invoice) -> Invoice:
+    def get_list_rows(
+        self,
+        user_id: str,
+        filters: Optional[InvoiceListFilters] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        order: SortOrder = SortOrder.DESC,
+    ) -> Tuple[List[Row], Optional[str]]:
+        """One keyset page of list-column rows and the cursor of the next page"""
+        stmt = build_page_query(user_id, filters, limit, cursor, order, stmt=select(*INVOICE_LIST_COLUMNS))
+        return split_page(list(self.db.execute(stmt).all()), limit)
+
+    def iter_list_batches(
+        self,
+        user_id: str,
+        filters: Optional[InvoiceListFilters] = None,
+        order: SortOrder = SortOrder.DESC,
+        batch_size: int = 1000,
+    ) -> Iterator[Sequence[Row]]:
+        """Stream list columns through a server-side cursor, batch_size rows at a time"""
+        stmt = build_page_query(user_id, filters, order=order, stmt=select(*INVOICE_LIST_COLUMNS))
+        result = self.db.execute(stmt, execution_options={"yield_per": batch_size})
+        yield from result.partitions()
+
+    def update(self, invoice: Invoice, line_diff: Optional[LineDiff] = None) -> Invoice:
+        """Write pending field changes plus, if given, a line diff instead of a full line replacement"""
+        touch(invoice)
+        self._apply_aggregates(update_deltas(invoice))
+        if line_diff is not None:
+            for stmt, rows in line_diff_statements(line_diff):
+                self.db.execute(stmt, rows)
+            apply_line_diff(invoice, line_diff)
+        self._write_events([invoice_event(invoice, InvoiceEventType.UPDATED)])
         self.db.commit()
-        self.db.refresh(invoice)
         return invoice
 
     def delete(self, invoice_id: UUID, user_id: str = None) -> bool:
-        query = self.db.query(Invoice).filter(Invoice.id == invoice_id)
+        # Two set-based statements instead of loading the invoice and its lines
+        # and deleting them row by row through the ORM cascade.
+        owned = select(Invoice.id).where(Invoice.id == invoice_id)
         if user_id:
-            query = query.filter(Invoice.user_id == user_id)
-        invoice = query.first()
-        if invoice:
-            self.db.delete(invoice)
-            self.db.commit()
-            return True
-        return False
-
-    def get_next_invoice_number(self) -> str:
-        count = self.db.query(Invoice).count()
-        return f"INV-{count + 1:06d}"
+            owned = owned.where(Invoice.user_id == user_id)
+        self.db.execute(
+            delete(InvoiceLine).where(InvoiceLine.invoice_id.in_(owned)).execution_options(synchronize_session=False)
+        )
+        removed = self.db.execute(
+            delete(Invoice)
+            .where(Invoice.id.in_(owned))
+            .returning(Invoice.id, Invoice.user_id, Invoice.status, Invoice.issue_date, Invoice.partner_id, Invoice.total)
+            .execution_options(synchronize_session=False)
+        ).all()
+        self._apply_aggregates(delta_for(*row[1:], sign=-1) for row in removed)
+        self._write_events(deleted_event(row.user_id, row.id) for row in removed)
+        self.db.commit()
+        return len(removed) > 0
+
+    def get_summary(
+        self,
+        user_id: str,
+        group_by: List[SummaryDimension],
+        month_from: Optional[date] = None,
+        month_to: Optional[date] = None,
+    ) -> List[Row]:
+        """Invoice counts and totals per group, read from invoice_aggregates"""
+        return list(self.db.execute(build_summary_query(user_id, group_by, month_from, month_to)).all())
+
+    def rebuild_aggregates(self) -> int:
+        """Recompute invoice_aggregates from the invoices; returns the number of aggregate rows"""
+        for stmt in build_rebuild_statements(self.db.get_bind().dialect.name):
+            self.db.execute(stmt)
+        rows = self.db.execute(select(func.count()).select_from(InvoiceAggregate)).scalar()
+        self.db.commit()
+        return rows
+
+    def _apply_aggregates(self, deltas: Iterable[Delta]) -> None:
+        upsert = build_upsert(self.db.get_bind().dialect.name, deltas)
+        if upsert is not None:
+            stmt, rows = upsert
+            self.db.execute(stmt, rows)
+
+    def _write_events(self, events: Iterable[dict]) -> None:
+        """Append outbox rows; they commit or roll back together with the invoice write"""
+        events = list(events)
+        if events:
+            self.db.execute(insert(InvoiceEvent), events)
+
+    def get_next_invoice_number(self, company_id: UUID, year: int) -> str:
+        return self.reserve_invoice_numbers(company_id, year, 1)[0]
+
+    def reserve_invoice_numbers(self, company_id: UUID, year: int, count: int) -> List[str]:
+        """Reserve count consecutive invoice numbers in one round-trip.
+
+        Runs in the caller's transaction; the numbers become final when it commits.
+        """
+        stmt = build_allocate_statement(self.db.get_bind().dialect.name, company_id, year, count)
+        last_value = self.db.execute(stmt).scalar_one()
+        return numbers_for_block(company_id, year, last_value, count)
 
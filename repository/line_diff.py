@@ -0,0 +1,121 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import Executable, delete, insert, update
+from sqlalchemy.orm.attributes import set_committed_value
+from models.database import Invoice, InvoiceLine
+
+
+class UnknownLine(ValueError):
+    pass
+
+
+def line_row(line: InvoiceLine) -> dict:
+    return {column.key: getattr(line, column.key) for column in InvoiceLine.__table__.columns}
+
+
+class LinePair(NamedTuple):
+    existing: Optional[InvoiceLine]  # None for a line to insert
+    requested: object  # anything with product_id and amount, e.g. InvoiceLineCreate
+    reprice: bool = False  # rewrite an otherwise unchanged line to take a price snapshot
+
+    @property
+    def changed(self) -> bool:
+        return (
+            self.reprice
+            or self.existing is None
+            or self.existing.product_id != self.requested.product_id
+            or self.existing.amount != self.requested.amount
+        )
+
+
+class LineDiff(NamedTuple):
+    lines: List[InvoiceLine]  # the invoice's lines afterwards, in request order
+    inserts: List[dict]
+    updates: List[dict]  # complete rows, keyed by the id of the stored line they replace
+    deletes: List[UUID]
+
+    @property
+    def empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deletes)
+
+
+def match_lines(existing: Sequence[InvoiceLine], requested: Sequence) -> Tuple[List[LinePair], List[InvoiceLine]]:
+    """Pair each requested line with the stored line it keeps or changes.
+
+    A requested line with an id takes that stored line. The others take an
+    unpaired stored line of the same product, preferring one with the same
+    amount, so resending an unchanged line list changes nothing. Returns the
+    pairs in request order and the stored lines left over for deletion.
+    """
+    free = {line.id: line for line in existing}
+    paired: Dict[int, InvoiceLine] = {}
+    for index, line in enumerate(requested):
+        line_id = getattr(line, "id", None)
+        if line_id is None:
+            continue
+        if line_id not in free:
+            raise UnknownLine(f"Line {line_id} is not on this invoice or is listed twice")
+        paired[index] = free.pop(line_id)
+    for same_amount in (True, False):
+        for index, line in enumerate(requested):
+            if index in paired or getattr(line, "id", None) is not None:
+                continue
+            match = next(
+                (
+                    stored for stored in free.values()
+                    if stored.product_id == line.product_id and (not same_amount or stored.amount == line.amount)
+                ),
+                None,
+            )
+            if match is not None:
+                paired[index] = free.pop(match.id)
+    return [LinePair(paired.get(index), line) for index, line in enumerate(requested)], list(free.values())
+
+
+def build_line_diff(
+    invoice_id: UUID,
+    pairs: Sequence[LinePair],
+    removed: Sequence[InvoiceLine],
+    build_line: Callable[[object], InvoiceLine],
+) -> LineDiff:
+    """Rows to insert, update and delete; build_line prices a requested line"""
+    lines, inserts, updates = [], [], []
+    for pair in pairs:
+        if not pair.changed:
+            lines.append(pair.existing)
+            continue
+        line = build_line(pair.requested)
+        line.id = pair.existing.id if pair.existing is not None else uuid4()
+        line.invoice_id = invoice_id
+        (inserts if pair.existing is None else updates).append(line_row(line))
+        lines.append(line)
+    return LineDiff(lines, inserts, updates, [line.id for line in removed])
+
+
+def line_diff_statements(diff: LineDiff) -> List[Tuple[Executable, Optional[List[dict]]]]:
+    """At most one DELETE, one UPDATE (executemany by primary key) and one multi-row INSERT"""
+    statements = []
+    if diff.deletes:
+        statements.append((
+            delete(InvoiceLine).where(InvoiceLine.id.in_(diff.deletes)).execution_options(synchronize_session=False),
+            None,
+        ))
+    if diff.updates:
+        statements.append((update(InvoiceLine), diff.updates))
+    if diff.inserts:
+        statements.append((insert(InvoiceLine), diff.inserts))
+    return statements
+
+
+def apply_line_diff(invoice: Invoice, diff: LineDiff) -> None:
+    """Make the loaded invoice show the written lines without marking anything for flush"""
+    stored = {line.id: line for line in invoice.lines}
+    lines = []
+    for line in diff.lines:
+        current = stored.get(line.id)
+        if current is not None and current is not line:
+            for key, value in line_row(line).items():
+                set_committed_value(current, key, value)
+            line = current
+        lines.append(line)
+    set_committed_value(invoice, "lines", lines)
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+from sqlalchemy import Select, select, tuple_
+from models.database import Invoice, InvoiceStatus
+from models.schemas import InvoiceListFilters, SortOrder
+
+# Columns needed for list/export rows; selecting them avoids building ORM objects
+INVOICE_LIST_COLUMNS = (
+    Invoice.id,
+    Invoice.user_id,
+    Invoice.company_id,
+    Invoice.partner_id,
+    Invoice.invoice_number,
+    Invoice.issue_date,
+    Invoice.service_date,
+    Invoice.due_date,
+    Invoice.notes,
+    Invoice.status,
+    Invoice.company_name,
+    Invoice.partner_name,
+    Invoice.total,
+    Invoice.version,
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(issue_date: datetime, invoice_id: UUID) -> str:
+    """Opaque keyset token pointing at the last row of a page"""
+    raw = json.dumps({"d": issue_date.isoformat(), "id": str(invoice_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["d"]), UUID(data["id"])
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def apply_filters(stmt: Select, user_id: Optional[str], filters: Optional[InvoiceListFilters]) -> Select:
+    if user_id:
+        stmt = stmt.where(Invoice.user_id == user_id)
+    if filters is None:
+        return stmt
+    if filters.status is not None:
+        stmt = stmt.where(Invoice.status == InvoiceStatus(filters.status.value))
+    if filters.partner_id is not None:
+        stmt = stmt.where(Invoice.partner_id == filters.partner_id)
+    if filters.company_id is not None:
+        stmt = stmt.where(Invoice.company_id == filters.company_id)
+    if filters.issue_date_from is not None:
+        stmt = stmt.where(Invoice.issue_date >= filters.issue_date_from)
+    if filters.issue_date_to is not None:
+        stmt = stmt.where(Invoice.issue_date < filters.issue_date_to)
+    if filters.due_date_from is not None:
+        stmt = stmt.where(Invoice.due_date >= filters.due_date_from)
+    if filters.due_date_to is not None:
+        stmt = stmt.where(Invoice.due_date < filters.due_date_to)
+    return stmt
+
+
+def build_page_query(
+    user_id: Optional[str],
+    filters: Optional[InvoiceListFilters] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
+    stmt: Optional[Select] = None,
+) -> Select:
+    """Keyset-paginated invoice query ordered by (issue_date, id).
+
+    One extra row beyond limit is selected so callers can tell whether another
+    page exists without a COUNT or OFFSET scan.
+    """
+    stmt = apply_filters(stmt if stmt is not None else select(Invoice), user_id, filters)
+    key = tuple_(Invoice.issue_date, Invoice.id)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        boundary = tuple_(last_date, last_id)
+        stmt = stmt.where(key < boundary if order == SortOrder.DESC else key > boundary)
+    if order == SortOrder.DESC:
+        stmt = stmt.order_by(Invoice.issue_date.desc(), Invoice.id.desc())
+    else:
+        stmt = stmt.order_by(Invoice.issue_date.asc(), Invoice.id.asc())
+    if limit:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def split_page(rows: list, limit: Optional[int]) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row and derive the next cursor from the last row"""
+    if not limit or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.issue_date, last.id)
@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+
+def explain(db: Session, stmt: Executable) -> str:
+    """Return the Postgres EXPLAIN output for a SQLAlchemy statement"""
+    sql = stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    rows = db.connection().exec_driver_sql(f"EXPLAIN {sql}")
+    return "\n".join(row[0] for row in rows)
+
+
+def uses_index(plan: str, index_name: str) -> bool:
+    """True if the plan reads through the given index (index or bitmap index scan)"""
+    return any(
+        scan in line and index_name in line
+        for line in plan.splitlines()
+        for scan in ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+    )
@@ -0,0 +1,235 @@
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import Invoice
+from models.schemas import (
+    InvoiceCreate,
+    InvoiceLineCreate,
+    InvoiceResponse,
+    InvoiceListResponse,
+    InvoiceUpdate,
+    InvoicePatch,
+    InvoiceListFilters,
+    SortOrder,
+    InvoiceBulkItemResult,
+    InvoiceBulkResponse,
+    SummaryDimension,
+    InvoiceSummaryResponse,
+    InvoiceChangesResponse,
+    InvoiceStatus,
+)
+from repository.async_event_repo import AsyncEventRepository
+from repository.async_invoice_repo import AsyncInvoiceRepository
+from client.company_client import AsyncCompanyClient
+from client.partner_client import AsyncPartnerClient
+from client.product_client import AsyncProductClient
+from client.channel_registry import get_async_registry
+from client.cache import CACHE_ENABLED, AsyncCachedCompanyClient, AsyncCachedPartnerClient, AsyncCachedProductClient
+from client.coalescer import COALESCE_ENABLED, AsyncCoalescingCompanyClient, AsyncCoalescingPartnerClient
+from service.enrichment import ENRICHMENT_DEADLINE_SECONDS, ENRICHMENT_DEFAULT_MAX_AGE, async_fan_out
+from service.invoice_service import BULK_CHUNK_SIZE, WRITE_MAX_AGE, InvoiceServiceBase
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncInvoiceService(InvoiceServiceBase):
+    """InvoiceService on asyncpg and grpc.aio, used when ASYNC_MODE is enabled"""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        company_client: Optional[AsyncCompanyClient] = None,
+        partner_client: Optional[AsyncPartnerClient] = None,
+        product_client: Optional[AsyncProductClient] = None,
+    ):
+        self.repo = AsyncInvoiceRepository(db)
+        self.events = AsyncEventRepository(db)
+        registry = get_async_registry()
+        if CACHE_ENABLED:
+            self.company_client = company_client or registry.get_client(AsyncCachedCompanyClient)
+            self.partner_client = partner_client or registry.get_client(AsyncCachedPartnerClient)
+            self.product_client = product_client or registry.get_client(AsyncCachedProductClient)
+        else:
+            self.company_client = company_client or registry.get_client(
+                AsyncCoalescingCompanyClient if COALESCE_ENABLED else AsyncCompanyClient
+            )
+            self.partner_client = partner_client or registry.get_client(
+                AsyncCoalescingPartnerClient if COALESCE_ENABLED else AsyncPartnerClient
+            )
+            self.product_client = product_client or registry.get_client(AsyncProductClient)
+
+    async def create_invoice(self, data: InvoiceCreate, user_id: str) -> Invoice:
+        product_ids = [str(line.product_id) for line in data.lines]
+        company_data, partner_data, products_list = await self._fetch_enrichment(
+            str(data.company_id), str(data.partner_id), product_ids, WRITE_MAX_AGE
+        )
+        invoice = self._build_invoice(data, user_id, company_data, partner_data, products_list)
+        if invoice.invoice_number is None:
+            invoice.invoice_number = await self.repo.get_next_invoice_number(data.company_id, data.issue_date.year)
+        return await self.repo.create(invoice)
+
+    async def create_invoices_bulk(self, items: List[InvoiceCreate], user_id: str) -> InvoiceBulkResponse:
+        companies, partners, products = await self._fetch_bulk_enrichment(items)
+        invoices = self._build_bulk_invoices(items, user_id, companies, partners, products)
+
+        results: List[InvoiceBulkItemResult] = []
+        indexed = list(enumerate(invoices))
+        for start in range(0, len(indexed), BULK_CHUNK_SIZE):
+            chunk = indexed[start:start + BULK_CHUNK_SIZE]
+            try:
+                await self._insert_bulk_chunk([invoice for _, invoice in chunk])
+                results.extend(self._bulk_success(index, invoice) for index, invoice in chunk)
+                continue
+            except Exception as e:
+                logger.warning("Bulk chunk at index %d failed, retrying invoices one by one: %s", start, e)
+            for index, invoice in chunk:
+                try:
+                    await self._insert_bulk_chunk([invoice])
+                    results.append(self._bulk_success(index, invoice))
+                except Exception:
+                    logger.exception("Bulk invoice at index %d failed", index)
+                    results.append(InvoiceBulkItemResult(index=index, success=False, error="Failed to store invoice"))
+        return self._bulk_response(results)
+
+    async def _insert_bulk_chunk(self, invoices: List[Invoice]) -> None:
+        allocated = [invoice for invoice in invoices if invoice.invoice_number is None]
+        try:
+            for (company_id, year), group in self._numbering_groups(allocated).items():
+                numbers = await self.repo.reserve_invoice_numbers(company_id, year, len(group))
+                for invoice, number in zip(group, numbers):
+                    invoice.invoice_number = number
+            await self.repo.create_many(invoices)
+        except Exception:
+            await self.repo.rollback()
+            for invoice in allocated:
+                invoice.invoice_number = None
+            raise
+
+    async def _fetch_bulk_enrichment(
+        self, items: List[InvoiceCreate]
+    ) -> Tuple[Dict[str, dict], Dict[str, dict], List[dict]]:
+        deadline = ENRICHMENT_DEADLINE_SECONDS
+        company_ids, partner_ids, product_ids = self._distinct_bulk_ids(items)
+        fresh = self._freshness(WRITE_MAX_AGE)
+
+        calls = {
+            "companies": self.company_client.get_companies(company_ids, timeout=deadline, **fresh),
+            "partners": self.partner_client.get_partners(partner_ids, timeout=deadline, **fresh),
+        }
+        if product_ids:
+            calls["products"] = self.product_client.get_products(product_ids, timeout=deadline, **fresh)
+
+        results = await async_fan_out(calls, deadline)
+        companies = {str(c['id']): c for c in results["companies"] or []}
+        partners = {str(p['id']): p for p in results["partners"] or []}
+        return companies, partners, results.get("products") or []
+
+    async def get_invoice(self, invoice_id: UUID, user_id: str = None) -> Optional[Invoice]:
+        return await self.repo.get_by_id(invoice_id, user_id)
+
+    async def get_invoice_version(self, invoice_id: UUID, user_id: str = None) -> Optional[int]:
+        return await self.repo.get_version(invoice_id, user_id)
+
+    async def list_invoices(self, user_id: str = None) -> List[Invoice]:
+        return await self.repo.get_all(user_id)
+
+    async def update_invoice(self, invoice_id: UUID, data: InvoiceUpdate, user_id: str) -> Optional[InvoiceResponse]:
+        return await self._write_update(invoice_id, self._update_values(data), data.lines, user_id)
+
+    async def patch_invoice(self, invoice_id: UUID, data: InvoicePatch, user_id: str) -> Optional[InvoiceResponse]:
+        return await self._write_update(invoice_id, self._patch_values(data), data.lines, user_id)
+
+    async def _write_update(
+        self, invoice_id: UUID, values: dict, lines: Optional[Sequence[InvoiceLineCreate]], user_id: str
+    ) -> Optional[InvoiceResponse]:
+        invoice = await self.repo.get_by_id(invoice_id, user_id, for_update=True)
+        if not invoice:
+            return None
+
+        pairs, removed, product_ids = self._match_lines(invoice, lines)
+        products_list = []
+        if product_ids:
+            products_list = await self.product_client.get_products(
+                product_ids, timeout=ENRICHMENT_DEADLINE_SECONDS, **self._freshness(WRITE_MAX_AGE)
+            )
+        changed, line_diff = self._apply_update(invoice, values, pairs, removed, products_list)
+        if not changed and line_diff is None:
+            return self._to_invoice_response(invoice)
+
+        updated = await self.repo.update(invoice, line_diff)
+        return self._to_invoice_response(updated)
+
+    async def update_status(
+        self, invoice_id: UUID, status: InvoiceStatus, user_id: str
+    ) -> Optional[InvoiceListResponse]:
+        invoice = await self.repo.get_for_update(invoice_id, user_id)
+        if not invoice:
+            return None
+        changed, _ = self._apply_update(invoice, {"status": status})
+        if changed:
+            invoice = await self.repo.update(invoice)
+        return self._to_list_response(invoice)
+
+    async def delete_invoice(self, invoice_id: UUID, user_id: str) -> bool:
+        return await self.repo.delete(invoice_id, user_id)
+
+    async def create_invoice_response(self, data: InvoiceCreate, user_id: str) -> InvoiceResponse:
+        invoice = await self.create_invoice(data, user_id)
+        return self._to_invoice_response(invoice)
+
+    async def get_invoice_response(
+        self, invoice_id: UUID, user_id: str = None, max_age: Optional[float] = None
+    ) -> Optional[InvoiceResponse]:
+        invoice = await self.get_invoice(invoice_id, user_id)
+        if not invoice:
+            return None
+        max_age = max_age if max_age is not None else ENRICHMENT_DEFAULT_MAX_AGE
+        product_ids = self._unpriced_product_ids(invoice)
+        company_data, partner_data, products_list = await self._fetch_enrichment(
+            str(invoice.company_id), str(invoice.partner_id), product_ids, max_age
+        )
+        if max_age:
+            company_data, partner_data = self._with_snapshots(invoice, company_data, partner_data)
+        return self._build_enriched_response(invoice, company_data, partner_data, products_list)
+
+    async def list_invoice_rows(
+        self,
+        user_id: str,
+        filters: Optional[InvoiceListFilters] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        order: SortOrder = SortOrder.DESC,
+    ) -> Tuple[List[Row], Optional[str]]:
+        return await self.repo.get_list_rows(user_id, filters, limit, cursor, order)
+
+    async def get_summary(
+        self,
+        user_id: str,
+        group_by: List[SummaryDimension],
+        month_from: Optional[date] = None,
+        month_to: Optional[date] = None,
+    ) -> InvoiceSummaryResponse:
+        rows = await self.repo.get_summary(user_id, group_by, month_from, month_to)
+        return self._summary_response(group_by, rows)
+
+    async def list_changes(self, user_id: str, since: int = 0, limit: int = 100) -> InvoiceChangesResponse:
+        events = await self.events.get_changes(user_id, since, limit, self._settled_before())
+        return self._changes_response(events, since)
+
+    async def _fetch_enrichment(
+        self, company_id: str, partner_id: str, product_ids: List[str], max_age: Optional[float] = None
+    ) -> Tuple[Optional[dict], Optional[dict], List[dict]]:
+        deadline = ENRICHMENT_DEADLINE_SECONDS
+        fresh = self._freshness(max_age)
+        calls = {
+            "company": self.company_client.get_company(company_id, timeout=deadline, **fresh),
+            "partner": self.partner_client.get_partner(partner_id, timeout=deadline, **fresh),
+        }
+        if product_ids:
+            calls["products"] = self.product_client.get_products(product_ids, timeout=deadline, **fresh)
+
+        results = await async_fan_out(calls, deadline)
+        return results["company"], results["partner"], results.get("products") or []
@@ -0,0 +1,122 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from prometheus_client import Counter
+
+# One deadline per enrichment RPC, counted from when the lookup starts running
+ENRICHMENT_DEADLINE_SECONDS = float(os.getenv("ENRICHMENT_DEADLINE_SECONDS", "5"))
+# Threads serving sync requests (Starlette's threadpool, applied on startup); 40 is anyio's default
+REQUEST_THREADS = int(os.getenv("REQUEST_THREADS", "40"))
+# A request runs its first lookup itself and hands at most two more to the pool,
+# so this size lets every request thread enrich at once without queueing
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", str(REQUEST_THREADS * 2)))
+# Freshness used when a request sends no hint; unset keeps live lookups bounded by the cache TTL
+_default_max_age = os.getenv("ENRICHMENT_DEFAULT_MAX_AGE_SECONDS")
+ENRICHMENT_DEFAULT_MAX_AGE: Optional[float] = float(_default_max_age) if _default_max_age else None
+
+ENRICHMENT_DEADLINE_MISSES = Counter(
+    "invoice_enrichment_deadline_misses_total",
+    "Enrichment lookups dropped at their deadline, by call and whether they were still queued or already running",
+    ["call", "stage"],
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=ENRICHMENT_WORKERS, thread_name_prefix="enrichment")
+# Single-lookup fallbacks are usually started from an enrichment worker; waiting on
+# that same pool could starve it, so they get their own
+lookup_executor = ThreadPoolExecutor(max_workers=ENRICHMENT_WORKERS, thread_name_prefix="enrichment-lookup")
+
+
+def fan_out(
+    calls: Dict[str, Callable[[], Any]],
+    deadline: float = ENRICHMENT_DEADLINE_SECONDS,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Dict[str, Any]:
+    """Run independent lookups concurrently and collect their results.
+
+    The first call runs on the calling thread and the others on the pool. Each
+    pooled call gets the deadline from when it starts running, so waiting for a
+    worker does not eat into it, and one still queued once the deadline has
+    passed is dropped. The first call cannot be interrupted and relies on its
+    own RPC timeout. Calls that fail or miss the deadline map to None so callers
+    can degrade gracefully.
+    """
+    if not calls:
+        return {}
+    pool = executor or _executor
+    first, *rest = calls
+    started: Dict[str, float] = {}
+    submitted_at = time.monotonic()
+    # Each call runs in a copy of the caller's context so trace spans nest under the request
+    futures = {
+        name: pool.submit(contextvars.copy_context().run, _run_started, started, name, calls[name]) for name in rest
+    }
+
+    results: Dict[str, Any] = {}
+    try:
+        results[first] = calls[first]()
+    except Exception:
+        logger.exception("Error in enrichment call '%s'", first)
+        results[first] = None
+    for name, future in futures.items():
+        if not _wait_started(future, started, name, submitted_at, deadline):
+            results[name] = None
+            continue
+        try:
+            results[name] = future.result()
+        except Exception:
+            logger.exception("Error in enrichment call '%s'", name)
+            results[name] = None
+    return {name: results[name] for name in calls}
+
+
+def _run_started(started: Dict[str, float], name: str, call: Callable[[], Any]) -> Any:
+    started[name] = time.monotonic()
+    return call()
+
+
+def _wait_started(future: Future, started: Dict[str, float], name: str, submitted_at: float, deadline: float) -> bool:
+    """Wait until the call finishes or its deadline, counted from its start, passes"""
+    while True:
+        start = started.get(name)
+        remaining = (start if start is not None else submitted_at) + deadline - time.monotonic()
+        if wait([future], timeout=max(remaining, 0)).done:
+            return True
+        if started.get(name) != start:
+            continue  # left the queue while we waited; its own deadline starts now
+        stage = "running" if start is not None else "queued"
+        if not future.cancel() and stage == "queued":
+            continue  # picked up just now
+        ENRICHMENT_DEADLINE_MISSES.labels(name, stage).inc()
+        logger.warning("Enrichment call '%s' exceeded deadline of %ss while %s", name, deadline, stage)
+        return False
+
+
+async def async_fan_out(calls: Dict[str, Awaitable[Any]], deadline: float = ENRICHMENT_DEADLINE_SECONDS) -> Dict[str, Any]:
+    """asyncio counterpart of fan_out for the grpc.aio clients"""
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    if not tasks:
+        return {}
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    results: Dict[str, Any] = {}
+    for name, task in tasks.items():
+        if task not in done:
+            ENRICHMENT_DEADLINE_MISSES.labels(name, "running").inc()
+            logger.warning("Enrichment call '%s' exceeded deadline of %ss", name, deadline)
+            results[name] = None
+            continue
+        try:
+            results[name] = task.result()
+        except Exception:
+            logger.exception("Error in enrichment call '%s'", name)
+            results[name] = None
+    return results
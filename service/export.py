@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Iterator, Optional, Sequence
+from sqlalchemy import Row
+from config import ReadSessionLocal, get_async_read_sessionmaker
+from models.schemas import ExportFormat, InvoiceListFilters, InvoiceListResponse, SortOrder
+from repository.invoice_repo import InvoiceRepository
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = list(InvoiceListResponse.model_fields)
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _row_values(row: Row) -> dict:
+    """Plain-JSON values of a list row, matching InvoiceListResponse serialization"""
+    return {
+        "id": str(row.id),
+        "user_id": str(row.user_id),
+        "company_id": str(row.company_id),
+        "partner_id": str(row.partner_id),
+        "invoice_number": row.invoice_number,
+        "issue_date": row.issue_date.isoformat(),
+        "service_date": row.service_date.isoformat(),
+        "due_date": row.due_date.isoformat(),
+        "notes": row.notes,
+        "status": row.status.value,
+        "company_name": row.company_name,
+        "partner_name": row.partner_name,
+        "total": float(row.total) if row.total else None,
+        "version": row.version,
+    }
+
+
+def encode_batch(batch: Sequence[Row], fmt: ExportFormat) -> bytes:
+    if fmt == ExportFormat.NDJSON:
+        return "".join(json.dumps(_row_values(row), ensure_ascii=False) + "\n" for row in batch).encode()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writerows(_row_values(row) for row in batch)
+    return buffer.getvalue().encode()
+
+
+def encode_header(fmt: ExportFormat) -> bytes:
+    if fmt != ExportFormat.CSV:
+        return b""
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS).writeheader()
+    return buffer.getvalue().encode()
+
+
+def encode_export(batches: Iterable[Sequence[Row]], fmt: ExportFormat) -> Iterator[bytes]:
+    header = encode_header(fmt)
+    if header:
+        yield header
+    for batch in batches:
+        yield encode_batch(batch, fmt)
+
+
+def stream_invoice_export(
+    user_id: str,
+    filters: Optional[InvoiceListFilters],
+    order: SortOrder,
+    fmt: ExportFormat,
+) -> Iterator[bytes]:
+    """Yield the encoded export one batch at a time.
+
+    The stream outlives the request's dependency-managed session, so it opens
+    and closes its own.
+    """
+    db = ReadSessionLocal()
+    try:
+        batches = InvoiceRepository(db).iter_list_batches(user_id, filters, order, EXPORT_BATCH_SIZE)
+        yield from encode_export(batches, fmt)
+    finally:
+        db.close()
+
+
+async def astream_invoice_export(
+    user_id: str,
+    filters: Optional[InvoiceListFilters],
+    order: SortOrder,
+    fmt: ExportFormat,
+) -> AsyncIterator[bytes]:
+    # Imported here so the sync app never loads the asyncio extension
+    from repository.async_invoice_repo import AsyncInvoiceRepository
+
+    async with get_async_read_sessionmaker()() as db:
+        header = encode_header(fmt)
+        if header:
+            yield header
+        batches = AsyncInvoiceRepository(db).iter_list_batches(user_id, filters, order, EXPORT_BATCH_SIZE)
+        async for batch in batches:
+            yield encode_batch(batch, fmt)
@@ -1,63 +1,80 @@
-from typing import List, Optional
-from uuid import UUID
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
-from models.database import Invoice, InvoiceLine, InvoiceStatus
-from models.schemas import InvoiceCreate, InvoiceLineResponse, InvoiceResponse, InvoiceListResponse, InvoiceUpdate
+from models.database import Invoice, InvoiceLine, InvoiceStatus, utc_now
+from models.schemas import (
+    InvoiceCreate,
+    InvoiceLineCreate,
+    InvoiceLineResponse,
+    InvoiceResponse,
+    InvoiceListResponse,
+    InvoiceUpdate,
+    InvoicePatch,
+    InvoiceListFilters,
+    SortOrder,
+    InvoiceBulkItemResult,
+    InvoiceBulkResponse,
+    SummaryDimension,
+    InvoiceSummaryRow,
+    InvoiceSummaryResponse,
+    InvoiceChange,
+    InvoiceChangesResponse,
+    VatBreakdownItem,
+)
+from repository.event_repo import EventRepository
 from repository.invoice_repo import InvoiceRepository
+from repository.line_diff import LineDiff, LinePair, build_line_diff, match_lines
 from client.company_client import CompanyClient
 from client.partner_client import PartnerClient
 from client.product_client import ProductClient
+from client.channel_registry import get_registry
+from client.cache import CACHE_ENABLED, CachedCompanyClient, CachedPartnerClient, CachedProductClient
+from client.coalescer import COALESCE_ENABLED, CoalescingCompanyClient, CoalescingPartnerClient
+from service.enrichment import ENRICHMENT_DEADLINE_SECONDS, ENRICHMENT_DEFAULT_MAX_AGE, fan_out
+from service.pricing import invoice_total, price_from_product, vat_breakdown
+from observability import timed_response
 
+logger = logging.getLogger(__name__)
 
-class InvoiceService:
-    def __init__(self, db: Session):
-        self.repo = InvoiceRepository(db)
-        # Initialize gRPC clients (they read host/port from environment variables)
-        self.company_client = CompanyClient()
-        self.partner_client = PartnerClient()
-        self.product_client = ProductClient()
+# Invoices inserted (and committed) per transaction by the bulk endpoint
+BULK_CHUNK_SIZE = 500
 
-    def create_invoice(self, data: InvoiceCreate, user_id: str) -> Invoice:
-        # Fetch company and partner data for snapshots
-        company_data = None
-        partner_name = None
-        try:
-            company_data = self.company_client.get_company(str(data.company_id))
-        except Exception as e:
-            print(f"Error fetching company for snapshot: {e}")
-        
-        try:
-            partner_data = self.partner_client.get_partner(str(data.partner_id))
-            if partner_data:
-                partner_name = partner_data.get('naziv')
-        except Exception as e:
-            print(f"Error fetching partner for snapshot: {e}")
-
-        # Calculate total from product data
-        total = 0
-        product_ids = [str(line.product_id) for line in data.lines]
-        if product_ids:
-            try:
-                products_list = self.product_client.get_products(product_ids)
-                products_map = {p['id']: p for p in products_list}
-                for line in data.lines:
-                    product = products_map.get(str(line.product_id))
-                    if product:
-                        line_total = line.amount * float(product.get('cost', 0))
-                        vat_rate = float(product.get('ddvPercentage', 22))
-                        total += line_total * (1 + vat_rate / 100)
-            except Exception as e:
-                print(f"Error calculating total: {e}")
+# Freshness for lookups whose data is persisted (line price and name snapshots): always live,
+# while reads may be served from the enrichment cache
+WRITE_MAX_AGE = 0
 
-        # Create invoice lines with only id, invoice_id, product_id, and amount
-        lines = []
-        for line_data in data.lines:
-            lines.append(InvoiceLine(
-                product_id=line_data.product_id,
-                amount=line_data.amount,
-            ))
+# Invoice columns a PATCH may set to null
+NULLABLE_PATCH_FIELDS = {"notes"}
 
-        invoice = Invoice(
+# Events younger than this are held back from GET /invoices/changes so that
+# transactions still in flight can commit their (lower) ids first
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "2"))
+
+
+def _money(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+class InvoiceServiceBase:
+    """Request-independent invoice building shared by the sync and async services"""
+
+    def _build_invoice(
+        self,
+        data: InvoiceCreate,
+        user_id: str,
+        company_data: Optional[dict],
+        partner_data: Optional[dict],
+        products_list: List[dict],
+    ) -> Invoice:
+        partner_name = partner_data.get('naziv') if partner_data else None
+        lines = self._build_lines(data.lines, products_list)
+
+        return Invoice(
             invoice_number=data.invoice_number,
             user_id=user_id,
             company_id=data.company_id,
@@ -69,100 +86,248 @@ class InvoiceService:
             status=InvoiceStatus.ISSUED,
             company_name=company_data.get('companyName') if company_data else None,
             partner_name=partner_name,
-            total=total if total > 0 else None,
+            total=invoice_total(lines),
+            version=1,
+            updated_at=datetime.utcnow(),
             lines=lines
         )
 
-        created = self.repo.create(invoice)
-        return created
+    def _build_lines(self, lines_data: List[InvoiceLineCreate], products_list: List[dict]) -> List[InvoiceLine]:
+        """Lines with price snapshots; lines whose product was not found stay unpriced"""
+        products_map = {str(p['id']): p for p in products_list}
+        return [self._build_line(line_data, products_map) for line_data in lines_data]
 
-    def get_invoice(self, invoice_id: UUID, user_id: str = None) -> Optional[Invoice]:
-        return self.repo.get_by_id(invoice_id, user_id)
+    def _build_line(self, line_data: InvoiceLineCreate, products_map: Dict[str, dict]) -> InvoiceLine:
+        product = products_map.get(str(line_data.product_id))
+        price = price_from_product(line_data.amount, product)
+        return InvoiceLine(
+            product_id=line_data.product_id,
+            amount=line_data.amount,
+            product_name=product.get('name') if product else None,
+            measuring_unit=product.get('measuringUnit') if product else None,
+            unit_price=price.unit_price if price else None,
+            vat_rate=price.vat_rate if price else None,
+            net=price.net if price else None,
+            gross=price.gross if price else None,
+        )
 
-    def list_invoices(self, user_id: str = None) -> List[Invoice]:
-        return self.repo.get_all(user_id)
+    def _build_bulk_invoices(
+        self,
+        items: List[InvoiceCreate],
+        user_id: str,
+        companies: Dict[str, dict],
+        partners: Dict[str, dict],
+        products: List[dict],
+    ) -> List[Invoice]:
+        """Build bulk invoices with client-side ids so they can be inserted set-wise"""
+        products_by_id = {str(p['id']): p for p in products}
+        invoices = []
+        for item in items:
+            item_products = [
+                products_by_id[str(line.product_id)]
+                for line in item.lines
+                if str(line.product_id) in products_by_id
+            ]
+            invoice = self._build_invoice(
+                item,
+                user_id,
+                companies.get(str(item.company_id)),
+                partners.get(str(item.partner_id)),
+                item_products,
+            )
+            invoice.id = uuid4()
+            for line in invoice.lines:
+                line.id = uuid4()
+                line.invoice_id = invoice.id
+            invoices.append(invoice)
+        return invoices
 
-    def update_invoice(self, invoice_id: UUID, data: InvoiceUpdate, user_id: str) -> Optional[InvoiceResponse]:
-        invoice = self.repo.get_by_id(invoice_id, user_id)
-        if not invoice:
-            return None
+    def _numbering_groups(self, invoices: List[Invoice]) -> Dict[Tuple[UUID, int], List[Invoice]]:
+        """Group invoices by (company, issue year) so each group reserves one number block"""
+        groups: Dict[Tuple[UUID, int], List[Invoice]] = defaultdict(list)
+        for invoice in invoices:
+            groups[(invoice.company_id, invoice.issue_date.year)].append(invoice)
+        return groups
 
-        # Update invoice fields
-        if data.company_id is not None:
-            invoice.company_id = data.company_id
-        if data.partner_id is not None:
-            invoice.partner_id = data.partner_id
-        if data.issue_date is not None:
-            invoice.issue_date = data.issue_date
-        if data.service_date is not None:
-            invoice.service_date = data.service_date
-        if data.due_date is not None:
-            invoice.due_date = data.due_date
-        if data.notes is not None:
-            invoice.notes = data.notes
-        if data.status is not None:
-            invoice.status = data.status
-
-        # Update lines if provided
-        if data.lines is not None:
-            # Remove existing lines
-            invoice.lines = []
-            # Add new lines
-            for line_data in data.lines:
-                invoice.lines.append(InvoiceLine(
-                    product_id=line_data.product_id,
-                    amount=line_data.amount,
-                ))
-
-        updated = self.repo.update(invoice)
-        return self._to_invoice_response(updated)
+    def _distinct_bulk_ids(self, items: List[InvoiceCreate]) -> Tuple[List[str], List[str], List[str]]:
+        company_ids = list(dict.fromkeys(str(item.company_id) for item in items))
+        partner_ids = list(dict.fromkeys(str(item.partner_id) for item in items))
+        product_ids = list(dict.fromkeys(str(line.product_id) for item in items for line in item.lines))
+        return company_ids, partner_ids, product_ids
 
-    def delete_invoice(self, invoice_id: UUID, user_id: str) -> bool:
-        return self.repo.delete(invoice_id, user_id)
+    def _bulk_success(self, index: int, invoice: Invoice) -> InvoiceBulkItemResult:
+        return InvoiceBulkItemResult(
+            index=index, success=True, invoice_id=invoice.id, invoice_number=invoice.invoice_number
+        )
 
-    def create_invoice_response(self, data: InvoiceCreate, user_id: str) -> InvoiceResponse:
-        invoice = self.create_invoice(data, user_id)
-        return self._to_invoice_response(invoice)
+    def _bulk_response(self, results: List[InvoiceBulkItemResult]) -> InvoiceBulkResponse:
+        results.sort(key=lambda r: r.index)
+        created = sum(1 for r in results if r.success)
+        return InvoiceBulkResponse(created=created, failed=len(results) - created, results=results)
 
-    def get_invoice_response(self, invoice_id: UUID, user_id: str = None) -> Optional[InvoiceResponse]:
-        invoice = self.get_invoice(invoice_id, user_id)
-        if not invoice:
-            return None
-        return self._to_invoice_response_with_grpc(invoice)
-
-    def list_invoices_by_user(self, user_id: str) -> List[InvoiceListResponse]:
-        invoices = self.list_invoices(user_id)
-        return [
-            InvoiceListResponse(
-                id=inv.id,
-                user_id=inv.user_id,
-                company_id=inv.company_id,
-                partner_id=inv.partner_id,
-                invoice_number=inv.invoice_number,
-                issue_date=inv.issue_date,
-                service_date=inv.service_date,
-                due_date=inv.due_date,
-                notes=inv.notes,
-                status=inv.status,
-                company_name=inv.company_name,
-                partner_name=inv.partner_name,
-                total=float(inv.total) if inv.total else None,
+    @timed_response("summary")
+    def _summary_response(self, group_by: List[SummaryDimension], rows: Sequence) -> InvoiceSummaryResponse:
+        groups = [
+            InvoiceSummaryRow(
+                status=getattr(row, "status", None),
+                month=getattr(row, "month", None),
+                partner_id=getattr(row, "partner_id", None),
+                invoice_count=row.invoice_count or 0,
+                total=float(row.total or 0),
             )
-            for inv in invoices
+            for row in rows
         ]
+        return InvoiceSummaryResponse(
+            group_by=group_by,
+            invoice_count=sum(group.invoice_count for group in groups),
+            total=sum(group.total for group in groups),
+            groups=groups,
+        )
+
+    def _settled_before(self) -> utc_now:
+        # Measured on the database clock, the same one that stamps occurred_at
+        return utc_now(CHANGES_SETTLE_SECONDS)
+
+    def _changes_response(self, events: Sequence, since: int) -> InvoiceChangesResponse:
+        changes = [InvoiceChange.model_validate(event) for event in events]
+        return InvoiceChangesResponse(changes=changes, next_since=changes[-1].id if changes else since)
+
+    def _update_values(self, data: InvoiceUpdate) -> dict:
+        """PUT semantics: fields left out or null are kept"""
+        return data.model_dump(exclude_none=True, exclude={"lines"})
+
+    def _patch_values(self, data: InvoicePatch) -> dict:
+        """PATCH semantics: only fields sent are changed, and notes can be cleared with null"""
+        values = data.model_dump(exclude_unset=True, exclude={"lines"})
+        return {name: value for name, value in values.items() if value is not None or name in NULLABLE_PATCH_FIELDS}
+
+    def _match_lines(
+        self, invoice: Invoice, lines: Optional[Sequence[InvoiceLineCreate]]
+    ) -> Tuple[List[LinePair], List[InvoiceLine], List[str]]:
+        """Requested lines paired with stored ones, stored lines to delete, and products to price"""
+        if lines is None:
+            return [], [], []
+        pairs, removed = match_lines(invoice.lines, lines)
+        if removed or any(pair.changed for pair in pairs):
+            # The total is recomputed from the lines, so kept lines written before
+            # price snapshots existed are priced now instead of dropping out of it
+            pairs = [
+                pair._replace(reprice=True) if pair.existing is not None and pair.existing.unit_price is None else pair
+                for pair in pairs
+            ]
+        product_ids = list(dict.fromkeys(str(pair.requested.product_id) for pair in pairs if pair.changed))
+        return pairs, removed, product_ids
+
+    def _apply_update(
+        self,
+        invoice: Invoice,
+        values: dict,
+        pairs: Sequence[LinePair] = (),
+        removed: Sequence[InvoiceLine] = (),
+        products_list: Optional[List[dict]] = None,
+    ) -> Tuple[bool, Optional[LineDiff]]:
+        """Assign the fields whose value differs and price changed lines.
+
+        Returns whether any field changed and the line diff, None when the lines stay as they are.
+        """
+        changed = False
+        for name, value in values.items():
+            if getattr(invoice, name) != value:
+                setattr(invoice, name, value)
+                changed = True
+
+        products_map = {str(p['id']): p for p in products_list or []}
+        line_diff = build_line_diff(invoice.id, pairs, removed, lambda line: self._build_line(line, products_map))
+        if line_diff.empty:
+            return changed, None
+        if any(line.gross is None for line in line_diff.lines):
+            # A product without a price would silently drop out of a recomputed total
+            logger.warning("Invoice %s keeps its stored total: some lines have no price", invoice.id)
+        else:
+            invoice.total = invoice_total(line_diff.lines)
+        return changed, line_diff
+
+    def _to_list_response(self, inv: Invoice) -> InvoiceListResponse:
+        return InvoiceListResponse(
+            id=inv.id,
+            user_id=inv.user_id,
+            company_id=inv.company_id,
+            partner_id=inv.partner_id,
+            invoice_number=inv.invoice_number,
+            issue_date=inv.issue_date,
+            service_date=inv.service_date,
+            due_date=inv.due_date,
+            notes=inv.notes,
+            status=inv.status,
+            company_name=inv.company_name,
+            partner_name=inv.partner_name,
+            total=float(inv.total) if inv.total else None,
+            version=inv.version,
+        )
+
+    def _freshness(self, max_age: Optional[float]) -> dict:
+        """max_age keyword for the cached clients; plain clients always look up live"""
+        if max_age is None or not CACHE_ENABLED:
+            return {}
+        return {"max_age": max_age}
 
+    def _with_snapshots(
+        self, invoice: Invoice, company_data: Optional[dict], partner_data: Optional[dict]
+    ) -> Tuple[Optional[dict], Optional[dict]]:
+        """Fill lookups that are not cached yet from the names stored on the invoice"""
+        if company_data is None and invoice.company_name:
+            company_data = {"id": str(invoice.company_id), "companyName": invoice.company_name}
+        if partner_data is None and invoice.partner_name:
+            partner_data = {"id": str(invoice.partner_id), "naziv": invoice.partner_name}
+        return company_data, partner_data
+
+    def _unpriced_product_ids(self, invoice: Invoice) -> List[str]:
+        """Products still needed from product-service: lines written before price snapshots"""
+        return [str(line.product_id) for line in invoice.lines if line.unit_price is None]
+
+    def _snapshot_product(self, line: InvoiceLine) -> Optional[dict]:
+        """The product fields a line's snapshot preserves, in product-service's shape"""
+        if line.unit_price is None:
+            return None
+        return {
+            "id": str(line.product_id),
+            "name": line.product_name,
+            # Formatted at the columns' scale so a freshly written line reads the same as a reloaded one
+            "cost": f"{line.unit_price:.2f}",
+            "measuringUnit": line.measuring_unit,
+            "ddvPercentage": f"{line.vat_rate:.2f}",
+        }
+
+    def _line_response(self, line: InvoiceLine, product: Optional[dict] = None) -> InvoiceLineResponse:
+        return InvoiceLineResponse(
+            id=line.id,
+            invoice_id=line.invoice_id,
+            product_id=line.product_id,
+            amount=line.amount,
+            product_name=line.product_name,
+            unit_price=_money(line.unit_price),
+            vat_rate=_money(line.vat_rate),
+            net=_money(line.net),
+            gross=_money(line.gross),
+            product=product if product is not None else self._snapshot_product(line),
+        )
+
+    def _totals(self, invoice: Invoice) -> dict:
+        breakdown = vat_breakdown(invoice.lines)
+        if not breakdown:
+            return {"total": _money(invoice.total)}
+        net = sum(item["net"] for item in breakdown)
+        gross = sum(item["gross"] for item in breakdown)
+        return {
+            "net_total": float(net),
+            "vat_total": float(gross - net),
+            "total": _money(invoice.total),
+            "vat_breakdown": [VatBreakdownItem(**{k: float(v) for k, v in item.items()}) for item in breakdown],
+        }
+
+    @timed_response("invoice")
     def _to_invoice_response(self, invoice: Invoice) -> InvoiceResponse:
-        # Build line responses with only the required fields
-        line_responses: list[InvoiceLineResponse] = []
-        for line in invoice.lines:
-            line_responses.append(
-                InvoiceLineResponse(
-                    id=line.id,
-                    invoice_id=line.invoice_id,
-                    product_id=line.product_id,
-                    amount=line.amount,
-                )
-            )
+        line_responses = [self._line_response(line) for line in invoice.lines]
 
         return InvoiceResponse(
             id=invoice.id,
@@ -175,56 +340,25 @@ class InvoiceService:
             due_date=invoice.due_date,
             notes=invoice.notes,
             status=invoice.status,
+            version=invoice.version,
             lines=line_responses,
+            **self._totals(invoice),
         )
 
-    def _to_invoice_response_with_grpc(self, invoice: Invoice) -> InvoiceResponse:
-        # Fetch company data via gRPC
-        company_data = None
-        try:
-            company_data = self.company_client.get_company(str(invoice.company_id))
-        except Exception as e:
-            print(f"Error fetching company data: {e}")
+    @timed_response("detail")
+    def _build_enriched_response(
+        self,
+        invoice: Invoice,
+        company_data: Optional[dict],
+        partner_data: Optional[dict],
+        products_list: List[dict],
+    ) -> InvoiceResponse:
+        # Normalize keys to strings for comparison with line product ids
+        products_data = {str(p['id']): p for p in products_list}
 
-        # Fetch partner data via gRPC
-        partner_data = None
-        try:
-            partner_data = self.partner_client.get_partner(str(invoice.partner_id))
-        except Exception as e:
-            print(f"Error fetching partner data: {e}")
-
-        # Collect all product IDs from invoice lines
-        product_ids = [str(line.product_id) for line in invoice.lines]
-        
-        # Fetch products data via gRPC
-        products_data = {}
-        if product_ids:
-            try:
-                print(f"Fetching products for IDs: {product_ids}")
-                products_list = self.product_client.get_products(product_ids)
-                print(f"Received {len(products_list)} products: {products_list}")
-                # Create a map of product_id -> product_data for easy lookup
-                # Normalize both keys to strings for comparison
-                products_data = {str(p['id']): p for p in products_list}
-                print(f"Products map keys: {list(products_data.keys())}")
-            except Exception as e:
-                print(f"Error fetching products data: {e}")
-
-        # Build line responses with product data
-        line_responses: list[InvoiceLineResponse] = []
-        for line in invoice.lines:
-            product_id_str = str(line.product_id)
-            product_data = products_data.get(product_id_str)
-            print(f"Looking for product {product_id_str}, found: {product_data is not None}")
-            line_responses.append(
-                InvoiceLineResponse(
-                    id=line.id,
-                    invoice_id=line.invoice_id,
-                    product_id=line.product_id,
-                    amount=line.amount,
-                    product=product_data,
-                )
-            )
+        line_responses = [
+            self._line_response(line, products_data.get(str(line.product_id))) for line in invoice.lines
+        ]
 
         return InvoiceResponse(
             id=invoice.id,
@@ -237,8 +371,227 @@ class InvoiceService:
             due_date=invoice.due_date,
             notes=invoice.notes,
             status=invoice.status,
+            version=invoice.version,
             lines=line_responses,
+            **self._totals(invoice),
             company=company_data,
             partner=partner_data,
         )
 
+
+class InvoiceService(InvoiceServiceBase):
+    def __init__(
+        self,
+        db: Session,
+        company_client: Optional[CompanyClient] = None,
+        partner_client: Optional[PartnerClient] = None,
+        product_client: Optional[ProductClient] = None,
+    ):
+        self.repo = InvoiceRepository(db)
+        self.events = EventRepository(db)
+        # gRPC clients are shared process-wide and borrowed from the channel registry
+        registry = get_registry()
+        if CACHE_ENABLED:
+            self.company_client = company_client or registry.get_client(CachedCompanyClient)
+            self.partner_client = partner_client or registry.get_client(CachedPartnerClient)
+            self.product_client = product_client or registry.get_client(CachedProductClient)
+        else:
+            self.company_client = company_client or registry.get_client(
+                CoalescingCompanyClient if COALESCE_ENABLED else CompanyClient
+            )
+            self.partner_client = partner_client or registry.get_client(
+                CoalescingPartnerClient if COALESCE_ENABLED else PartnerClient
+            )
+            self.product_client = product_client or registry.get_client(ProductClient)
+
+    def create_invoice(self, data: InvoiceCreate, user_id: str) -> Invoice:
+        # Fetch company, partner and product data for snapshots concurrently
+        product_ids = [str(line.product_id) for line in data.lines]
+        company_data, partner_data, products_list = self._fetch_enrichment(
+            str(data.company_id), str(data.partner_id), product_ids, WRITE_MAX_AGE
+        )
+        invoice = self._build_invoice(data, user_id, company_data, partner_data, products_list)
+        if invoice.invoice_number is None:
+            invoice.invoice_number = self.repo.get_next_invoice_number(data.company_id, data.issue_date.year)
+        created = self.repo.create(invoice)
+        return created
+
+    def create_invoices_bulk(self, items: List[InvoiceCreate], user_id: str) -> InvoiceBulkResponse:
+        """Create many invoices with one enrichment pass and chunked multi-row inserts.
+
+        A chunk that fails to insert is retried invoice by invoice so one bad item
+        only fails itself; every item gets its own result entry.
+        """
+        companies, partners, products = self._fetch_bulk_enrichment(items)
+        invoices = self._build_bulk_invoices(items, user_id, companies, partners, products)
+
+        results: List[InvoiceBulkItemResult] = []
+        indexed = list(enumerate(invoices))
+        for start in range(0, len(indexed), BULK_CHUNK_SIZE):
+            chunk = indexed[start:start + BULK_CHUNK_SIZE]
+            try:
+                self._insert_bulk_chunk([invoice for _, invoice in chunk])
+                results.extend(self._bulk_success(index, invoice) for index, invoice in chunk)
+                continue
+            except Exception as e:
+                logger.warning("Bulk chunk at index %d failed, retrying invoices one by one: %s", start, e)
+            for index, invoice in chunk:
+                try:
+                    self._insert_bulk_chunk([invoice])
+                    results.append(self._bulk_success(index, invoice))
+                except Exception:
+                    logger.exception("Bulk invoice at index %d failed", index)
+                    results.append(InvoiceBulkItemResult(index=index, success=False, error="Failed to store invoice"))
+        return self._bulk_response(results)
+
+    def _insert_bulk_chunk(self, invoices: List[Invoice]) -> None:
+        allocated = [invoice for invoice in invoices if invoice.invoice_number is None]
+        try:
+            for (company_id, year), group in self._numbering_groups(allocated).items():
+                numbers = self.repo.reserve_invoice_numbers(company_id, year, len(group))
+                for invoice, number in zip(group, numbers):
+                    invoice.invoice_number = number
+            self.repo.create_many(invoices)
+        except Exception:
+            self.repo.rollback()
+            # Reserved numbers were rolled back with the transaction
+            for invoice in allocated:
+                invoice.invoice_number = None
+            raise
+
+    def _fetch_bulk_enrichment(self, items: List[InvoiceCreate]) -> Tuple[Dict[str, dict], Dict[str, dict], List[dict]]:
+        """One batched call each for companies, partners and products, all concurrent"""
+        deadline = ENRICHMENT_DEADLINE_SECONDS
+        company_ids, partner_ids, product_ids = self._distinct_bulk_ids(items)
+        fresh = self._freshness(WRITE_MAX_AGE)
+
+        calls = {
+            "companies": lambda: self.company_client.get_companies(company_ids, timeout=deadline, **fresh),
+            "partners": lambda: self.partner_client.get_partners(partner_ids, timeout=deadline, **fresh),
+        }
+        if product_ids:
+            calls["products"] = lambda: self.product_client.get_products(product_ids, timeout=deadline, **fresh)
+
+        results = fan_out(calls, deadline)
+        companies = {str(c['id']): c for c in results["companies"] or []}
+        partners = {str(p['id']): p for p in results["partners"] or []}
+        return companies, partners, results.get("products") or []
+
+    def get_invoice(self, invoice_id: UUID, user_id: str = None) -> Optional[Invoice]:
+        return self.repo.get_by_id(invoice_id, user_id)
+
+    def get_invoice_version(self, invoice_id: UUID, user_id: str = None) -> Optional[int]:
+        return self.repo.get_version(invoice_id, user_id)
+
+    def list_invoices(self, user_id: str = None) -> List[Invoice]:
+        return self.repo.get_all(user_id)
+
+    def update_invoice(self, invoice_id: UUID, data: InvoiceUpdate, user_id: str) -> Optional[InvoiceResponse]:
+        return self._write_update(invoice_id, self._update_values(data), data.lines, user_id)
+
+    def patch_invoice(self, invoice_id: UUID, data: InvoicePatch, user_id: str) -> Optional[InvoiceResponse]:
+        return self._write_update(invoice_id, self._patch_values(data), data.lines, user_id)
+
+    def _write_update(
+        self, invoice_id: UUID, values: dict, lines: Optional[Sequence[InvoiceLineCreate]], user_id: str
+    ) -> Optional[InvoiceResponse]:
+        invoice = self.repo.get_by_id(invoice_id, user_id, for_update=True)
+        if not invoice:
+            return None
+
+        pairs, removed, product_ids = self._match_lines(invoice, lines)
+        products_list = []
+        if product_ids:
+            # Only added, changed and not yet snapshotted lines are priced; the rest keep their snapshots
+            products_list = self.product_client.get_products(
+                product_ids, timeout=ENRICHMENT_DEADLINE_SECONDS, **self._freshness(WRITE_MAX_AGE)
+            )
+        changed, line_diff = self._apply_update(invoice, values, pairs, removed, products_list)
+        if not changed and line_diff is None:
+            return self._to_invoice_response(invoice)
+
+        updated = self.repo.update(invoice, line_diff)
+        return self._to_invoice_response(updated)
+
+    def update_status(self, invoice_id: UUID, status: InvoiceStatus, user_id: str) -> Optional[InvoiceListResponse]:
+        """Status-only change: locks and writes the invoice row without loading lines or calling other services"""
+        invoice = self.repo.get_for_update(invoice_id, user_id)
+        if not invoice:
+            return None
+        changed, _ = self._apply_update(invoice, {"status": status})
+        if changed:
+            invoice = self.repo.update(invoice)
+        return self._to_list_response(invoice)
+
+    def delete_invoice(self, invoice_id: UUID, user_id: str) -> bool:
+        return self.repo.delete(invoice_id, user_id)
+
+    def create_invoice_response(self, data: InvoiceCreate, user_id: str) -> InvoiceResponse:
+        invoice = self.create_invoice(data, user_id)
+        return self._to_invoice_response(invoice)
+
+    def get_invoice_response(
+        self, invoice_id: UUID, user_id: str = None, max_age: Optional[float] = None
+    ) -> Optional[InvoiceResponse]:
+        """Enriched invoice; max_age (seconds) trades freshness for latency.
+
+        0 forces live lookups, a positive value answers at once from cached data
+        and invoice snapshots while stale entries refresh in the background.
+        """
+        invoice = self.get_invoice(invoice_id, user_id)
+        if not invoice:
+            return None
+        return self._to_invoice_response_with_grpc(invoice, max_age)
+
+    def list_invoice_rows(
+        self,
+        user_id: str,
+        filters: Optional[InvoiceListFilters] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        order: SortOrder = SortOrder.DESC,
+    ) -> Tuple[List[Row], Optional[str]]:
+        """One list page as column rows, for encoding with service.list_json"""
+        return self.repo.get_list_rows(user_id, filters, limit, cursor, order)
+
+    def get_summary(
+        self,
+        user_id: str,
+        group_by: List[SummaryDimension],
+        month_from: Optional[date] = None,
+        month_to: Optional[date] = None,
+    ) -> InvoiceSummaryResponse:
+        rows = self.repo.get_summary(user_id, group_by, month_from, month_to)
+        return self._summary_response(group_by, rows)
+
+    def list_changes(self, user_id: str, since: int = 0, limit: int = 100) -> InvoiceChangesResponse:
+        """Invoice changes after the since cursor, oldest first"""
+        events = self.events.get_changes(user_id, since, limit, self._settled_before())
+        return self._changes_response(events, since)
+
+    def _fetch_enrichment(
+        self, company_id: str, partner_id: str, product_ids: List[str], max_age: Optional[float] = None
+    ) -> Tuple[Optional[dict], Optional[dict], List[dict]]:
+        """Look up company, partner and products concurrently under one deadline"""
+        deadline = ENRICHMENT_DEADLINE_SECONDS
+        fresh = self._freshness(max_age)
+        calls = {
+            "company": lambda: self.company_client.get_company(company_id, timeout=deadline, **fresh),
+            "partner": lambda: self.partner_client.get_partner(partner_id, timeout=deadline, **fresh),
+        }
+        if product_ids:
+            calls["products"] = lambda: self.product_client.get_products(product_ids, timeout=deadline, **fresh)
+
+        results = fan_out(calls, deadline)
+        return results["company"], results["partner"], results.get("products") or []
+
+    def _to_invoice_response_with_grpc(self, invoice: Invoice, max_age: Optional[float] = None) -> InvoiceResponse:
+        # Fetch company, partner and (for legacy lines) products data via gRPC concurrently
+        max_age = max_age if max_age is not None else ENRICHMENT_DEFAULT_MAX_AGE
+        product_ids = self._unpriced_product_ids(invoice)
+        company_data, partner_data, products_list = self._fetch_enrichment(
+            str(invoice.company_id), str(invoice.partner_id), product_ids, max_age
+        )
+        if max_age:
+            company_data, partner_data = self._with_snapshots(invoice, company_data, partner_data)
+        return self._build_enriched_response(invoice, company_data, partner_data, products_list)
@@ -0,0 +1,27 @@
+from typing import Sequence
+
+import orjson
+from sqlalchemy import Row
+
+from models.schemas import InvoiceListResponse
+from observability import timed_response
+
+# Row keys come from repository.pagination.INVOICE_LIST_COLUMNS, which follows this order
+LIST_FIELDS = tuple(InvoiceListResponse.model_fields)
+
+
+def _item(row: Row) -> dict:
+    item = row._asdict()
+    item["total"] = float(row.total) if row.total else None
+    return item
+
+
+@timed_response("list")
+def encode_list(rows: Sequence[Row]) -> bytes:
+    """JSON body for a list of invoice rows without building a model per row.
+
+    orjson encodes UUIDs, datetimes and the status enum natively in the same
+    form Pydantic uses, so the bytes equal what FastAPI renders for
+    response_model=List[InvoiceListResponse].
+    """
+    return orjson.dumps([_item(row) for row in rows], option=orjson.OPT_UTC_Z)
@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+import orjson
+from prometheus_client import Counter
+from sqlalchemy.orm import Session
+
+from repository.event_repo import EventRepository
+from repository.events import event_message
+
+logger = logging.getLogger(__name__)
+
+# none | log | file | webhook; "none" still marks events published so they can be pruned
+OUTBOX_SINK = os.getenv("OUTBOX_SINK", "none").lower()
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL")
+OUTBOX_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT_SECONDS", "5"))
+OUTBOX_FILE_PATH = os.getenv("OUTBOX_FILE_PATH", "invoice-events.ndjson")
+OUTBOX_RELAY_ENABLED = os.getenv("OUTBOX_RELAY_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+# Published events are kept this long so GET /invoices/changes consumers can catch up after downtime
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "168"))
+OUTBOX_PRUNE_INTERVAL_SECONDS = float(os.getenv("OUTBOX_PRUNE_INTERVAL_SECONDS", "3600"))
+
+OUTBOX_PUBLISHED = Counter(
+    "invoice_outbox_published_total",
+    "Invoice events delivered to the outbox sink",
+    ["sink"],
+)
+OUTBOX_FAILURES = Counter(
+    "invoice_outbox_publish_failures_total",
+    "Outbox batches the sink rejected; they are retried on the next poll",
+    ["sink"],
+)
+
+
+class NullSink:
+    name = "none"
+
+    def publish(self, messages: List[dict]) -> None:
+        pass
+
+
+class LogSink:
+    name = "log"
+
+    def publish(self, messages: List[dict]) -> None:
+        for message in messages:
+            logger.info("invoice event %s", message["type"], extra={"event": message})
+
+
+class MemorySink:
+    """Keeps published messages in a list; for tests and local runs"""
+    name = "memory"
+
+    def __init__(self):
+        self.messages: List[dict] = []
+
+    def publish(self, messages: List[dict]) -> None:
+        self.messages.extend(messages)
+
+
+class FileSink:
+    """Appends one JSON document per line"""
+    name = "file"
+
+    def __init__(self, path: str = OUTBOX_FILE_PATH):
+        self.path = path
+
+    def publish(self, messages: List[dict]) -> None:
+        with open(self.path, "ab") as f:
+            f.write(b"".join(orjson.dumps(message) + b"\n" for message in messages))
+
+
+class WebhookSink:
+    """POSTs each batch as a JSON array; any non-2xx response fails the batch"""
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = OUTBOX_WEBHOOK_TIMEOUT_SECONDS):
+        # Imported here to keep requests off the startup path unless the webhook sink is used
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def publish(self, messages: List[dict]) -> None:
+        response = self.session.post(
+            self.url,
+            data=orjson.dumps(messages),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+
+def sink_from_env():
+    if OUTBOX_SINK == "log":
+        return LogSink()
+    if OUTBOX_SINK == "file":
+        return FileSink(OUTBOX_FILE_PATH)
+    if OUTBOX_SINK == "webhook":
+        if not OUTBOX_WEBHOOK_URL:
+            raise ValueError("OUTBOX_SINK=webhook requires OUTBOX_WEBHOOK_URL")
+        return WebhookSink(OUTBOX_WEBHOOK_URL)
+    if OUTBOX_SINK != "none":
+        raise ValueError(f"Unknown OUTBOX_SINK {OUTBOX_SINK!r}")
+    return NullSink()
+
+
+class OutboxRelay:
+    """Publishes committed invoice_events rows to a sink and prunes old ones.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so every replica can run a
+    relay. A row is marked published only after the sink accepted it; a crash
+    in between publishes it again, so delivery is at-least-once and consumers
+    dedupe by event id.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sink=None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        interval: float = OUTBOX_POLL_INTERVAL_SECONDS,
+        retention: timedelta = timedelta(hours=OUTBOX_RETENTION_HOURS),
+        prune_interval: float = OUTBOX_PRUNE_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.sink = sink or NullSink()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pruned_at: Optional[float] = None
+
+    def run_once(self) -> int:
+        """Publish one batch; returns how many events were published"""
+        with self.session_factory() as db:
+            repo = EventRepository(db)
+            events = repo.claim_unpublished(self.batch_size)
+            if not events:
+                db.rollback()
+                return 0
+            try:
+                self.sink.publish([event_message(event) for event in events])
+            except Exception:
+                db.rollback()
+                OUTBOX_FAILURES.labels(self.sink.name).inc()
+                logger.exception("Outbox sink %s rejected %d events", self.sink.name, len(events))
+                return 0
+            repo.mark_published([event.id for event in events])
+        OUTBOX_PUBLISHED.labels(self.sink.name).inc(len(events))
+        return len(events)
+
+    def prune(self) -> int:
+        with self.session_factory() as db:
+            removed = EventRepository(db).prune(datetime.utcnow() - self.retention)
+        if removed:
+            logger.info("Pruned %d published invoice events", removed)
+        return removed
+
+    def drain(self) -> int:
+        """Publish batches until the backlog is empty or the sink fails"""
+        published = 0
+        while not self._stop.is_set():
+            count = self.run_once()
+            published += count
+            if count < self.batch_size:
+                break
+        return published
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain()
+                if self._pruned_at is None or time.monotonic() - self._pruned_at >= self.prune_interval:
+                    self._pruned_at = time.monotonic()
+                    self.prune()
+            except Exception:
+                # Usually a database outage; keep polling instead of losing the relay thread
+                logger.exception("Outbox relay iteration failed")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
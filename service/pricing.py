@@ -0,0 +1,78 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+MONEY = Decimal("0.01")
+ROUNDING = ROUND_HALF_UP
+DEFAULT_VAT_RATE = Decimal("22")
+
+
+class LinePrice(NamedTuple):
+    unit_price: Decimal
+    vat_rate: Decimal
+    net: Decimal
+    vat: Decimal
+    gross: Decimal
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    """Exact Decimal for a float/str/int; floats go through str to drop binary noise.
+
+    None for "" (an unset proto3 string field) and other unparseable or non-finite values.
+    """
+    if isinstance(value, Decimal):
+        return value if value.is_finite() else None
+    try:
+        result = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    return result if result.is_finite() else None
+
+
+def round_money(value: Decimal) -> Decimal:
+    return value.quantize(MONEY, rounding=ROUNDING)
+
+
+def price_line(amount: int, unit_price, vat_rate) -> LinePrice:
+    """Price one line; net and VAT are each rounded to cents, gross is their sum"""
+    unit_price = round_money(to_decimal(unit_price))
+    vat_rate = to_decimal(vat_rate)
+    net = round_money(unit_price * amount)
+    vat = round_money(net * vat_rate / 100)
+    return LinePrice(unit_price, vat_rate, net, vat, net + vat)
+
+
+def price_from_product(amount: int, product: Optional[dict]) -> Optional[LinePrice]:
+    """Price from a product record; None (line stored unpriced) when cost or VAT rate is missing or invalid"""
+    if not product:
+        return None
+    unit_price = to_decimal(product.get("cost", 0))
+    vat_rate = to_decimal(product.get("ddvPercentage", DEFAULT_VAT_RATE))
+    if unit_price is None or vat_rate is None:
+        return None
+    return price_line(amount, unit_price, vat_rate)
+
+
+def vat_breakdown(lines: Iterable) -> List[dict]:
+    """Net, VAT and gross per VAT rate for lines carrying price snapshots.
+
+    Sums the already rounded line amounts so the breakdown always adds up to
+    the stored invoice total.
+    """
+    rates: Dict[Decimal, List[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for line in lines:
+        if line.net is None:
+            continue
+        totals = rates[to_decimal(line.vat_rate)]
+        totals[0] += line.net
+        totals[1] += line.gross
+    return [
+        {"vat_rate": rate, "net": net, "vat": gross - net, "gross": gross}
+        for rate, (net, gross) in sorted(rates.items())
+    ]
+
+
+def invoice_total(lines: Iterable) -> Optional[Decimal]:
+    """Gross total of the priced lines, None when no line has a price"""
+    grosses = [line.gross for line in lines if line.gross is not None]
+    return sum(grosses, Decimal(0)) if grosses else None
@@ -8,3 +8,43 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import compile_uuid_for_sqlite  # noqa: F401  registers the SQLite UUID type
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def reset(self):
+        self.statements.clear()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def sqlite_session():
+    """In-memory SQLite session on the real models, with a .statements counter"""
+    from models.database import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    session.statements = counter
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
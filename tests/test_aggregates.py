@@ -0,0 +1,145 @@
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import uuid4
+
+from models.database import Invoice, InvoiceAggregate, InvoiceLine, InvoiceStatus
+from models.schemas import SummaryDimension
+from repository.invoice_repo import InvoiceRepository
+from service.invoice_service import InvoiceServiceBase
+
+
+def _invoice(user_id, partner_id, total, issue_date=datetime(2026, 1, 10), status=InvoiceStatus.ISSUED):
+    return Invoice(
+        user_id=user_id,
+        company_id=uuid4(),
+        partner_id=partner_id,
+        invoice_number="INV-000001",
+        issue_date=issue_date,
+        service_date=issue_date,
+        due_date=issue_date,
+        status=status,
+        total=total,
+        lines=[InvoiceLine(product_id=uuid4(), amount=1)],
+    )
+
+
+def _with_ids(invoices):
+    # create_many expects ids assigned up front, as the bulk service does
+    for invoice in invoices:
+        invoice.id = uuid4()
+        for line in invoice.lines:
+            line.id, line.invoice_id = uuid4(), invoice.id
+    return invoices
+
+
+def _summary(repo, user_id, *group_by):
+    rows = repo.get_summary(user_id, list(group_by))
+    return {tuple(row[:-2]): (row.invoice_count, Decimal(row.total)) for row in rows}
+
+
+def test_create_and_bulk_create_maintain_aggregates(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id, partner_a, partner_b = uuid4(), uuid4(), uuid4()
+    repo.create(_invoice(user_id, partner_a, Decimal("100.00")))
+    repo.create_many(_with_ids([
+        _invoice(user_id, partner_a, Decimal("50.50")),
+        _invoice(user_id, partner_b, Decimal("20.00"), issue_date=datetime(2026, 2, 3)),
+        _invoice(uuid4(), partner_b, Decimal("999.00")),
+    ]))
+
+    assert _summary(repo, user_id, SummaryDimension.PARTNER) == {
+        (partner_a,): (2, Decimal("150.50")),
+        (partner_b,): (1, Decimal("20.00")),
+    }
+    assert _summary(repo, user_id, SummaryDimension.MONTH) == {
+        (date(2026, 1, 1),): (2, Decimal("150.50")),
+        (date(2026, 2, 1),): (1, Decimal("20.00")),
+    }
+
+
+def test_update_moves_invoice_between_groups(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    created = repo.create(_invoice(user_id, uuid4(), Decimal("80.00")))
+    repo.create(_invoice(user_id, uuid4(), Decimal("20.00")))
+
+    invoice = repo.get_by_id(created.id, user_id)
+    invoice.status = InvoiceStatus.PAID
+    repo.update(invoice)
+
+    assert _summary(repo, user_id, SummaryDimension.STATUS) == {
+        (InvoiceStatus.ISSUED,): (1, Decimal("20.00")),
+        (InvoiceStatus.PAID,): (1, Decimal("80.00")),
+    }
+
+
+def test_delete_removes_invoice_from_summary(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    created = repo.create(_invoice(user_id, uuid4(), Decimal("80.00")))
+
+    assert repo.delete(created.id, uuid4()) is False
+    assert _summary(repo, user_id) == {(): (1, Decimal("80.00"))}
+    assert repo.delete(created.id, user_id) is True
+    assert repo.get_summary(user_id, [SummaryDimension.STATUS]) == []
+
+
+def test_summary_reads_only_aggregate_rows(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    repo.create_many(_with_ids([_invoice(user_id, uuid4(), Decimal("10.00")) for _ in range(50)]))
+    sqlite_session.statements.reset()
+
+    response = InvoiceServiceBase()._summary_response(
+        [SummaryDimension.STATUS], repo.get_summary(user_id, [SummaryDimension.STATUS])
+    )
+
+    assert sqlite_session.statements.count == 1
+    assert "invoice_aggregates" in sqlite_session.statements.statements[0]
+    assert "FROM invoices" not in sqlite_session.statements.statements[0]
+    assert response.invoice_count == 50
+    assert response.total == 500.0
+    assert response.groups[0].status == InvoiceStatus.ISSUED
+    assert sqlite_session.query(InvoiceAggregate).count() == 50
+
+
+def test_interleaved_updates_keep_the_summary_in_step(sqlite_session):
+    from unittest.mock import MagicMock
+    from sqlalchemy.orm import Session
+    from models.schemas import InvoiceUpdate
+    from service.invoice_service import InvoiceService
+
+    user_id = uuid4()
+    created = InvoiceRepository(sqlite_session).create(_invoice(user_id, uuid4(), Decimal("80.00")))
+    other = Session(bind=sqlite_session.get_bind(), autoflush=False, expire_on_commit=False)
+    # The second writer has already read the invoice as ISSUED when the first one commits PAID
+    stale = InvoiceRepository(other).get_by_id(created.id, user_id)
+    assert stale.status == InvoiceStatus.ISSUED
+
+    first = InvoiceService(sqlite_session, MagicMock(), MagicMock(), MagicMock())
+    second = InvoiceService(other, MagicMock(), MagicMock(), MagicMock())
+    first.update_invoice(created.id, InvoiceUpdate(status=InvoiceStatus.PAID), user_id)
+    second.update_invoice(created.id, InvoiceUpdate(status=InvoiceStatus.CANCELLED), user_id)
+    other.close()
+
+    assert stale.status == InvoiceStatus.CANCELLED
+    repo = InvoiceRepository(sqlite_session)
+    assert _summary(repo, user_id, SummaryDimension.STATUS) == {(InvoiceStatus.CANCELLED,): (1, Decimal("80.00"))}
+
+
+def test_rebuild_repairs_aggregates_missed_by_old_writers(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id, partner_id = uuid4(), uuid4()
+    repo.create(_invoice(user_id, partner_id, Decimal("10.00")))
+    # A pod of the previous release writes invoices without touching the aggregates
+    sqlite_session.add(_invoice(user_id, partner_id, Decimal("5.50"), issue_date=datetime(2026, 2, 3)))
+    sqlite_session.add(_invoice(user_id, partner_id, None, status=InvoiceStatus.PAID))
+    sqlite_session.commit()
+
+    assert repo.rebuild_aggregates() == 3
+
+    assert _summary(repo, user_id, SummaryDimension.STATUS, SummaryDimension.MONTH) == {
+        (InvoiceStatus.ISSUED, date(2026, 1, 1)): (1, Decimal("10.00")),
+        (InvoiceStatus.ISSUED, date(2026, 2, 1)): (1, Decimal("5.50")),
+        (InvoiceStatus.PAID, date(2026, 1, 1)): (1, Decimal("0")),
+    }
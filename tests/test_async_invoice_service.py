@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from models.schemas import InvoiceStatus, InvoiceUpdate
+
+# Line written before price snapshots: products still come from product-service
+LEGACY_LINE = dict(product_name=None, unit_price=None, vat_rate=None, net=None, gross=None)
+
+
+@pytest.fixture
+def async_svc(monkeypatch):
+    import service.async_invoice_service as async_service_module
+
+    mock_repo = MagicMock()
+    mock_repo.get_by_id = AsyncMock()
+    mock_repo.update = AsyncMock(side_effect=lambda inv, line_diff=None: inv)
+    monkeypatch.setattr(async_service_module, "AsyncInvoiceRepository", lambda db: mock_repo)
+
+    svc = async_service_module.AsyncInvoiceService(
+        db=MagicMock(),
+        company_client=MagicMock(get_company=AsyncMock(return_value={"companyName": "ACME"})),
+        partner_client=MagicMock(get_partner=AsyncMock(return_value={"naziv": "Partner"})),
+        product_client=MagicMock(get_products=AsyncMock(return_value=[])),
+    )
+    return svc, mock_repo
+
+
+def _invoice(lines):
+    now = datetime.now(tz=timezone.utc)
+    return MagicMock(
+        id=uuid4(),
+        user_id=uuid4(),
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        notes=None,
+        status=InvoiceStatus.ISSUED,
+        total=None,
+        lines=lines,
+    )
+
+
+def test_get_invoice_response_awaits_enrichment(async_svc):
+    svc, repo = async_svc
+    product_id = uuid4()
+    invoice = _invoice([MagicMock(id=uuid4(), invoice_id=uuid4(), product_id=product_id, amount=1, **LEGACY_LINE)])
+    repo.get_by_id.return_value = invoice
+    svc.product_client.get_products.return_value = [{"id": str(product_id), "name": "Widget"}]
+
+    result = asyncio.run(svc.get_invoice_response(invoice.id, "user-123"))
+
+    assert result.company == {"companyName": "ACME"}
+    assert result.partner == {"naziv": "Partner"}
+    assert result.lines[0].product == {"id": str(product_id), "name": "Widget"}
+
+
+def test_update_invoice_returns_none_if_missing(async_svc):
+    svc, repo = async_svc
+    repo.get_by_id.return_value = None
+
+    assert asyncio.run(svc.update_invoice(uuid4(), InvoiceUpdate(notes="x"), "user-123")) is None
+    repo.update.assert_not_called()
+
+
+def test_async_router_exposes_same_paths_as_sync_router():
+    from api.async_routes import router as async_router
+    from api.routes import router as sync_router
+
+    def endpoints(router):
+        return {(r.path, tuple(sorted(r.methods))) for r in router.routes}
+
+    assert endpoints(async_router) == endpoints(sync_router)
@@ -0,0 +1,114 @@
+import json
+import time
+
+from uuid import UUID
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from api import auth
+
+SECRET = "test-secret-with-enough-entropy-for-hs256"
+USER_ID = "5f0c6f55-2b7a-4a43-9a8e-4f3cbd1a9e01"
+
+
+@pytest.fixture(autouse=True)
+def hs_config(monkeypatch):
+    monkeypatch.setattr(auth, "JWT_VERIFY", True)
+    monkeypatch.setattr(auth, "JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "JWT_ALGORITHMS", ["HS256", "RS256"])
+    monkeypatch.setattr(auth, "JWT_JWKS_FILE", None)
+    monkeypatch.setattr(auth, "JWT_PUBLIC_KEY_FILE", None)
+    auth.reload_keys()
+    yield
+    auth.reload_keys()
+
+
+def _request(token):
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+def _hs_token(**claims):
+    return jwt.encode({"userId": USER_ID, "exp": int(time.time()) + 60, **claims}, SECRET, algorithm="HS256")
+
+
+def test_valid_hs256_token_yields_user_id():
+    assert auth.get_current_user_id(_request(_hs_token())) == UUID(USER_ID)
+
+
+def test_claims_are_verified_once_per_token(monkeypatch):
+    decoded = []
+    decode = auth._decode
+    monkeypatch.setattr(auth, "_decode", lambda token: decoded.append(token) or decode(token))
+    token = _hs_token()
+
+    for _ in range(3):
+        assert auth.get_current_user_id(_request(token)) == UUID(USER_ID)
+
+    assert decoded == [token]
+
+
+def test_cached_claims_expire_with_the_token(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(auth.time, "time", lambda: now[0])
+    decoded = []
+    decode = auth._decode
+    monkeypatch.setattr(auth, "_decode", lambda token: decoded.append(token) or decode(token))
+    token = _hs_token(exp=int(now[0]) + 30)
+
+    auth.verify_token(token)
+    now[0] += 20
+    auth.verify_token(token)
+    now[0] += 11
+    auth.verify_token(token)
+
+    assert len(decoded) == 2
+
+
+@pytest.mark.parametrize(
+    "token, detail",
+    [
+        (jwt.encode({"userId": USER_ID}, "another-secret-of-sufficient-length", algorithm="HS256"), "Invalid token"),
+        (jwt.encode({"userId": USER_ID, "exp": 1}, SECRET, algorithm="HS256"), "Token expired"),
+        (jwt.encode({"userId": USER_ID}, None, algorithm="none"), "Invalid token"),
+        (jwt.encode({"sub": USER_ID}, SECRET, algorithm="HS256"), "UserId not found in token"),
+        (jwt.encode({"userId": "user-1"}, SECRET, algorithm="HS256"), "Invalid userId in token"),
+        ("not-a-jwt", "Invalid token"),
+    ],
+)
+def test_rejected_tokens(token, detail):
+    with pytest.raises(HTTPException) as error:
+        auth.get_current_user_id(_request(token))
+
+    assert error.value.status_code == 401
+    assert error.value.detail == detail
+
+
+def test_rs256_token_is_verified_against_jwks_file(tmp_path, monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwks_file = tmp_path / "jwks.json"
+    jwks_file.write_text(json.dumps({"keys": [{**jwk, "kid": "k1", "use": "sig", "alg": "RS256"}]}))
+    monkeypatch.setattr(auth, "JWT_JWKS_FILE", str(jwks_file))
+    auth.reload_keys()
+
+    token = jwt.encode({"userId": USER_ID}, private_key, algorithm="RS256", headers={"kid": "k1"})
+    unknown_kid = jwt.encode({"userId": USER_ID}, private_key, algorithm="RS256", headers={"kid": "k2"})
+
+    assert auth.get_current_user_id(_request(token)) == UUID(USER_ID)
+    with pytest.raises(HTTPException):
+        auth.get_current_user_id(_request(unknown_kid))
+
+
+def test_lru_bound_evicts_oldest_tokens():
+    cache = auth.ClaimsCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, {"userId": key})
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("c") == {"userId": "c"}
@@ -0,0 +1,21 @@
+from benchmarks.load import compare, percentile, summarize
+
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_and_comparison():
+    current = {"results": {"list": summarize([0.01, 0.02, 0.03, 0.04], errors=1, elapsed=2)}}
+    baseline = {"commit": "abc123", "results": {"list": {"rps": 4.0, "p50_ms": 10.0, "p99_ms": 40.0}}}
+
+    assert current["results"]["list"]["rps"] == 2.0
+    assert current["results"]["list"]["error_rate"] == 0.25
+    lines = compare(current, baseline)
+    assert lines[0] == "compared with abc123:"
+    assert lines[-1].split() == ["list", "-50.0%", "+100.0%", "+0.0%"]
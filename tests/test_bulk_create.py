@@ -0,0 +1,104 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from models.database import Invoice, InvoiceLine
+from models.schemas import InvoiceCreate, InvoiceLineCreate
+from repository.invoice_repo import InvoiceRepository
+from service.invoice_service import InvoiceService
+
+
+def _item(company_id, partner_id, product_ids, invoice_number=None):
+    now = datetime(2026, 1, 31)
+    return InvoiceCreate(
+        company_id=company_id,
+        partner_id=partner_id,
+        invoice_number=invoice_number,
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        lines=[InvoiceLineCreate(product_id=pid, amount=1) for pid in product_ids],
+    )
+
+
+@pytest.fixture
+def clients():
+    company, partner, product = MagicMock(), MagicMock(), MagicMock()
+    company.get_companies.side_effect = lambda ids, timeout=5, **_: [
+        {"id": cid, "companyName": f"C-{cid[:4]}"} for cid in ids
+    ]
+    partner.get_partners.side_effect = lambda ids, timeout=5, **_: [{"id": pid, "naziv": f"P-{pid[:4]}"} for pid in ids]
+    product.get_products.side_effect = lambda ids, timeout=5, **_: [
+        {"id": pid, "cost": "10.00", "ddvPercentage": "22"} for pid in ids
+    ]
+    return company, partner, product
+
+
+def test_bulk_create_dedupes_lookups_and_inserts_set_wise(sqlite_session, clients):
+    company, partner, product = clients
+    svc = InvoiceService(sqlite_session, company, partner, product)
+    company_id, partner_id = uuid4(), uuid4()
+    products = [uuid4(), uuid4()]
+    items = [_item(company_id, partner_id, products) for _ in range(4)]
+    sqlite_session.statements.reset()
+
+    response = svc.create_invoices_bulk(items, uuid4())
+
+    assert response.created == 4 and response.failed == 0
+    assert [r.invoice_number for r in response.results] == [f"INV-2026-00000{i}" for i in range(1, 5)]
+    # Snapshots are persisted, so bulk lookups bypass the enrichment cache
+    company.get_companies.assert_called_once_with([str(company_id)], timeout=5, max_age=0)
+    partner.get_partners.assert_called_once_with([str(partner_id)], timeout=5, max_age=0)
+    company.get_company.assert_not_called()
+    product.get_products.assert_called_once()
+    assert sorted(product.get_products.call_args.args[0]) == sorted(str(p) for p in products)
+    # one counter upsert, one INSERT each for invoices, lines and outbox events, and one aggregate upsert
+    assert sqlite_session.statements.count == 5
+    assert sqlite_session.query(Invoice).count() == 4
+    assert sqlite_session.query(InvoiceLine).count() == 8
+    stored = sqlite_session.query(Invoice).first()
+    assert stored.partner_name.startswith("P-") and float(stored.total) == pytest.approx(24.4)
+
+
+def test_bulk_create_reports_partial_failures(sqlite_session, clients, monkeypatch):
+    svc = InvoiceService(sqlite_session, *clients)
+    company_id = uuid4()
+    items = [_item(company_id, uuid4(), [uuid4()]) for _ in range(3)]
+    original = InvoiceRepository.create_many
+
+    def fail_on_poisoned(self, invoices):
+        if any(inv.notes == "poison" for inv in invoices):
+            raise RuntimeError("constraint violated")
+        return original(self, invoices)
+
+    monkeypatch.setattr(InvoiceRepository, "create_many", fail_on_poisoned)
+    items[1].notes = "poison"
+
+    response = svc.create_invoices_bulk(items, uuid4())
+
+    assert (response.created, response.failed) == (2, 1)
+    assert [r.success for r in response.results] == [True, False, True]
+    assert response.results[1].invoice_id is None
+    assert sqlite_session.query(Invoice).count() == 2
+    # Numbers reserved by the failed chunk were rolled back, so none are skipped
+    numbers = sorted(r.invoice_number for r in response.results if r.success)
+    assert numbers == ["INV-2026-000001", "INV-2026-000002"]
+
+
+def test_bulk_create_stores_products_without_a_price_unpriced(sqlite_session, clients):
+    company, partner, product = clients
+    priced, unpriced = uuid4(), uuid4()
+    product.get_products.side_effect = lambda ids, timeout=5, **_: [
+        {"id": str(priced), "cost": "10.00", "ddvPercentage": "22"},
+        {"id": str(unpriced), "cost": "", "ddvPercentage": ""},  # unset proto3 strings
+    ]
+    svc = InvoiceService(sqlite_session, company, partner, product)
+
+    response = svc.create_invoices_bulk([_item(uuid4(), uuid4(), [priced, unpriced])], uuid4())
+
+    assert (response.created, response.failed) == (1, 0)
+    lines = {line.product_id: line for line in sqlite_session.query(InvoiceLine).all()}
+    assert lines[unpriced].gross is None and lines[unpriced].unit_price is None
+    assert float(sqlite_session.query(Invoice).one().total) == pytest.approx(12.2)
@@ -0,0 +1,178 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from client import cache
+from client.cache import CachedCompanyClient, CachedPartnerClient, CachedProductClient, TTLCache
+from models.schemas import CacheEntity, CacheInvalidateRequest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for c in cache.CACHES.values():
+        c.invalidate()
+    yield
+    for c in cache.CACHES.values():
+        c.invalidate()
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    c = TTLCache("test", ttl_seconds=10, max_entries=10)
+
+    c.set("a", 1)
+    assert c.get("a") == 1
+    now[0] += 11
+    assert c.get("a") is None
+    assert c.stats()["hits"] == 1
+    assert c.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    c = TTLCache("test", ttl_seconds=60, max_entries=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+
+    assert c.get("b") is None
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+
+
+def test_company_lookups_are_served_from_cache():
+    inner = MagicMock()
+    inner.get_company.return_value = {"id": "c1", "companyName": "ACME"}
+    client = CachedCompanyClient(inner=inner)
+
+    assert client.get_company("c1") == {"id": "c1", "companyName": "ACME"}
+    assert client.get_company("c1") == {"id": "c1", "companyName": "ACME"}
+    inner.get_company.assert_called_once()
+
+
+def test_failed_lookups_are_not_cached():
+    inner = MagicMock()
+    inner.get_company.return_value = None
+    client = CachedCompanyClient(inner=inner)
+
+    assert client.get_company("c1") is None
+    assert client.get_company("c1") is None
+    assert inner.get_company.call_count == 2
+
+
+def test_products_only_fetch_missing_ids():
+    inner = MagicMock()
+    inner.get_products.side_effect = lambda ids, timeout=5: [{"id": pid, "name": pid.upper()} for pid in ids]
+    client = CachedProductClient(inner=inner)
+
+    client.get_products(["p1", "p2"])
+    result = client.get_products(["p2", "p3", "p1"])
+
+    assert [p["id"] for p in result] == ["p2", "p3", "p1"]
+    assert inner.get_products.call_args_list[-1].args[0] == ["p3"]
+
+
+def test_batched_partner_lookups_only_fetch_missing_ids():
+    inner = MagicMock()
+    inner.get_partners.side_effect = lambda ids, timeout=5: [{"id": pid} for pid in ids if pid != "gone"]
+    client = CachedPartnerClient(inner=inner)
+    cache.partner_cache.set("p1", {"id": "p1", "naziv": "cached"})
+
+    result = client.get_partners(["p1", "p2", "gone", "p2"])
+
+    assert result == [{"id": "p1", "naziv": "cached"}, {"id": "p2"}]
+    inner.get_partners.assert_called_once_with(["p2", "gone"], timeout=5)
+    assert client.get_partners(["p2"]) == [{"id": "p2"}]
+    assert inner.get_partners.call_count == 1
+
+
+def test_invalidate_endpoint_evicts_keys():
+    from api.admin_routes import cache_stats, invalidate_cache
+
+    cache.company_cache.set("c1", {"id": "c1"})
+    cache.company_cache.set("c2", {"id": "c2"})
+
+    response = invalidate_cache(CacheInvalidateRequest(entity=CacheEntity.COMPANY, ids=["c1"]))
+
+    assert response.evicted == 1 and response.pod
+    assert cache.company_cache.get("c1") is None
+    assert cache_stats()["company"]["entries"] == 1
+
+
+def test_internal_endpoints_require_the_shared_token(monkeypatch):
+    from fastapi import HTTPException
+
+    from api import admin_routes
+
+    assert all(
+        [d.dependency for d in route.dependencies] == [admin_routes.require_internal_token]
+        for route in admin_routes.router.routes
+    )
+    monkeypatch.setattr(admin_routes, "INTERNAL_API_TOKEN", None)
+    with pytest.raises(HTTPException) as unset:
+        admin_routes.require_internal_token("anything")
+    assert unset.value.status_code == 403
+
+    monkeypatch.setattr(admin_routes, "INTERNAL_API_TOKEN", "s3cret")
+    for header in (None, "wrong"):
+        with pytest.raises(HTTPException) as rejected:
+            admin_routes.require_internal_token(header)
+        assert rejected.value.status_code == 401
+    assert admin_routes.require_internal_token("s3cret") is None
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_max_age_serves_stale_entries_and_refreshes_in_background(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(cache, "_refresh_executor", _InlineExecutor())
+    inner = MagicMock()
+    inner.get_company.return_value = {"id": "c1", "companyName": "New name"}
+    client = CachedCompanyClient(inner=inner)
+    cache.company_cache.set("c1", {"id": "c1", "companyName": "Old name"})
+    now[0] += 30
+
+    assert client.get_company("c1", max_age=60) == {"id": "c1", "companyName": "Old name"}
+    inner.get_company.assert_not_called()
+
+    assert client.get_company("c1", max_age=10) == {"id": "c1", "companyName": "Old name"}
+    inner.get_company.assert_called_once()
+    assert cache.company_cache.peek("c1") == (0.0, {"id": "c1", "companyName": "New name"})
+
+
+def test_max_age_skips_lookup_for_uncached_ids():
+    submitted = []
+    inner = MagicMock()
+    client = CachedPartnerClient(inner=inner)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(cache._refresh_executor, "submit", lambda fn, *args: submitted.append(args[1]))
+        assert client.get_partner("p1", max_age=5) is None
+
+    inner.get_partner.assert_not_called()
+    assert submitted == [["p1"]]
+
+
+def test_max_age_zero_bypasses_cache():
+    inner = MagicMock()
+    inner.get_products.side_effect = lambda ids, timeout=5: [{"id": pid, "name": "live"} for pid in ids]
+    client = CachedProductClient(inner=inner)
+    cache.product_cache.set("p1", {"id": "p1", "name": "cached"})
+
+    assert client.get_products(["p1"], max_age=0) == [{"id": "p1", "name": "live"}]
+    assert cache.product_cache.get("p1") == {"id": "p1", "name": "live"}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [(None, None), ("no-cache", 0.0), ("max-age=0", 0.0), ("public, max-age=30", 30.0), ("max-age=abc", None)],
+)
+def test_cache_control_freshness(header, expected):
+    from api.routes import parse_cache_control
+
+    assert parse_cache_control(header) == expected
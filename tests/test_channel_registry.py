@@ -0,0 +1,50 @@
+import pytest
+
+from client.channel_registry import ChannelRegistry
+from client.company_client import CompanyClient
+from client.product_client import ProductClient
+
+
+def test_channels_are_reused_per_target():
+    registry = ChannelRegistry(subchannels=1)
+    try:
+        first = registry.get_channel("localhost:50051")
+        second = registry.get_channel("localhost:50051")
+        other = registry.get_channel("localhost:50052")
+        assert first is second
+        assert other is not first
+        assert sorted(registry.targets()) == ["localhost:50051", "localhost:50052"]
+    finally:
+        registry.close()
+
+
+def test_subchannels_are_handed_out_round_robin():
+    registry = ChannelRegistry(subchannels=2)
+    try:
+        a = registry.get_channel("localhost:50051")
+        b = registry.get_channel("localhost:50051")
+        c = registry.get_channel("localhost:50051")
+        assert a is not b
+        assert a is c
+    finally:
+        registry.close()
+
+
+def test_clients_are_shared_and_borrow_pooled_channels():
+    registry = ChannelRegistry(subchannels=1)
+    try:
+        company = registry.get_client(CompanyClient)
+        assert registry.get_client(CompanyClient) is company
+        # Product client talks to the same target and must reuse the channel
+        product = registry.get_client(ProductClient)
+        assert product.channel is company.channel
+    finally:
+        registry.close()
+
+
+def test_closed_registry_rejects_lookups():
+    registry = ChannelRegistry(subchannels=1)
+    registry.get_channel("localhost:50051")
+    registry.close()
+    with pytest.raises(RuntimeError):
+        registry.get_channel("localhost:50051")
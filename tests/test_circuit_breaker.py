@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+import grpc
+import pytest
+
+from client import circuit_breaker
+from client.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, guarded_call
+from client.company_client import CompanyClient
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(circuit_breaker.time, "sleep", lambda seconds: None)
+    return now
+
+
+def _breaker(**kwargs):
+    options = dict(window_size=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1, slow_call_rate=0.75, open_seconds=10)
+    options.update(kwargs)
+    return CircuitBreaker("test:1", **options)
+
+
+def test_opens_on_error_rate_and_recovers_through_half_open(clock):
+    breaker = _breaker()
+    for failed in (False, True, False, True):
+        assert breaker.allow()
+        breaker.record(failed, 0.01)
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock[0] += 10
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_open_the_circuit_and_failed_probe_reopens(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False, 2.0)
+    assert breaker.state == OPEN
+
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN and not breaker.allow()
+
+
+def test_transient_errors_are_retried_within_the_deadline(clock):
+    breaker = _breaker(min_calls=10)
+    method = MagicMock(side_effect=[FakeRpcError(grpc.StatusCode.UNAVAILABLE), "ok"])
+
+    assert guarded_call(breaker, method, "req", timeout=5, attempts=2) == "ok"
+    assert method.call_count == 2
+
+
+def test_not_found_is_neither_retried_nor_counted_as_failure(clock):
+    breaker = _breaker(min_calls=1, window_size=1)
+    method = MagicMock(side_effect=FakeRpcError(grpc.StatusCode.NOT_FOUND))
+
+    with pytest.raises(grpc.RpcError):
+        guarded_call(breaker, method, "req", timeout=5, attempts=3)
+
+    assert method.call_count == 1
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_fails_fast_without_calling_the_service(clock):
+    client = CompanyClient(channel=MagicMock())
+    client.breaker = _breaker(min_calls=2, window_size=2)
+    client.stub = MagicMock()
+    client.stub.GetCompany.side_effect = FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED)
+
+    assert client.get_company("c1") is None
+    assert client.get_company("c2") is None
+    assert client.breaker.state == OPEN
+    calls = client.stub.GetCompany.call_count
+
+    assert client.get_company("c3") is None
+    assert client.stub.GetCompany.call_count == calls
+    with pytest.raises(CircuitOpenError):
+        guarded_call(client.breaker, client.stub.GetCompany, "req", timeout=5)
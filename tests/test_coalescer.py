@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+import pytest
+
+from client.coalescer import AsyncBatchLoader, BatchLoader, CoalescingCompanyClient
+from client.company_client import CompanyClient
+from client.partner_client import AsyncPartnerClient, PartnerClient
+from client.stand_in import StandInServer
+
+COMPANIES = [{"id": f"c{i}", "companyName": f"Company {i}", "vatPayer": True} for i in range(5)]
+PARTNERS = [{"id": f"p{i}", "naziv": f"Partner {i}", "rokPlacila": 30} for i in range(3)]
+
+
+@pytest.fixture
+def stand_in():
+    with StandInServer(COMPANIES, PARTNERS) as server:
+        yield server
+
+
+@pytest.fixture
+def channel(stand_in):
+    channel = grpc.insecure_channel(stand_in.target)
+    yield channel
+    channel.close()
+
+
+def test_batch_rpcs_return_known_records_only(stand_in, channel):
+    companies = CompanyClient(channel=channel).get_companies(["c1", "c3", "missing"])
+    partners = PartnerClient(channel=channel).get_partners(["p2"])
+
+    assert [(c["id"], c["companyName"], c["vatPayer"]) for c in companies] == [
+        ("c1", "Company 1", True),
+        ("c3", "Company 3", True),
+    ]
+    assert [(p["id"], p["rokPlacila"]) for p in partners] == [("p2", 30)]
+    assert stand_in.calls["GetCompanies"] == 1 and stand_in.calls["GetCompany"] == 0
+
+
+def test_batch_falls_back_to_single_lookups_on_old_servers(channel, stand_in):
+    stand_in.batch_rpcs = False
+
+    companies = CompanyClient(channel=channel).get_companies(["c0", "missing", "c2"])
+
+    assert [c["id"] for c in companies] == ["c0", "c2"]
+    assert stand_in.calls["GetCompany"] == 3
+
+
+def test_batch_rpc_is_not_retried_after_unimplemented(channel, stand_in):
+    stand_in.batch_rpcs = False
+    client = CoalescingCompanyClient(inner=CompanyClient(channel=channel))
+    client.loader.window_seconds = 60
+
+    assert [c["id"] for c in client.inner.get_companies(["c0", "c1"])] == ["c0", "c1"]
+    assert [c["id"] for c in client.inner.get_companies(["c2", "c3"])] == ["c2", "c3"]
+    # Known to be unsupported, so a single lookup neither waits for the window nor tries the batch RPC
+    assert client.get_company("c4")["id"] == "c4"
+
+    assert stand_in.calls["GetCompanies"] == 1
+    assert stand_in.calls["GetCompany"] == 5
+
+
+def test_async_batch_rpc_is_not_retried_after_unimplemented(stand_in):
+    stand_in.batch_rpcs = False
+
+    async def run():
+        async with grpc.aio.insecure_channel(stand_in.target) as channel:
+            client = AsyncPartnerClient(channel=channel)
+            first = await client.get_partners(["p0", "missing"])
+            second = await client.get_partners(["p1", "p2"])
+            return first + second
+
+    assert [p["id"] for p in asyncio.run(run())] == ["p0", "p1", "p2"]
+    assert stand_in.calls["GetPartners"] == 1
+    assert stand_in.calls["GetPartner"] == 4
+
+
+def test_concurrent_single_lookups_share_one_rpc(stand_in, channel):
+    client = CoalescingCompanyClient(inner=CompanyClient(channel=channel))
+    client.loader.window_seconds = 0.05
+    ids = ["c0", "c1", "c2", "c1", "missing"]
+    start = threading.Barrier(len(ids))
+
+    def lookup(company_id):
+        start.wait()
+        return client.get_company(company_id)
+
+    with ThreadPoolExecutor(len(ids)) as pool:
+        results = list(pool.map(lookup, ids))
+
+    assert [r and r["id"] for r in results] == ["c0", "c1", "c2", "c1", None]
+    assert stand_in.calls["GetCompanies"] == 1
+    assert sorted(stand_in.requested_ids["GetCompanies"]) == ["c0", "c1", "c2", "missing"]
+
+
+def test_full_batch_dispatches_without_waiting_for_window():
+    batches = []
+    loader = BatchLoader(lambda ids, timeout: batches.append(ids) or [{"id": i} for i in ids], window_ms=60000, max_batch=1)
+
+    assert loader.load("a") == {"id": "a"}
+    assert batches == [["a"]]
+
+
+def test_failed_batch_resolves_every_waiter_to_none():
+    def fail(ids, timeout):
+        raise RuntimeError("boom")
+
+    assert BatchLoader(fail, window_ms=1).load("a") is None
+
+
+def test_async_loader_merges_concurrent_loads():
+    calls = []
+
+    async def batch(ids, timeout):
+        calls.append(sorted(ids))
+        return [{"id": i} for i in ids if i != "missing"]
+
+    async def run():
+        loader = AsyncBatchLoader(batch, window_ms=5)
+        return await asyncio.gather(*(loader.load(i) for i in ["x", "y", "x", "missing"]))
+
+    results = asyncio.run(run())
+
+    assert results == [{"id": "x"}, {"id": "y"}, {"id": "x"}, None]
+    assert calls == [["missing", "x", "y"]]
+
+
+def test_stand_in_injects_latency_and_errors(stand_in, channel):
+    stand_in.error_rate = 1
+
+    assert CompanyClient(channel=channel).get_company("c1", timeout=1) is None
+    assert stand_in.calls["GetCompany"] >= 1
+
+    stand_in.error_rate, stand_in.latency_ms = 0, 200
+    assert PartnerClient(channel=channel).get_partner("p1", timeout=0.05) is None
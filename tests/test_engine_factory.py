@@ -0,0 +1,64 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import exc, text
+
+import config
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(config, "DB_POOL_TIMEOUT_SECONDS", 0.05)
+
+
+def test_postgres_session_settings_per_driver(monkeypatch):
+    monkeypatch.setattr(config, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    sync = config.engine_options("postgresql://u:p@db/invoices", "replica")
+    asyncpg = config.engine_options("postgresql+asyncpg://u:p@db/invoices")
+
+    assert sync["connect_args"] == {
+        "application_name": "invoice-service-replica",
+        "options": "-c statement_timeout=5000",
+    }
+    assert asyncpg["connect_args"] == {
+        "server_settings": {"application_name": "invoice-service", "statement_timeout": "5000"}
+    }
+    assert sync["pool_pre_ping"] is config.DB_POOL_PRE_PING
+    assert config.engine_options("sqlite:///x.db")["connect_args"] == {}
+
+
+def test_checkouts_are_timed_and_utilization_exported(tmp_path, small_pool):
+    engine = config.create_db_engine(f"sqlite:///{tmp_path}/pool.db", "test-util")
+    before = _sample("invoice_db_pool_checkout_seconds_count", pool="test-util")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _sample("invoice_db_pool_utilization", pool="test-util") == 1.0
+            assert _sample("invoice_db_pool_connections", pool="test-util", state="in_use") == 1
+
+        assert _sample("invoice_db_pool_checkout_seconds_count", pool="test-util") == before + 1
+        assert _sample("invoice_db_pool_utilization", pool="test-util") == 0.0
+
+        # dispose() swaps in a new pool of the same class, which keeps reporting
+        engine.dispose()
+        with engine.connect():
+            assert _sample("invoice_db_pool_connections", pool="test-util", state="in_use") == 1
+    finally:
+        engine.dispose()
+
+
+def test_exhausted_pool_times_out_and_is_counted(tmp_path, small_pool):
+    engine = config.create_db_engine(f"sqlite:///{tmp_path}/pool.db", "test-timeout")
+    try:
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        assert _sample("invoice_db_pool_checkout_timeouts_total", pool="test-timeout") == 1
+    finally:
+        engine.dispose()
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import REGISTRY
+
+from service.enrichment import fan_out
+
+
+def test_fan_out_runs_calls_concurrently():
+    def slow(value):
+        def call():
+            time.sleep(0.2)
+            return value
+        return call
+
+    started = time.monotonic()
+    results = fan_out({"a": slow(1), "b": slow(2), "c": slow(3)}, deadline=2)
+    elapsed = time.monotonic() - started
+
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert elapsed < 0.5
+
+
+def test_fan_out_returns_none_for_late_and_failing_calls():
+    def boom():
+        raise RuntimeError("down")
+
+    started = time.monotonic()
+    results = fan_out(
+        {"fast": lambda: "ok", "slow": lambda: time.sleep(1) or "late", "broken": boom},
+        deadline=0.1,
+    )
+    elapsed = time.monotonic() - started
+
+    assert results == {"fast": "ok", "slow": None, "broken": None}
+    assert elapsed < 0.5
+
+
+def test_queued_calls_get_the_deadline_from_when_they_start():
+    pool = ThreadPoolExecutor(max_workers=1)
+    calls = {"inline": lambda: "first", "a": lambda: time.sleep(0.15) or "a", "b": lambda: time.sleep(0.15) or "b"}
+
+    # b waits 0.15s for the single worker, then finishes within 0.2s of starting
+    results = fan_out(calls, deadline=0.2, executor=pool)
+
+    assert results == {"inline": "first", "a": "a", "b": "b"}
+    pool.shutdown()
+
+
+def test_deadline_misses_are_counted_by_stage():
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    def misses(stage):
+        return REGISTRY.get_sample_value(
+            "invoice_enrichment_deadline_misses_total", {"call": "stuck", "stage": stage}
+        ) or 0
+
+    before = misses("running"), misses("queued")
+    results = fan_out({"inline": lambda: None, "stuck": lambda: time.sleep(0.3)}, deadline=0.05, executor=pool)
+
+    assert results == {"inline": None, "stuck": None}
+    assert (misses("running"), misses("queued")) == (before[0] + 1, before[1])
+    pool.shutdown()
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api import routes
+from models.database import Invoice, InvoiceLine, InvoiceStatus
+from models.schemas import InvoiceListFilters, InvoiceUpdate, SortOrder
+from repository.invoice_repo import InvoiceRepository, invoice_query
+from service.invoice_service import InvoiceService
+
+
+@pytest.fixture(autouse=True)
+def token_user(monkeypatch):
+    # SQLite binds UUID columns from UUID objects only; Postgres also takes the token's string
+    monkeypatch.setattr(routes, "extract_user_id_from_token", lambda request: request.state.user_id)
+
+
+def _request(user_id, if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    request = Request({"type": "http", "method": "GET", "path": "/invoices", "headers": headers, "query_string": b""})
+    request.state.user_id = user_id
+    return request
+
+
+def _service(session):
+    company_client, partner_client, product_client = MagicMock(), MagicMock(), MagicMock()
+    company_client.get_company.return_value = {"id": "c1", "companyName": "ACME"}
+    partner_client.get_partner.return_value = {"id": "p1", "naziv": "Partner"}
+    product_client.get_products.return_value = []
+    return InvoiceService(
+        session, company_client=company_client, partner_client=partner_client, product_client=product_client
+    )
+
+
+def _seed(session, user_id):
+    now = datetime(2026, 1, 10, 12, 0)
+    invoice = Invoice(
+        user_id=user_id,
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        status=InvoiceStatus.ISSUED,
+        lines=[InvoiceLine(product_id=uuid4(), amount=1)],
+    )
+    return InvoiceRepository(session).create(invoice)
+
+
+def test_update_bumps_version_and_updated_at(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    invoice = _seed(sqlite_session, user_id)
+    created_at = invoice.updated_at
+    assert invoice.version == 1
+
+    invoice.notes = "changed"
+    repo.update(invoice)
+
+    assert repo.get_version(invoice.id, user_id) == 2
+    assert invoice.updated_at >= created_at
+    assert repo.get_version(invoice.id, uuid4()) is None
+
+
+def test_updates_read_the_version_under_a_row_lock(sqlite_session):
+    user_id = uuid4()
+    invoice = _seed(sqlite_session, user_id)
+    # Another writer commits version 5 while this session still holds version 1
+    sqlite_session.execute(
+        update(Invoice).where(Invoice.id == invoice.id).values(version=5).execution_options(synchronize_session=False)
+    )
+
+    response = _service(sqlite_session).update_invoice(invoice.id, InvoiceUpdate(notes="changed"), user_id)
+
+    assert response.version == 6
+    assert "FOR UPDATE" in str(invoice_query(invoice.id, user_id, for_update=True).compile(dialect=postgresql.dialect()))
+
+
+def test_matching_etag_returns_304_without_loading_lines_or_enriching(sqlite_session):
+    user_id = uuid4()
+    invoice = _seed(sqlite_session, user_id)
+    service = _service(sqlite_session)
+    sqlite_session.statements.reset()
+
+    result = routes.get_invoice(invoice.id, _request(user_id, 'W/"1"'), Response(), None, service)
+
+    assert result.status_code == 304
+    assert result.headers["etag"] == 'W/"1"'
+    assert sqlite_session.statements.count == 1
+    service.company_client.get_company.assert_not_called()
+    service.partner_client.get_partner.assert_not_called()
+
+
+def test_stale_etag_returns_full_response_with_new_etag(sqlite_session):
+    user_id = uuid4()
+    invoice = _seed(sqlite_session, user_id)
+    invoice.notes = "changed"
+    InvoiceRepository(sqlite_session).update(invoice)
+    response = Response()
+
+    result = routes.get_invoice(invoice.id, _request(user_id, 'W/"1"'), response, None, _service(sqlite_session))
+
+    assert result.version == 2
+    assert response.headers["etag"] == 'W/"2"'
+    assert response.headers["cache-control"] == routes.CACHE_CONTROL
+
+
+def test_list_etag_follows_invoice_versions(sqlite_session):
+    user_id = uuid4()
+    invoice = _seed(sqlite_session, user_id)
+    service = _service(sqlite_session)
+
+    def list_page(if_none_match=None):
+        return routes.get_invoices(
+            _request(user_id, if_none_match), InvoiceListFilters(), None, None, SortOrder.DESC, service
+        )
+
+    etag = list_page().headers["etag"]
+    assert list_page(etag).status_code == 304
+
+    invoice.notes = "changed"
+    InvoiceRepository(sqlite_session).update(invoice)
+
+    response = list_page(etag)
+    assert response.status_code == 200
+    assert [item["version"] for item in json.loads(response.body)] == [2]
+    assert response.headers["etag"] != etag
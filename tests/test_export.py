@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from models.database import Invoice, InvoiceStatus
+from models.schemas import ExportFormat, InvoiceListFilters, InvoiceListResponse
+from repository.invoice_repo import InvoiceRepository
+from service.export import EXPORT_FIELDS, encode_export
+
+
+def _seed(session, user_id, count):
+    start = datetime(2026, 1, 1)
+    for i in range(count):
+        session.add(
+            Invoice(
+                user_id=user_id,
+                company_id=uuid4(),
+                partner_id=uuid4(),
+                invoice_number=f"INV-2026-{i + 1:06d}",
+                issue_date=start + timedelta(days=i),
+                service_date=start,
+                due_date=start,
+                notes="a, \"quoted\" note" if i == 0 else None,
+                status=InvoiceStatus.PAID if i % 2 else InvoiceStatus.ISSUED,
+                company_name="ACME",
+                partner_name="Partner",
+                total=Decimal("12.20"),
+            )
+        )
+    session.commit()
+
+
+def test_rows_are_streamed_in_batches(sqlite_session):
+    user_id = uuid4()
+    _seed(sqlite_session, user_id, 5)
+
+    batches = list(InvoiceRepository(sqlite_session).iter_list_batches(user_id, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batches[0][0].invoice_number == "INV-2026-000005"
+
+
+def test_ndjson_lines_match_list_response_schema(sqlite_session):
+    user_id = uuid4()
+    _seed(sqlite_session, user_id, 3)
+    repo = InvoiceRepository(sqlite_session)
+
+    lines = b"".join(encode_export(repo.iter_list_batches(user_id), ExportFormat.NDJSON)).decode().splitlines()
+    expected = [
+        json.loads(InvoiceListResponse.model_validate(inv).model_dump_json())
+        for inv in repo.get_all(user_id)
+    ]
+
+    assert [json.loads(line) for line in lines] == expected
+
+
+def test_csv_export_has_header_and_applies_filters(sqlite_session):
+    user_id = uuid4()
+    _seed(sqlite_session, user_id, 4)
+    filters = InvoiceListFilters(status="ISSUED")
+
+    body = b"".join(
+        encode_export(InvoiceRepository(sqlite_session).iter_list_batches(user_id, filters), ExportFormat.CSV)
+    )
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+
+    assert list(rows[0].keys()) == EXPORT_FIELDS
+    assert [row["invoice_number"] for row in rows] == ["INV-2026-000003", "INV-2026-000001"]
+    assert rows[1]["notes"] == 'a, "quoted" note'
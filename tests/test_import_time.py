@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cold import of main, in milliseconds; measured around 1s on a developer laptop.
+# Raise it deliberately (or via IMPORT_TIME_BUDGET_MS on slow CI runners) when adding a dependency.
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+# Loaded on first use, never while the app starts
+LAZY_MODULES = (
+    "client.company_pb2",
+    "client.partner_pb2",
+    "client.product_pb2",
+    "sqlalchemy.ext.asyncio",
+    "alembic",
+)
+
+
+def _import_main():
+    """{module: cumulative microseconds} from python -X importtime in a fresh interpreter"""
+    env = {**os.environ, "ASYNC_MODE": "false"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.setdefault(name.strip(), int(cumulative))
+    return timings
+
+
+@pytest.fixture(scope="module")
+def timings():
+    return _import_main()
+
+
+def test_main_imports_within_budget(timings):
+    assert timings["main"] / 1000 <= IMPORT_TIME_BUDGET_MS, sorted(timings.items(), key=lambda kv: -kv[1])[:15]
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_heavy_modules_stay_off_the_startup_path(timings, module):
+    assert module not in timings
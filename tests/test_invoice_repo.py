@@ -0,0 +1,123 @@
+from datetime import datetime
+from uuid import uuid4
+
+from models.database import Invoice, InvoiceLine, InvoiceStatus
+from repository.invoice_repo import InvoiceRepository
+
+
+def _invoice(user_id, lines=2):
+    now = datetime(2026, 1, 10, 12, 0)
+    return Invoice(
+        user_id=user_id,
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        status=InvoiceStatus.ISSUED,
+        lines=[InvoiceLine(product_id=uuid4(), amount=i + 1) for i in range(lines)],
+    )
+
+
+def test_create_does_not_refresh_after_commit(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    sqlite_session.statements.reset()
+
+    created = repo.create(_invoice(uuid4(), lines=3))
+    writes = sqlite_session.statements.count
+    # Reading the response fields must not trigger any further query
+    assert [line.invoice_id for line in created.lines] == [created.id] * 3
+    assert created.invoice_number == "INV-000001"
+
+    assert sqlite_session.statements.count == writes
+    assert not any(s.lstrip().upper().startswith("SELECT") for s in sqlite_session.statements.statements)
+
+
+def test_get_by_id_loads_lines_in_bounded_queries(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    created = repo.create(_invoice(user_id, lines=5))
+    sqlite_session.expunge_all()
+    sqlite_session.statements.reset()
+
+    invoice = repo.get_by_id(created.id, user_id)
+    assert len(invoice.lines) == 5
+
+    assert sqlite_session.statements.count == 2
+
+
+def test_update_keeps_lines_loaded_without_refresh(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    invoice = repo.get_by_id(repo.create(_invoice(user_id)).id, user_id)
+
+    invoice.lines = [InvoiceLine(product_id=uuid4(), amount=7)]
+    updated = repo.update(invoice)
+    sqlite_session.statements.reset()
+
+    assert [(line.amount, line.invoice_id) for line in updated.lines] == [(7, invoice.id)]
+    assert sqlite_session.statements.count == 0
+
+
+def test_delete_is_scoped_to_user_and_removes_lines(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    created = repo.create(_invoice(user_id))
+    sqlite_session.expunge_all()
+
+    assert repo.delete(created.id, uuid4()) is False
+    sqlite_session.statements.reset()
+    assert repo.delete(created.id, user_id) is True
+
+    # lines, invoice, aggregate delta, outbox event
+    assert sqlite_session.statements.count == 4
+    assert sqlite_session.query(InvoiceLine).count() == 0
+    assert sqlite_session.query(Invoice).count() == 0
+
+
+def test_invoice_numbers_are_sequential_per_company_and_year(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    company_a, company_b = uuid4(), uuid4()
+
+    assert repo.get_next_invoice_number(company_a, 2026) == "INV-2026-000001"
+    assert repo.get_next_invoice_number(company_a, 2026) == "INV-2026-000002"
+    assert repo.get_next_invoice_number(company_b, 2026) == "INV-2026-000001"
+    assert repo.get_next_invoice_number(company_a, 2027) == "INV-2027-000001"
+
+
+def test_reserve_block_allocates_in_one_statement(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    company_id = uuid4()
+    repo.get_next_invoice_number(company_id, 2026)
+    sqlite_session.statements.reset()
+
+    numbers = repo.reserve_invoice_numbers(company_id, 2026, 3)
+
+    assert numbers == ["INV-2026-000002", "INV-2026-000003", "INV-2026-000004"]
+    assert sqlite_session.statements.count == 1
+    assert repo.get_next_invoice_number(company_id, 2026) == "INV-2026-000005"
+
+
+def test_rolled_back_allocation_leaves_no_gap(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    company_id = uuid4()
+    repo.get_next_invoice_number(company_id, 2026)
+    sqlite_session.commit()
+
+    repo.get_next_invoice_number(company_id, 2026)
+    sqlite_session.rollback()
+
+    assert repo.get_next_invoice_number(company_id, 2026) == "INV-2026-000002"
+
+
+def test_allocation_is_a_single_postgres_upsert():
+    from sqlalchemy.dialects import postgresql
+
+    from repository.invoice_numbers import build_allocate_statement, format_invoice_number
+
+    sql = str(build_allocate_statement("postgresql", uuid4(), 2026, 5).compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (company_id, year) DO UPDATE" in sql
+    assert "RETURNING invoice_number_counters.last_value" in sql
+    assert format_invoice_number(uuid4(), 2026, 42, "{year}/{seq:05d}") == "2026/00042"
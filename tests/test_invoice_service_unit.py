@@ -11,6 +11,9 @@ import pytest
 
 from models.schemas import InvoiceStatus, InvoiceUpdate
 
+# Line written before price snapshots: products still come from product-service
+LEGACY_LINE = dict(product_name=None, measuring_unit=None, unit_price=None, vat_rate=None, net=None, gross=None)
+
 
 @dataclass
 class DummyInvoice:
@@ -27,6 +30,7 @@ class DummyInvoice:
     company_name: str | None = None
     partner_name: str | None = None
     total: Decimal | None = None
+    version: int = 1
     lines: List[Any] = None
 
 
@@ -41,11 +45,13 @@ def svc_and_repo(monkeypatch):
     mock_product_client = MagicMock()
 
     monkeypatch.setattr(invoice_service_module, "InvoiceRepository", lambda db: mock_repo)
-    monkeypatch.setattr(invoice_service_module, "CompanyClient", lambda: mock_company_client)
-    monkeypatch.setattr(invoice_service_module, "PartnerClient", lambda: mock_partner_client)
-    monkeypatch.setattr(invoice_service_module, "ProductClient", lambda: mock_product_client)
 
-    svc = invoice_service_module.InvoiceService(db=MagicMock())
+    svc = invoice_service_module.InvoiceService(
+        db=MagicMock(),
+        company_client=mock_company_client,
+        partner_client=mock_partner_client,
+        product_client=mock_product_client,
+    )
     return svc, mock_repo
 
 
@@ -116,7 +122,7 @@ def test_update_invoice_updates_fields_and_calls_repo_update(svc_and_repo):
     )
 
     repo.get_by_id.return_value = invoice
-    repo.update.side_effect = lambda inv: inv  # return the same object back
+    repo.update.side_effect = lambda inv, line_diff=None: inv  # return the same object back
 
     result = svc.update_invoice(
         invoice_id,
@@ -129,3 +135,170 @@ def test_update_invoice_updates_fields_and_calls_repo_update(svc_and_repo):
     assert result.status == InvoiceStatus.PAID
     repo.update.assert_called_once()
 
+
+
+def test_get_invoice_response_enriches_from_all_clients(svc_and_repo):
+    svc, repo = svc_and_repo
+    invoice_id = uuid4()
+    product_id = uuid4()
+    now = datetime.now(tz=timezone.utc)
+
+    line = MagicMock(id=uuid4(), invoice_id=invoice_id, product_id=product_id, amount=2, **LEGACY_LINE)
+    repo.get_by_id.return_value = DummyInvoice(
+        id=invoice_id,
+        user_id=uuid4(),
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        notes=None,
+        status=InvoiceStatus.ISSUED,
+        lines=[line],
+    )
+    svc.company_client.get_company.return_value = {"companyName": "ACME"}
+    svc.partner_client.get_partner.return_value = {"naziv": "Partner"}
+    svc.product_client.get_products.return_value = [{"id": str(product_id), "cost": "10"}]
+
+    result = svc.get_invoice_response(invoice_id, "user-123")
+
+    assert result.company == {"companyName": "ACME"}
+    assert result.partner == {"naziv": "Partner"}
+    assert result.lines[0].product == {"id": str(product_id), "cost": "10"}
+    svc.product_client.get_products.assert_called_once()
+
+
+def test_create_invoice_allocates_number_when_omitted(svc_and_repo):
+    from models.schemas import InvoiceCreate
+
+    svc, repo = svc_and_repo
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    company_id = uuid4()
+    svc.company_client.get_company.return_value = None
+    svc.partner_client.get_partner.return_value = None
+    svc.product_client.get_products.return_value = []
+    repo.get_next_invoice_number.return_value = "INV-2026-000007"
+    repo.create.side_effect = lambda inv: inv
+
+    created = svc.create_invoice(
+        InvoiceCreate(
+            company_id=company_id,
+            partner_id=uuid4(),
+            issue_date=now,
+            service_date=now,
+            due_date=now,
+            lines=[],
+        ),
+        "user-123",
+    )
+
+    assert created.invoice_number == "INV-2026-000007"
+    repo.get_next_invoice_number.assert_called_once_with(company_id, 2026)
+
+
+def test_update_invoice_reprices_replaced_lines(svc_and_repo):
+    from models.schemas import InvoiceLineCreate
+
+    svc, repo = svc_and_repo
+    now = datetime.now(tz=timezone.utc)
+    product_id = uuid4()
+    invoice = DummyInvoice(
+        id=uuid4(),
+        user_id=uuid4(),
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        notes=None,
+        status=InvoiceStatus.ISSUED,
+        total=Decimal("999.00"),
+        lines=[],
+    )
+    repo.get_by_id.return_value = invoice
+
+    def flush(inv, line_diff=None):
+        inv.lines = line_diff.lines
+        return inv
+
+    repo.update.side_effect = flush
+    svc.product_client.get_products.return_value = [
+        {"id": str(product_id), "name": "Widget", "cost": 12.5, "measuringUnit": "kos", "ddvPercentage": 22}
+    ]
+
+    result = svc.update_invoice(
+        invoice.id, InvoiceUpdate(lines=[InvoiceLineCreate(product_id=product_id, amount=3)]), "user-123"
+    )
+
+    assert invoice.total == Decimal("45.75")
+    assert result.total == 45.75
+    assert result.net_total == 37.5 and result.vat_total == 8.25
+    assert [(item.vat_rate, item.gross) for item in result.vat_breakdown] == [(22.0, 45.75)]
+    assert (result.lines[0].product_name, result.lines[0].unit_price) == ("Widget", 12.5)
+    # Priced lines keep answering product from their snapshot
+    assert result.lines[0].product == {
+        "id": str(product_id), "name": "Widget", "cost": "12.50", "measuringUnit": "kos", "ddvPercentage": "22.00"
+    }
+
+
+def test_get_invoice_response_skips_product_service_for_priced_lines(svc_and_repo):
+    from models.database import InvoiceLine
+
+    svc, repo = svc_and_repo
+    now = datetime.now(tz=timezone.utc)
+    invoice_id = uuid4()
+    line = InvoiceLine(
+        id=uuid4(), invoice_id=invoice_id, product_id=uuid4(), amount=1, product_name="Widget",
+        unit_price=Decimal("10.00"), vat_rate=Decimal("22.00"), net=Decimal("10.00"), gross=Decimal("12.20"),
+    )
+    repo.get_by_id.return_value = DummyInvoice(
+        id=invoice_id,
+        user_id=uuid4(),
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        notes=None,
+        status=InvoiceStatus.ISSUED,
+        total=Decimal("12.20"),
+        lines=[line],
+    )
+    svc.company_client.get_company.return_value = None
+    svc.partner_client.get_partner.return_value = None
+
+    result = svc.get_invoice_response(invoice_id, "user-123")
+
+    assert result.total == 12.2 and result.lines[0].gross == 12.2
+    svc.product_client.get_products.assert_not_called()
+
+
+def test_stale_reads_fall_back_to_invoice_snapshots(svc_and_repo):
+    svc, repo = svc_and_repo
+    invoice = DummyInvoice(
+        id=uuid4(),
+        user_id=uuid4(),
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-1",
+        issue_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        service_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        due_date=datetime(2024, 1, 31, tzinfo=timezone.utc),
+        notes=None,
+        status=InvoiceStatus.ISSUED,
+        company_name="ACME",
+        partner_name="Partner d.o.o.",
+        lines=[],
+    )
+    repo.get_by_id.return_value = invoice
+    svc.company_client.get_company.return_value = None
+    svc.partner_client.get_partner.return_value = None
+
+    response = svc.get_invoice_response(invoice.id, "user-123", max_age=60)
+
+    assert response.company["companyName"] == "ACME"
+    assert response.partner["naziv"] == "Partner d.o.o."
+    assert svc.company_client.get_company.call_args.kwargs["max_age"] == 60
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models.database import Invoice, InvoiceStatus
+from models.schemas import InvoiceListResponse
+from repository.pagination import INVOICE_LIST_COLUMNS
+from service.invoice_service import InvoiceService
+from service.list_json import LIST_FIELDS, encode_list
+
+
+def _seed(session, user_id):
+    start = datetime(2026, 1, 1, 9, 30, 0, 123456)
+    for i, (total, notes) in enumerate(
+        [(Decimal("12.20"), 'a "quoted" note, \\ and ščž'), (None, None), (Decimal("0"), "\u0001"), (Decimal("1e7"), "")]
+    ):
+        session.add(
+            Invoice(
+                user_id=user_id,
+                company_id=uuid4(),
+                partner_id=uuid4(),
+                invoice_number=f"INV-2026-{i + 1:06d}",
+                issue_date=start + timedelta(days=i),
+                service_date=datetime(2026, 1, 1),
+                due_date=start,
+                notes=notes,
+                status=InvoiceStatus.PAID if i % 2 else InvoiceStatus.ISSUED,
+                company_name="ACME d.o.o.",
+                partner_name=None if i == 1 else "Partner",
+                total=total,
+            )
+        )
+    session.commit()
+
+
+def _response_model_body(items) -> bytes:
+    field = create_response_field(name="Response", type_=List[InvoiceListResponse])
+    content = asyncio.run(serialize_response(field=field, response_content=items))
+    return JSONResponse(content).body
+
+
+def test_list_columns_follow_schema_fields():
+    assert tuple(column.key for column in INVOICE_LIST_COLUMNS) == LIST_FIELDS
+
+
+def test_encoded_rows_match_response_model_bytes(sqlite_session):
+    user_id = uuid4()
+    _seed(sqlite_session, user_id)
+    service = InvoiceService(sqlite_session, company_client=object(), partner_client=object(), product_client=object())
+
+    rows, _ = service.list_invoice_rows(user_id, limit=10)
+    # What the endpoint returned before: ORM invoices through response_model
+    invoices = [service._to_list_response(inv) for inv in service.list_invoices(user_id)]
+
+    assert encode_list(rows) == _response_model_body(invoices)
+    assert encode_list([]) == b"[]"
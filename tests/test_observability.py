@@ -0,0 +1,84 @@
+import asyncio
+import json
+import logging
+from uuid import uuid4
+
+import grpc
+import pytest
+from prometheus_client import REGISTRY
+
+import observability
+from client.circuit_breaker import CircuitBreaker, CircuitOpenError, async_guarded_call, guarded_call
+from repository.invoice_repo import InvoiceRepository
+from service.list_json import encode_list
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+def _count(name, **labels):
+    return REGISTRY.get_sample_value(f"{name}_count", labels) or 0
+
+
+def _breaker(target):
+    return CircuitBreaker(target, window_size=10, min_calls=10, open_seconds=60)
+
+
+def test_grpc_calls_are_timed_by_target_rpc_and_status():
+    breaker = _breaker("obs-sync:1")
+
+    def fail(request, timeout):
+        raise FakeRpcError(grpc.StatusCode.NOT_FOUND)
+
+    guarded_call(breaker, lambda request, timeout: "ok", None, 1, rpc="GetCompany")
+    with pytest.raises(grpc.RpcError):
+        guarded_call(breaker, fail, None, 1, rpc="GetCompany")
+
+    labels = dict(target="obs-sync:1", rpc="GetCompany")
+    assert _count("invoice_grpc_client_seconds", status="OK", **labels) == 1
+    assert _count("invoice_grpc_client_seconds", status="NOT_FOUND", **labels) == 1
+
+
+def test_open_circuit_is_its_own_status():
+    breaker = _breaker("obs-open:1")
+    breaker._transition("open")
+
+    async def call(request, timeout):
+        return "ok"
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(async_guarded_call(breaker, call, None, 1, rpc="GetPartner"))
+
+    assert _count("invoice_grpc_client_seconds", target="obs-open:1", rpc="GetPartner", status="CIRCUIT_OPEN") == 1
+
+
+def test_repository_methods_are_timed(sqlite_session):
+    before = _count("invoice_repository_seconds", method="get_version")
+
+    assert InvoiceRepository(sqlite_session).get_version(uuid4()) is None
+
+    assert _count("invoice_repository_seconds", method="get_version") == before + 1
+
+
+def test_list_encoding_is_timed():
+    before = _count("invoice_response_build_seconds", response="list")
+
+    assert encode_list([]) == b"[]"
+
+    assert _count("invoice_response_build_seconds", response="list") == before + 1
+
+
+def test_json_log_lines_carry_extra_fields():
+    record = logging.LogRecord("client", logging.WARNING, __file__, 1, "Circuit for %s is open", ("a:1",), None)
+    record.target = "a:1"
+
+    entry = json.loads(observability.JsonFormatter().format(record))
+
+    assert entry["message"] == "Circuit for a:1 is open"
+    assert entry["level"] == "WARNING"
+    assert entry["target"] == "a:1"
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+import service.invoice_service as invoice_service
+from models.database import Invoice, InvoiceEvent, InvoiceEventType, InvoiceLine, InvoiceStatus
+from repository.event_repo import changes_query
+from repository.invoice_repo import InvoiceRepository
+from service.invoice_service import InvoiceService
+from service.outbox import MemorySink, OutboxRelay
+
+
+def _invoice(user_id):
+    now = datetime(2026, 3, 1)
+    return Invoice(
+        user_id=user_id,
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        status=InvoiceStatus.ISSUED,
+        total=10,
+        lines=[InvoiceLine(product_id=uuid4(), amount=1)],
+    )
+
+
+def _events(session):
+    return session.query(InvoiceEvent).order_by(InvoiceEvent.id).all()
+
+
+@pytest.fixture
+def relay_factory(sqlite_session):
+    def factory(sink, **kwargs):
+        return OutboxRelay(lambda: Session(bind=sqlite_session.get_bind(), expire_on_commit=False), sink, **kwargs)
+    return factory
+
+
+def test_every_write_appends_an_event_in_its_transaction(sqlite_session):
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    created = repo.create(_invoice(user_id))
+    created.status = InvoiceStatus.PAID
+    repo.update(created)
+    repo.delete(created.id, user_id)
+
+    events = _events(sqlite_session)
+    assert [e.type for e in events] == [InvoiceEventType.CREATED, InvoiceEventType.UPDATED, InvoiceEventType.DELETED]
+    assert {e.invoice_id for e in events} == {created.id}
+    assert [e.version for e in events] == [1, 2, None]
+    assert events[1].payload["status"] == "PAID" and events[1].payload["total"] == 10
+    assert events[2].payload is None
+
+
+def test_changes_feed_pages_by_id_per_user(sqlite_session, monkeypatch):
+    monkeypatch.setattr(invoice_service, "CHANGES_SETTLE_SECONDS", 0)
+    repo = InvoiceRepository(sqlite_session)
+    user_id = uuid4()
+    first, second = repo.create(_invoice(user_id)), repo.create(_invoice(user_id))
+    repo.create(_invoice(uuid4()))
+    repo.delete(first.id, user_id)
+    svc = InvoiceService(sqlite_session, MagicMock(), MagicMock(), MagicMock())
+
+    page = svc.list_changes(user_id, 0, limit=2)
+    assert [c.invoice_id for c in page.changes] == [first.id, second.id]
+    rest = svc.list_changes(user_id, page.next_since, limit=2)
+    assert [(c.invoice_id, c.type.value) for c in rest.changes] == [(first.id, "deleted")]
+    empty = svc.list_changes(user_id, rest.next_since)
+    assert empty.changes == [] and empty.next_since == rest.next_since
+
+
+def test_changes_feed_holds_back_unsettled_events(sqlite_session):
+    user_id = uuid4()
+    InvoiceRepository(sqlite_session).create(_invoice(user_id))
+    svc = InvoiceService(sqlite_session, MagicMock(), MagicMock(), MagicMock())
+
+    assert svc.list_changes(user_id).changes == []
+
+
+def test_relay_publishes_each_event_once(sqlite_session, relay_factory):
+    repo = InvoiceRepository(sqlite_session)
+    for _ in range(3):
+        repo.create(_invoice(uuid4()))
+    sink = MemorySink()
+    relay = relay_factory(sink, batch_size=2)
+
+    assert relay.drain() == 3
+    assert relay.drain() == 0
+    assert [m["type"] for m in sink.messages] == ["created"] * 3
+    assert len({m["id"] for m in sink.messages}) == 3
+    sqlite_session.expire_all()
+    assert all(e.published_at is not None for e in _events(sqlite_session))
+
+
+def test_relay_retries_a_batch_the_sink_rejected(sqlite_session, relay_factory):
+    InvoiceRepository(sqlite_session).create(_invoice(uuid4()))
+    sink = MemorySink()
+    relay = relay_factory(sink)
+    sink.publish = MagicMock(side_effect=[ConnectionError("down"), None])
+
+    assert relay.run_once() == 0
+    assert relay.run_once() == 1
+    assert sink.publish.call_count == 2
+
+
+def test_prune_removes_only_old_published_events(sqlite_session, relay_factory):
+    repo = InvoiceRepository(sqlite_session)
+    repo.create(_invoice(uuid4()))
+    repo.create(_invoice(uuid4()))
+    old, unpublished = _events(sqlite_session)
+    old.published_at = datetime.utcnow() - timedelta(days=30)
+    sqlite_session.commit()
+
+    assert relay_factory(MemorySink(), retention=timedelta(days=7)).prune() == 1
+    assert [e.id for e in _events(sqlite_session)] == [unpublished.id]
+
+
+def test_settle_window_reads_the_database_clock(sqlite_session, monkeypatch):
+    class LaggingClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2000, 1, 1)
+
+    # This pod's clock is far behind the database and the pod that wrote the event
+    monkeypatch.setattr(invoice_service, "datetime", LaggingClock)
+    monkeypatch.setattr(invoice_service, "CHANGES_SETTLE_SECONDS", 0)
+    user_id = uuid4()
+    created = InvoiceRepository(sqlite_session).create(_invoice(user_id))
+    svc = InvoiceService(sqlite_session, MagicMock(), MagicMock(), MagicMock())
+
+    assert [c.invoice_id for c in svc.list_changes(user_id).changes] == [created.id]
+    sql = str(changes_query(user_id, 0, 10, svc._settled_before()).compile(dialect=postgresql.dialect()))
+    assert "clock_timestamp()" in sql
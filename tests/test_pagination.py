@@ -0,0 +1,69 @@
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from models.schemas import InvoiceListFilters, InvoiceStatus, SortOrder
+from repository.pagination import InvalidCursor, build_page_query, decode_cursor, encode_cursor, split_page
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    issue_date = datetime(2026, 1, 10, 12, 0)
+    invoice_id = uuid4()
+
+    assert decode_cursor(encode_cursor(issue_date, invoice_id)) == (issue_date, invoice_id)
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_page_query_uses_keyset_instead_of_offset():
+    cursor = encode_cursor(datetime(2026, 1, 10), uuid4())
+    sql = _sql(build_page_query("user-1", limit=50, cursor=cursor))
+
+    assert "(invoices.issue_date, invoices.id) < (" in sql
+    assert "ORDER BY invoices.issue_date DESC, invoices.id DESC" in sql
+    assert "LIMIT" in sql
+    assert "OFFSET" not in sql
+
+
+def test_ascending_order_flips_keyset_comparison():
+    cursor = encode_cursor(datetime(2026, 1, 10), uuid4())
+    sql = _sql(build_page_query("user-1", limit=50, cursor=cursor, order=SortOrder.ASC))
+
+    assert "(invoices.issue_date, invoices.id) > (" in sql
+    assert "ORDER BY invoices.issue_date ASC, invoices.id ASC" in sql
+
+
+def test_filters_are_applied_server_side():
+    filters = InvoiceListFilters(
+        status=InvoiceStatus.PAID,
+        partner_id=uuid4(),
+        issue_date_from=datetime(2026, 1, 1),
+        issue_date_to=datetime(2026, 2, 1),
+    )
+    sql = _sql(build_page_query("user-1", filters))
+
+    assert "invoices.status = " in sql
+    assert "invoices.partner_id = " in sql
+    assert "invoices.issue_date >= " in sql
+    assert "invoices.issue_date < " in sql
+    assert "invoices.company_id" not in sql.split("WHERE", 1)[1]
+
+
+def test_split_page_returns_cursor_of_last_row_when_more_rows_exist():
+    rows = [SimpleNamespace(issue_date=datetime(2026, 1, day), id=uuid4()) for day in (3, 2, 1)]
+
+    page, next_cursor = split_page(rows, limit=2)
+
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1].issue_date, rows[1].id)
+    assert split_page(rows, limit=3) == (rows, None)
@@ -0,0 +1,181 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from models.database import Invoice, InvoiceLine, InvoiceStatus
+from models.schemas import InvoiceLineCreate, InvoiceLinePatch, InvoicePatch, InvoiceUpdate, SummaryDimension
+from repository.invoice_repo import InvoiceRepository
+from repository.line_diff import UnknownLine, match_lines
+from service.invoice_service import InvoiceService
+
+PRODUCTS = [uuid4(), uuid4(), uuid4()]
+
+
+def _priced_line(product_id, amount):
+    return InvoiceLine(
+        product_id=product_id,
+        amount=amount,
+        product_name=f"P-{str(product_id)[:4]}",
+        unit_price=Decimal("10.00"),
+        vat_rate=Decimal("22"),
+        net=Decimal("10.00") * amount,
+        gross=Decimal("12.20") * amount,
+    )
+
+
+def _stored_invoice(session, user_id, lines=None, total=Decimal("36.60")):
+    now = datetime(2026, 4, 1)
+    invoice = Invoice(
+        user_id=user_id,
+        company_id=uuid4(),
+        partner_id=uuid4(),
+        invoice_number="INV-000001",
+        issue_date=now,
+        service_date=now,
+        due_date=now,
+        notes="first draft",
+        status=InvoiceStatus.ISSUED,
+        total=total,
+        lines=lines or [_priced_line(PRODUCTS[0], 1), _priced_line(PRODUCTS[1], 2)],
+    )
+    return InvoiceRepository(session).create(invoice)
+
+
+@pytest.fixture
+def svc(sqlite_session):
+    product = MagicMock()
+    product.get_products.side_effect = lambda ids, timeout=5, **_: [
+        {"id": pid, "name": f"P-{pid[:4]}", "cost": "10.00", "ddvPercentage": "22"} for pid in ids
+    ]
+    return InvoiceService(sqlite_session, MagicMock(), MagicMock(), product)
+
+
+def _line_statements(session, verb):
+    return [s for s in session.statements.statements if s.lstrip().upper().startswith(verb) and "invoice_lines" in s]
+
+
+def test_match_lines_prefers_ids_then_same_product_and_amount():
+    a, b, c = (MagicMock(id=uuid4(), product_id=p, amount=1) for p in (PRODUCTS[0], PRODUCTS[0], PRODUCTS[1]))
+    requested = [
+        InvoiceLinePatch(product_id=PRODUCTS[0], amount=1),
+        InvoiceLinePatch(id=a.id, product_id=PRODUCTS[2], amount=5),
+        InvoiceLinePatch(product_id=PRODUCTS[2], amount=1),
+    ]
+
+    pairs, removed = match_lines([a, b, c], requested)
+
+    assert [pair.existing for pair in pairs] == [b, a, None]
+    assert [pair.changed for pair in pairs] == [False, True, True]
+    assert removed == [c]
+    with pytest.raises(UnknownLine):
+        match_lines([a], [InvoiceLinePatch(id=uuid4(), product_id=PRODUCTS[0], amount=1)])
+
+
+def test_put_writes_only_changed_lines(sqlite_session, svc):
+    user_id = uuid4()
+    invoice = _stored_invoice(sqlite_session, user_id)
+    kept_id = invoice.lines[0].id
+    sqlite_session.expunge_all()
+    sqlite_session.statements.reset()
+
+    lines = [
+        InvoiceLineCreate(product_id=PRODUCTS[0], amount=1),  # unchanged
+        InvoiceLineCreate(product_id=PRODUCTS[2], amount=3),  # replaces the PRODUCTS[1] line
+    ]
+    response = svc.update_invoice(invoice.id, InvoiceUpdate(lines=lines), user_id)
+
+    assert len(_line_statements(sqlite_session, "DELETE")) == 1
+    assert len(_line_statements(sqlite_session, "INSERT")) == 1
+    assert _line_statements(sqlite_session, "UPDATE") == []
+    svc.product_client.get_products.assert_called_once_with([str(PRODUCTS[2])], timeout=5, max_age=0)
+    assert [(line.id == kept_id, line.amount) for line in response.lines] == [(True, 1), (False, 3)]
+    assert response.total == 48.8 and response.version == 2
+    stored = sqlite_session.query(InvoiceLine).order_by(InvoiceLine.amount).all()
+    assert [(line.product_id, line.amount) for line in stored] == [(PRODUCTS[0], 1), (PRODUCTS[2], 3)]
+
+
+def test_put_prices_kept_legacy_lines_when_the_total_is_recomputed(sqlite_session, svc):
+    user_id = uuid4()
+    # Written before price snapshots existed: only the stored total knows the line's price
+    legacy = [InvoiceLine(product_id=PRODUCTS[0], amount=10)]
+    invoice = _stored_invoice(sqlite_session, user_id, lines=legacy, total=Decimal("122.00"))
+    lines = [InvoiceLineCreate(product_id=PRODUCTS[0], amount=10), InvoiceLineCreate(product_id=PRODUCTS[1], amount=1)]
+
+    response = svc.update_invoice(invoice.id, InvoiceUpdate(lines=lines), user_id)
+
+    svc.product_client.get_products.assert_called_once_with(
+        [str(PRODUCTS[0]), str(PRODUCTS[1])], timeout=5, max_age=0
+    )
+    assert response.total == 134.2
+    assert [line.gross for line in response.lines] == [122.0, 12.2]
+    assert svc.get_summary(user_id, [SummaryDimension.STATUS]).total == 134.2
+
+
+def test_put_keeps_the_stored_total_while_a_line_cannot_be_priced(sqlite_session, svc):
+    user_id = uuid4()
+    legacy = [InvoiceLine(product_id=PRODUCTS[0], amount=10)]
+    invoice = _stored_invoice(sqlite_session, user_id, lines=legacy, total=Decimal("122.00"))
+    svc.product_client.get_products.side_effect = lambda ids, timeout=5, **_: [
+        {"id": pid, "name": "New", "cost": "10.00", "ddvPercentage": "22"} for pid in ids if pid != str(PRODUCTS[0])
+    ]
+    lines = [InvoiceLineCreate(product_id=PRODUCTS[0], amount=10), InvoiceLineCreate(product_id=PRODUCTS[1], amount=1)]
+
+    response = svc.update_invoice(invoice.id, InvoiceUpdate(lines=lines), user_id)
+
+    assert response.total == 122.0
+    assert [line.gross for line in response.lines] == [None, 12.2]
+
+
+def test_patch_updates_a_line_in_place_by_id(sqlite_session, svc):
+    user_id = uuid4()
+    invoice = _stored_invoice(sqlite_session, user_id)
+    first, second = invoice.lines
+    sqlite_session.statements.reset()
+
+    response = svc.patch_invoice(
+        invoice.id,
+        InvoicePatch(lines=[
+            InvoiceLinePatch(id=first.id, product_id=first.product_id, amount=1),
+            InvoiceLinePatch(id=second.id, product_id=second.product_id, amount=4),
+        ]),
+        user_id,
+    )
+
+    assert len(_line_statements(sqlite_session, "UPDATE")) == 1
+    assert _line_statements(sqlite_session, "INSERT") == _line_statements(sqlite_session, "DELETE") == []
+    assert [(line.id, line.amount) for line in response.lines] == [(first.id, 1), (second.id, 4)]
+    # Same session: the loaded line objects were updated without a reload
+    assert second.amount == 4 and second.gross is not None
+    assert not sqlite_session.dirty
+
+
+def test_patch_changes_only_sent_fields_and_skips_no_op_writes(sqlite_session, svc):
+    user_id = uuid4()
+    invoice = _stored_invoice(sqlite_session, user_id)
+
+    response = svc.patch_invoice(invoice.id, InvoicePatch(notes=None), user_id)
+    assert response.notes is None and response.status == InvoiceStatus.ISSUED and response.version == 2
+
+    sqlite_session.statements.reset()
+    response = svc.patch_invoice(invoice.id, InvoicePatch(notes=None, status=InvoiceStatus.ISSUED), user_id)
+    assert response.version == 2
+    assert all(s.lstrip().upper().startswith("SELECT") for s in sqlite_session.statements.statements)
+
+
+def test_status_fast_path_does_not_load_lines(sqlite_session, svc):
+    user_id = uuid4()
+    invoice = _stored_invoice(sqlite_session, user_id)
+    sqlite_session.expunge_all()
+    sqlite_session.statements.reset()
+
+    response = svc.update_status(invoice.id, InvoiceStatus.PAID, user_id)
+
+    assert (response.status, response.version) == (InvoiceStatus.PAID, 2)
+    assert not any("invoice_lines" in s for s in sqlite_session.statements.statements)
+    # invoice row, aggregate upsert, outbox event, invoice update
+    assert sqlite_session.statements.count == 4
+    svc.product_client.get_products.assert_not_called()
+    assert svc.update_status(invoice.id, InvoiceStatus.PAID, uuid4()) is None
@@ -0,0 +1,47 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from service.pricing import invoice_total, price_from_product, price_line, vat_breakdown
+
+
+def test_price_line_rounds_half_up_to_cents():
+    price = price_line(3, 0.1, 22)
+
+    # 3 x 0.10 = 0.30 net, 0.066 VAT rounds to 0.07
+    assert price.net == Decimal("0.30")
+    assert price.vat == Decimal("0.07")
+    assert price.gross == Decimal("0.37")
+    assert price_line(1, "2.675", "9.5").unit_price == Decimal("2.68")
+
+
+def test_float_costs_do_not_leak_binary_noise():
+    price = price_from_product(10, {"cost": 1.1, "ddvPercentage": 22.0})
+
+    assert price.unit_price == Decimal("1.10")
+    assert price.net == Decimal("11.00")
+    assert price.gross == Decimal("13.42")
+    assert price_from_product(1, None) is None
+
+
+def test_products_with_unset_or_invalid_prices_stay_unpriced():
+    # proto3 string fields arrive as "" when the product-service never set them
+    assert price_from_product(2, {"cost": "", "ddvPercentage": "22"}) is None
+    assert price_from_product(2, {"cost": "10.00", "ddvPercentage": ""}) is None
+    assert price_from_product(2, {"cost": "n/a", "ddvPercentage": "22"}) is None
+    assert price_from_product(2, {"cost": "10.00", "ddvPercentage": "22"}).gross == Decimal("24.40")
+
+
+def test_breakdown_groups_by_rate_and_matches_total():
+    lines = [
+        SimpleNamespace(**price_line(1, "10.00", 22)._asdict()),
+        SimpleNamespace(**price_line(2, "5.55", "9.5")._asdict()),
+        SimpleNamespace(**price_line(1, "0.99", 22)._asdict()),
+        SimpleNamespace(vat_rate=None, net=None, gross=None),
+    ]
+
+    breakdown = vat_breakdown(lines)
+
+    assert [item["vat_rate"] for item in breakdown] == [Decimal("9.5"), Decimal("22")]
+    assert breakdown[1] == {"vat_rate": Decimal("22"), "net": Decimal("10.99"), "vat": Decimal("2.42"), "gross": Decimal("13.41")}
+    assert sum(item["gross"] for item in breakdown) == invoice_total(lines)
+    assert invoice_total([SimpleNamespace(gross=None)]) is None
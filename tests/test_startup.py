@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import config
+import main
+import migrate
+
+HEAD = "20261018_000011"
+
+
+@pytest.fixture
+def stamped(tmp_path, monkeypatch):
+    """Point config.engine at a SQLite file and return a function setting its Alembic revision"""
+    engine = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    monkeypatch.setattr(config, "engine", engine)
+
+    def stamp(revision):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+            conn.execute(text("DELETE FROM alembic_version"))
+            conn.execute(text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": revision})
+
+    yield stamp
+    engine.dispose()
+
+
+def test_unmigrated_database_is_not_ready(stamped):
+    ok, reason = config.schema_status()
+
+    assert not ok
+    assert "migrate.py" in reason
+
+
+@pytest.mark.parametrize(
+    "revision, ready",
+    [(HEAD, True), ("20261018_000009", False), ("20991231_000001", True)],
+)
+def test_schema_revision_against_head(stamped, revision, ready):
+    stamped(revision)
+
+    assert config.schema_status()[0] is ready
+
+
+def test_readiness_waits_for_startup_and_rechecks_a_stale_schema(monkeypatch):
+    states = iter([(False, "behind"), (True, "at head")])
+    monkeypatch.setattr(main, "schema_status", lambda: next(states))
+    readiness = main.Readiness(recheck_seconds=0)
+    readiness.schema_ok = False
+
+    assert readiness.status() == (False, "starting")
+    readiness.check_schema()
+    readiness.started = True
+
+    assert readiness.status() == (True, "at head")
+
+
+def test_ready_endpoint_reports_503_until_started(monkeypatch):
+    monkeypatch.setattr(main, "readiness", main.Readiness())
+
+    response = main.readiness_check()
+
+    assert response.status_code == 503
+    assert main.health_check() == {"status": "healthy"}
+
+
+def test_migrate_check_exit_code(monkeypatch):
+    monkeypatch.setattr(migrate, "configure_logging", lambda: None)
+    monkeypatch.setattr(config, "schema_status", lambda: (False, "behind"))
+    assert migrate.main(["--check"]) == 1
+
+    monkeypatch.setattr(config, "schema_status", lambda: (True, "at head"))
+    assert migrate.main(["--check"]) == 0